@@ -8,11 +8,17 @@ __author__ = "Shuvangkar Das"
 __description__ = "Complete Obsidian to Jekyll blog publishing system"
 
 from .converter import DaspressConverter
-from .markdown_processor import MarkdownProcessor
+from .markdown_processor import MarkdownProcessor, ConversionResult
 from .status_reporter import StatusReporter
 from .config import DaspressConfig
-
-__all__ = ['DaspressConverter', 'MarkdownProcessor', 'StatusReporter', 'DaspressConfig']
+from .session import ConversionSession, PostResult
+from .async_converter import AsyncDaspressConverter
+from .filesystem import FileSystem, LocalFileSystem, MemoryFileSystem
+from .asset_store import AssetStore, S3FileSystem
+
+__all__ = ['DaspressConverter', 'MarkdownProcessor', 'StatusReporter', 'DaspressConfig',
+           'ConversionSession', 'PostResult', 'ConversionResult', 'AsyncDaspressConverter',
+           'FileSystem', 'LocalFileSystem', 'MemoryFileSystem', 'AssetStore', 'S3FileSystem']
 
 
 # """
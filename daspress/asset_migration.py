@@ -0,0 +1,148 @@
+"""
+Asset layout migration for daspress
+Moves already published images into the configured folder layout and
+rewrites the links to them
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from .assets import asset_subdir
+from .config import DaspressConfig
+from .responsive import VARIANTS_FOLDER
+from .status_reporter import StatusReporter
+from .utils import files_identical, write_text_if_changed
+
+
+IMAGES_URL = '/assets/images/'
+IMAGE_LINK_PATTERN = re.compile(re.escape(IMAGES_URL) + r'([^\s"\')>]+)')
+POST_EXTENSIONS = ('.md', '.markdown', '.html')
+
+
+class AssetMigrator:
+    """
+    One-time move of images into the layout set by `images.layout`
+
+    For the post and date layouts an image goes to the folder of the first
+    post (by filename) that links to it; images no post links to stay where
+    they are. Responsive variants are left in place, so existing srcset links
+    keep working until posts are reconverted.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize migrator
+
+        Args:
+            config (DaspressConfig): Loaded configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+
+    def migrate(self, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Migrate the images of every target site
+
+        Args:
+            dry_run (bool): Only report what would be moved
+
+        Returns:
+            dict: Counts of moved images, updated posts and skipped images
+        """
+        summary = {'moved': 0, 'posts_updated': 0, 'skipped': 0}
+        for target_config in self.config.get_targets():
+            for key, count in self._migrate_target(target_config, dry_run).items():
+                summary[key] += count
+        return summary
+
+    def _migrate_target(self, target_config: DaspressConfig, dry_run: bool) -> Dict[str, int]:
+        layout = target_config.get_asset_layout()
+        images_dir = target_config.get_jekyll_images_folder()
+        posts = self._posts(target_config.get_jekyll_posts_folder())
+
+        contents = {}
+        first_user: Dict[str, str] = {}
+        for post in posts:
+            try:
+                with open(post, 'r', encoding='utf-8') as f:
+                    contents[post] = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                self.reporter.warning(f"Skipping unreadable post {post}: {e}")
+                continue
+            for rel_path in IMAGE_LINK_PATTERN.findall(contents[post]):
+                first_user.setdefault(rel_path, post)
+
+        images = []
+        for root, dirs, filenames in os.walk(images_dir):
+            dirs[:] = [name for name in dirs if name != VARIANTS_FOLDER]
+            images.extend(os.path.join(root, filename) for filename in filenames)
+
+        moves: Dict[str, str] = {}
+        skipped = 0
+        for path in images:
+            filename = os.path.basename(path)
+            rel_path = os.path.relpath(path, images_dir).replace(os.sep, '/')
+            post = first_user.get(rel_path)
+            if layout in ('post', 'date') and post is None:
+                continue
+            subdir = asset_subdir(layout, path, post)
+            new_rel_path = f"{subdir}/{filename}" if subdir else filename
+            if new_rel_path == rel_path:
+                continue
+
+            dest = os.path.join(images_dir, *new_rel_path.split('/'))
+            if os.path.exists(dest) and not files_identical(path, dest):
+                self.reporter.warning(f"Not moving {rel_path}: a different {new_rel_path} already exists")
+                skipped += 1
+                continue
+            self.reporter.log(f"{'Would move' if dry_run else 'Moving'} {rel_path} → {new_rel_path}")
+            if not dry_run:
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                if os.path.exists(dest):
+                    os.remove(path)  # identical copy already in place
+                else:
+                    os.rename(path, dest)
+            moves[rel_path] = new_rel_path
+
+        updated = 0
+        if moves:
+            def relink(match):
+                return IMAGES_URL + moves.get(match.group(1), match.group(1))
+
+            for post, content in contents.items():
+                new_content = IMAGE_LINK_PATTERN.sub(relink, content)
+                if new_content != content:
+                    updated += 1
+                    if not dry_run:
+                        write_text_if_changed(post, new_content)
+            headers_path = target_config.get_headers_file()
+            if not dry_run and os.path.exists(headers_path):
+                with open(headers_path, 'r', encoding='utf-8') as f:
+                    headers = f.read()
+                write_text_if_changed(headers_path, IMAGE_LINK_PATTERN.sub(relink, headers))
+            if not dry_run:
+                self._remove_empty_dirs(images_dir)
+
+        self.reporter.user_info(
+            f"{target_config.get_target_name()}: {len(moves)} image(s) {'to move' if dry_run else 'moved'} "
+            f"to the '{layout}' layout, {updated} post(s) relinked"
+        )
+        return {'moved': len(moves), 'posts_updated': updated, 'skipped': skipped}
+
+    @staticmethod
+    def _posts(posts_dir: str) -> List[str]:
+        posts = []
+        for root, _, filenames in os.walk(posts_dir):
+            posts.extend(os.path.join(root, name) for name in filenames if name.lower().endswith(POST_EXTENSIONS))
+        return sorted(posts)
+
+    @staticmethod
+    def _remove_empty_dirs(images_dir: str):
+        for root, _, _ in os.walk(images_dir, topdown=False):
+            if root != images_dir and not os.listdir(root):
+                try:
+                    os.rmdir(root)
+                except OSError:
+                    pass
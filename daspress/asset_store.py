@@ -0,0 +1,281 @@
+"""
+Content-addressed asset store for daspress
+Uploads copied images to storage outside the site repository (a local folder
+served separately or an S3-compatible bucket) so git only carries text
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .assets import IMMUTABLE_CACHE_CONTROL
+from .filesystem import FileSystem, LocalFileSystem
+from .status_reporter import StatusReporter
+from .metrics import BYTES_COPIED, CACHE_REQUESTS
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # optional dependency
+    boto3 = None
+
+
+class S3FileSystem(FileSystem):
+    """
+    Objects in an S3-compatible bucket, addressed by key below a prefix
+
+    Needs boto3 (`pip install daspress[s3]`); credentials come from the usual
+    AWS environment variables and config files.
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', endpoint_url: Optional[str] = None,
+                 cache_control: Optional[str] = None, client=None):
+        """
+        Initialize filesystem
+
+        Args:
+            bucket (str): Bucket name
+            prefix (str): Key prefix every path is placed under
+            endpoint_url (str, optional): Endpoint of a non-AWS S3-compatible service
+            cache_control (str, optional): Cache-Control header of written objects
+            client (optional): Preconfigured boto3 S3 client
+        """
+        if client is None:
+            if boto3 is None:
+                raise RuntimeError("boto3 is required for S3 asset stores (pip install daspress[s3])")
+            client = boto3.client('s3', endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.cache_control = cache_control
+
+    def exists(self, path: str) -> bool:
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(path))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def open(self, path: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(path))['Body']
+
+    def write_if_changed(self, path: str, data: bytes) -> bool:
+        # Keys are content-addressed: an existing object already has this content
+        if self.exists(path):
+            return False
+        extra = {'ContentType': mimetypes.guess_type(path)[0] or 'application/octet-stream'}
+        if self.cache_control:
+            extra['CacheControl'] = self.cache_control
+        self.client.put_object(Bucket=self.bucket, Key=self._key(path), Body=data, **extra)
+        return True
+
+    def remove(self, path: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(path))
+
+    def list_files(self, directory: str) -> Iterator[str]:
+        prefix = self._key(directory).rstrip('/') + '/'
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix.lstrip('/')):
+            for item in page.get('Contents', []):
+                yield item['Key'][len(prefix.lstrip('/')):]
+
+    def _key(self, path: str) -> str:
+        key = posixpath.normpath(str(path).replace('\\', '/')).lstrip('/')
+        key = '' if key == '.' else key
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+
+class AssetStore:
+    """
+    Upload images under content-addressed keys and hand out their public URLs
+
+    An image is stored as `<sha[:2]>/<sha256><ext>`, so identical content is
+    stored once no matter how many posts or names use it. The URL is known as
+    soon as the image is hashed; the upload itself runs on a thread pool and
+    each key is uploaded at most once per process. Keys known to be in the
+    store are remembered in a state file, so later runs do not check the
+    store for them again.
+    """
+
+    def __init__(self, filesystem: FileSystem, base_url: str, root: str = '',
+                 index_path: Optional[str] = None, workers: int = 8,
+                 reporter: Optional[StatusReporter] = None):
+        """
+        Initialize store
+
+        Args:
+            filesystem (FileSystem): Storage the assets are written to
+            base_url (str): Public URL the storage root is served at
+            root (str): Folder (or key prefix) inside the filesystem
+            index_path (str, optional): JSON file remembering uploaded keys
+            workers (int): Concurrent uploads
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.filesystem = filesystem
+        self.base_url = base_url.rstrip('/')
+        self.root = root
+        self.index_path = index_path
+        self.workers = max(1, int(workers))
+        self.reporter = reporter or StatusReporter()
+        self.stored = set()  # keys known to be in the store
+        self._uploads: Dict[str, Future] = {}  # key -> upload started by this process
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if index_path:
+            self._load()
+
+    @staticmethod
+    def key_for(digest: str, filename: str) -> str:
+        """
+        Get the content-addressed key of an asset
+
+        Args:
+            digest (str): SHA-256 hex digest of the content
+            filename (str): Original filename (for the extension)
+
+        Returns:
+            str: Key relative to the store root
+        """
+        return f"{digest[:2]}/{digest}{os.path.splitext(filename)[1].lower()}"
+
+    def url(self, key: str) -> str:
+        """Get the public URL of a key"""
+        return f"{self.base_url}/{key}"
+
+    def upload(self, source_fs: FileSystem, source_path: str, digest: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Schedule an asset for upload unless it is already stored
+
+        Args:
+            source_fs (FileSystem): Filesystem to read the asset from
+            source_path (str): Path of the asset
+            digest (str, optional): Known SHA-256 of the asset (saves hashing it)
+
+        Returns:
+            tuple: (public URL, True if this call started an upload)
+        """
+        key = self.key_for(digest or source_fs.digest(source_path), source_path)
+        with self._lock:
+            if key in self.stored or key in self._uploads:
+                CACHE_REQUESTS.inc(cache='asset_store', result='hit')
+                return self.url(key), False
+            CACHE_REQUESTS.inc(cache='asset_store', result='miss')
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='daspress-upload')
+            self._uploads[key] = self._executor.submit(self._upload, source_fs, source_path, key)
+        return self.url(key), True
+
+    def wait(self, urls: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Wait for uploads to finish
+
+        Args:
+            urls (iterable, optional): URLs returned by upload() to wait for
+                (default: every upload started so far)
+
+        Returns:
+            list: Error messages of failed uploads (failed keys are retried on the next upload())
+        """
+        prefix = self.base_url + '/'
+        with self._lock:
+            if urls is None:
+                keys = list(self._uploads)
+            else:
+                keys = [url[len(prefix):] for url in urls if url.startswith(prefix)]
+            futures = [(key, self._uploads[key]) for key in keys if key in self._uploads]
+
+        errors = []
+        for key, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"Failed to upload {key} to the asset store: {e}")
+                with self._lock:
+                    if self._uploads.get(key) is future:
+                        del self._uploads[key]
+        return errors
+
+    def save(self):
+        """Write the index of stored keys to disk if it changed"""
+        if not self.index_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        with self._lock:
+            data = {'base_url': self.base_url, 'keys': sorted(self.stored)}
+            self._dirty = False
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+    def close(self):
+        """Finish pending uploads, save the index and stop the upload threads"""
+        for error in self.wait():
+            self.reporter.error(error)
+        self.save()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _upload(self, source_fs: FileSystem, source_path: str, key: str):
+        path = posixpath.join(self.root.replace(os.sep, '/'), key) if self.root else key
+        if self.filesystem.exists(path):
+            self.reporter.log(f"Asset already stored: {key}")
+        else:
+            data = source_fs.read_bytes(source_path)
+            self.filesystem.makedirs(posixpath.dirname(path))
+            self.filesystem.write_if_changed(path, data)
+            BYTES_COPIED.inc(len(data))
+            self.reporter.log(f"Uploaded asset: {source_path} → {key}")
+        with self._lock:
+            self.stored.add(key)
+            self._dirty = True
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('base_url') == self.base_url:
+            self.stored = set(data.get('keys', []))
+
+
+def create_asset_store(settings: Dict, state_folder: str,
+                       reporter: Optional[StatusReporter] = None) -> AssetStore:
+    """
+    Create the asset store described by `images.store` settings
+
+    Args:
+        settings (dict): Output of DaspressConfig.get_asset_store_settings()
+        state_folder (str): Folder for the index of stored keys
+        reporter (StatusReporter, optional): Status reporter instance
+
+    Returns:
+        AssetStore: Store writing to a local folder or an S3-compatible bucket
+    """
+    if settings['bucket']:
+        filesystem = S3FileSystem(settings['bucket'], settings['prefix'] or '', settings['endpoint'],
+                                  cache_control=IMMUTABLE_CACHE_CONTROL)
+        location = f"s3:{settings['endpoint'] or ''}/{settings['bucket']}/{settings['prefix'] or ''}"
+        root = ''
+    else:
+        filesystem = LocalFileSystem()
+        root = location = os.path.abspath(os.path.expanduser(settings['folder']))
+    name = hashlib.sha256(f"{location}\0{settings['url']}".encode('utf-8')).hexdigest()[:16]
+    return AssetStore(
+        filesystem,
+        settings['url'],
+        root,
+        os.path.join(state_folder, f"asset-store-{name}.json"),
+        settings['workers'],
+        reporter
+    )
@@ -0,0 +1,198 @@
+"""
+Asset naming helpers for daspress
+Content-addressed filenames and immutable cache headers for copied images
+"""
+
+import hashlib
+import os
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+
+HASH_LENGTH = 16
+HASHED_NAME_PATTERN = re.compile(r'^([0-9a-f]{%d})-' % HASH_LENGTH)
+ASSET_LAYOUTS = ('flat', 'hash', 'post', 'date')
+DATED_POST_PATTERN = re.compile(r'^(\d{4})-(\d{2})-\d{2}-(.+)$')
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+HEADERS_BEGIN = "# daspress:immutable-assets begin"
+HEADERS_END = "# daspress:immutable-assets end"
+
+_digest_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(file_path: str) -> str:
+    """
+    Get SHA-256 hex digest of a file
+
+    Digests are memoized by path, size and mtime so an unchanged file is only
+    read once per process.
+
+    Args:
+        file_path (str): Path to file
+
+    Returns:
+        str: Hex digest of the file content
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    digest = _digest_cache.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        _digest_cache[key] = digest
+    return digest
+
+
+def slugify(name: str) -> str:
+    """
+    Turn a filename stem into a lowercase URL slug
+
+    Args:
+        name (str): Original name
+
+    Returns:
+        str: Slug containing only a-z, 0-9 and hyphens
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+    return slug or 'image'
+
+
+def hashed_asset_name(filename: str, digest: str) -> str:
+    """
+    Build content-addressed asset filename: <hash>-<slug><ext>
+
+    Args:
+        filename (str): Original filename
+        digest (str): Hex digest of the file content
+
+    Returns:
+        str: Content-addressed filename
+    """
+    stem, ext = os.path.splitext(os.path.basename(filename))
+    return f"{digest[:HASH_LENGTH]}-{slugify(stem)}{ext.lower()}"
+
+
+def asset_subdir(layout: str, source_path: str, post_path: Optional[str] = None,
+                 digest: Optional[str] = None) -> str:
+    """
+    Get the folder of an asset inside the images folder for a directory layout
+
+    Layouts:
+        flat: every asset directly in the images folder
+        hash: two levels of content hash prefix (`ab/cd`)
+        post: one folder per post slug (`my-post`)
+        date: year and month of the post (`2024/05`, `undated` without a date prefix)
+
+    Args:
+        layout (str): One of ASSET_LAYOUTS
+        source_path (str): Source file of the asset (hashed in the hash layout)
+        post_path (str, optional): Post that uses the asset; post and date
+            layouts fall back to flat without it
+        digest (str, optional): Known SHA-256 of the asset (saves hashing it)
+
+    Returns:
+        str: Relative folder with '/' separators, '' for the images folder itself
+    """
+    if layout == 'hash':
+        digest = digest or file_digest(source_path)
+        return f"{digest[:2]}/{digest[2:4]}"
+    if layout in ('post', 'date') and post_path:
+        stem = os.path.splitext(os.path.basename(post_path))[0]
+        dated = DATED_POST_PATTERN.match(stem)
+        if layout == 'post':
+            return slugify(dated.group(3) if dated else stem)
+        return f"{dated.group(1)}/{dated.group(2)}" if dated else 'undated'
+    return ''
+
+
+def scan_hashed_assets(directory: str, recursive: bool = False, skip_dirs: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Index content-addressed assets already present in a directory
+
+    Args:
+        directory (str): Directory to scan
+        recursive (bool): Also scan subfolders (sharded layouts)
+        skip_dirs (iterable): Subfolder names not to descend into
+
+    Returns:
+        dict: Short hash → path relative to the directory ('/' separators)
+    """
+    index = {}
+    skip_dirs = set(skip_dirs)
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            with os.scandir(os.path.join(directory, rel_dir)) as entries:
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if entry.is_dir():
+                        if recursive and entry.name not in skip_dirs:
+                            pending.append(rel_path)
+                        continue
+                    match = HASHED_NAME_PATTERN.match(entry.name)
+                    if match:
+                        index.setdefault(match.group(1), rel_path)
+        except FileNotFoundError:
+            pass
+    return index
+
+
+def write_immutable_headers(headers_path: str, url_paths: Iterable[str]) -> bool:
+    """
+    Write a Netlify/Cloudflare style `_headers` block marking paths immutable
+
+    Only the block between the daspress markers is replaced, so rules that
+    the user maintains by hand are kept.
+
+    Args:
+        headers_path (str): Path of the headers file
+        url_paths (iterable): Site-absolute URL paths of immutable assets
+
+    Returns:
+        bool: True if the file content changed
+    """
+    existing = ""
+    if os.path.exists(headers_path):
+        with open(headers_path, 'r', encoding='utf-8') as f:
+            existing = f.read()
+
+    content = render_immutable_headers(existing, url_paths)
+    if content == existing:
+        return False
+
+    with open(headers_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+
+def render_immutable_headers(existing: str, url_paths: Iterable[str]) -> str:
+    """
+    Replace (or append) the daspress block of a `_headers` file's content
+
+    Args:
+        existing (str): Current content of the headers file ("" if missing)
+        url_paths (iterable): Site-absolute URL paths of immutable assets
+
+    Returns:
+        str: New content of the headers file
+    """
+    block = [HEADERS_BEGIN]
+    for url_path in sorted(set(url_paths)):
+        block.append(url_path)
+        block.append(f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+    block.append(HEADERS_END)
+
+    begin = existing.find(HEADERS_BEGIN)
+    end = existing.find(HEADERS_END)
+    if begin != -1 and end != -1:
+        before = existing[:begin]
+        after = existing[end + len(HEADERS_END):].lstrip('\n')
+    else:
+        before = existing + ('\n' if existing and not existing.endswith('\n') else '')
+        after = ""
+
+    return before + "\n".join(block) + "\n" + after
@@ -0,0 +1,305 @@
+"""
+Asyncio API for daspress
+Converts and publishes posts from an event loop without blocking it
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .config import DaspressConfig
+from .converter import DaspressConverter
+from .jekyll_server import SPARSE_WORKSPACE_ERROR
+from .markdown_processor import MarkdownProcessor
+from .status_reporter import StatusReporter
+from .workspace import PublishWorkspace
+from .metrics import PHASE_SECONDS, POSTS_CONVERTED, GIT_PUSH_SECONDS, GIT_PUSH_FAILURES
+
+
+class AsyncDaspressConverter:
+    """
+    Async counterpart of DaspressConverter
+
+    File work (reading posts, copying images, writing output) runs in a
+    bounded thread pool through the reentrant MarkdownProcessor.convert, git
+    runs through asyncio subprocesses, and a semaphore limits how many posts
+    are converted at once. Publishes to the same repository are serialized.
+
+    Example:
+        async with AsyncDaspressConverter(config) as converter:
+            results = await asyncio.gather(*(
+                converter.convert_and_publish(post, "remote_only") for post in posts
+            ))
+    """
+
+    def __init__(self,
+                 config: Optional[DaspressConfig] = None,
+                 reporter: Optional[StatusReporter] = None,
+                 markdown_processor: Optional[MarkdownProcessor] = None,
+                 max_conversions: int = 4,
+                 max_io_workers: int = 8):
+        """
+        Initialize the async converter
+
+        Args:
+            config (DaspressConfig, optional): Configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+            markdown_processor (MarkdownProcessor, optional): Markdown processor instance
+            max_conversions (int): Posts converted concurrently
+            max_io_workers (int): Threads for blocking file work
+        """
+        self.converter = DaspressConverter(config, reporter, markdown_processor)
+        self.reporter = self.converter.reporter
+        self.config = self.converter.config
+        self.max_conversions = max_conversions
+        self._executor = ThreadPoolExecutor(max_workers=max_io_workers, thread_name_prefix='daspress-io')
+        self._conversion_slots: Optional[asyncio.Semaphore] = None
+        self._setup_lock: Optional[asyncio.Lock] = None
+        self._publish_locks: Dict[str, asyncio.Lock] = {}
+        self._targets: Optional[List[Tuple[DaspressConfig, MarkdownProcessor]]] = None
+
+    async def __aenter__(self) -> 'AsyncDaspressConverter':
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Save caches and release the worker threads"""
+        if self._targets is not None:
+            await self._run_blocking(self.converter._save_caches)
+        self._executor.shutdown(wait=False)
+
+    async def convert(self, blog_name: str) -> bool:
+        """
+        Convert an Obsidian post to Jekyll format for every target
+
+        Args:
+            blog_name (str): Name of the blog post file or absolute path
+
+        Returns:
+            bool: True if conversion successful
+        """
+        if not await self._setup():
+            return False
+        if not self.converter._validate_inputs(blog_name):
+            return False
+
+        paths = self.converter._setup_paths(blog_name)
+        async with self._conversion_slots:
+            start_time = time.perf_counter()
+            success = await self._convert_post(paths)
+            PHASE_SECONDS.observe(time.perf_counter() - start_time, phase='convert')
+        POSTS_CONVERTED.inc(result='success' if success else 'failure')
+        if success:
+            self.reporter.success(f"Conversion completed: {paths['jekyll_md_path']}")
+        return success
+
+    async def convert_and_publish(self, blog_name: str, publishing_mode: str = "convert_only") -> bool:
+        """
+        Convert an Obsidian post and publish it
+
+        Args:
+            blog_name (str): Name of the blog post file or absolute path
+            publishing_mode (str): One of: convert_only, local_only, remote_only, both
+
+        Returns:
+            bool: True if operation successful
+        """
+        try:
+            if not await self.convert(blog_name):
+                return False
+            start_time = time.perf_counter()
+            published = await self.publish(publishing_mode)
+            PHASE_SECONDS.observe(time.perf_counter() - start_time, phase='publish')
+            return published
+        except Exception as e:
+            self.reporter.error(f"Unexpected error during conversion: {e}")
+            return False
+
+    async def publish(self, publishing_mode: str) -> bool:
+        """
+        Publish converted posts in the given mode
+
+        Args:
+            publishing_mode (str): One of: convert_only, local_only, remote_only, both
+
+        Returns:
+            bool: True if publishing successful
+        """
+        if publishing_mode == "convert_only":
+            self.reporter.log("Conversion complete. No publishing requested.")
+            return True
+        if publishing_mode == "local_only":
+            return await self.start_local_server()
+        if publishing_mode == "remote_only":
+            return await self.publish_to_git()
+        if publishing_mode == "both":
+            if not self.converter.jekyll_server.has_full_checkout():
+                self.reporter.warning(f"Local server skipped: {SPARSE_WORKSPACE_ERROR}")
+                return await self.publish_to_git()
+            _, remote = await asyncio.gather(self.start_local_server(), self.publish_to_git())
+            return remote
+        self.reporter.error(f"Unknown publishing mode: {publishing_mode}")
+        return False
+
+    async def start_local_server(self) -> bool:
+        """Start (or reuse) the background Jekyll server without waiting for it"""
+        return await self._run_blocking(self.converter._start_jekyll_truly_background)
+
+    async def publish_to_git(self) -> bool:
+        """Commit and push every target site"""
+        if not await self._setup():
+            return False
+        results = await asyncio.gather(*(
+            self._publish_target(target) for target in self.config.get_targets()
+        ))
+        return all(results)
+
+    async def _publish_target(self, target_config: DaspressConfig) -> bool:
+        """Publish one target, from its managed workspace when it has one"""
+        workspace = PublishWorkspace(target_config, self.reporter)
+        if not workspace.enabled:
+            return await self._publish_to_git(target_config.get_jekyll_root_folder())
+        lock = self._publish_locks.setdefault(workspace.path, asyncio.Lock())
+        async with lock:
+            return await self._run_blocking(workspace.publish)
+
+    async def _setup(self) -> bool:
+        """Load configuration and prepare per-target processors once"""
+        if self._setup_lock is None:
+            self._setup_lock = asyncio.Lock()
+            self._conversion_slots = asyncio.Semaphore(self.max_conversions)
+        async with self._setup_lock:
+            if self._targets is not None:
+                return True
+            if not await self._run_blocking(self.config.load_config):
+                return False
+            if not await self._run_blocking(self.converter._prepare_workspaces):
+                return False
+            await self._run_blocking(self.converter._configure_processor)
+
+            targets = [(self.config, self.converter.markdown_processor)]
+            for target_config in self.config.get_targets()[1:]:
+                targets.append((target_config, self.converter.target_processors[target_config.get_target_name()]))
+            self._targets = targets
+            return True
+
+    async def _convert_post(self, paths: Dict[str, str]) -> bool:
+        """Read a post once and render it into every target concurrently"""
+        source_fs = self.converter.markdown_processor.source_fs
+        if not await self._run_blocking(source_fs.exists, paths['obsidian_md_path']):
+            self.reporter.error(f"File does not exist: {paths['obsidian_md_path']}")
+            return False
+        try:
+            content = await self._run_blocking(self.converter._read_text, source_fs, paths['obsidian_md_path'])
+        except (OSError, ValueError) as e:
+            self.reporter.error(f"Failed to read markdown file: {e}")
+            return False
+
+        jobs = []
+        sources = []  # attachments used by any target
+        for target_config, processor in self._targets:
+            target_paths = paths if target_config is self.config else self.converter._target_paths(paths, target_config)
+            jobs.append(self._write_target(target_config, processor, content, target_paths, sources))
+        results = await asyncio.gather(*jobs)
+
+        if all(results):
+            self.converter.converted_posts.append(paths['jekyll_md_path'])
+            if self.converter.attachment_index is not None:
+                self.converter.attachment_index.record(paths['obsidian_md_path'], list(dict.fromkeys(sources)))
+        return all(results)
+
+    async def _write_target(self, target_config: DaspressConfig, processor: MarkdownProcessor,
+                            content: str, paths: Dict[str, str], sources: List[str]) -> bool:
+        """Render and write one post into one target site, collecting the attachments it used"""
+        if not await self._run_blocking(self.converter._create_directories, paths, processor):
+            return False
+
+        result = await self._run_blocking(
+            processor.convert, content, paths['obsidian_img_dir'], paths['jekyll_img_dir'], paths['obsidian_md_path'],
+            paths['jekyll_md_path']
+        )
+        for warning in result.warnings:
+            self.reporter.warning(warning)
+        for error in result.errors:
+            self.reporter.error(error)
+        if not result.success:
+            return False
+        if processor.asset_store is not None:
+            urls = [asset.destination for asset in result.assets]
+            errors = await self._run_blocking(processor.asset_store.wait, urls)
+            for error in errors:
+                self.reporter.error(error)
+            if errors:
+                return False
+
+        try:
+            changed = await self._run_blocking(processor.sink_fs.write_text_if_changed, paths['jekyll_md_path'],
+                                               result.content)
+        except OSError as e:
+            self.reporter.error(f"Failed to write processed content: {e}")
+            return False
+
+        self.reporter.record_write(changed)
+        for asset in result.assets:
+            self.reporter.record_write(asset.copied)
+        filename = os.path.basename(paths['obsidian_md_path'])
+        self.reporter.user_info(f"Blog post: \"{filename}\" {'copied' if changed else 'unchanged'}"
+                                f" in '{target_config.get_target_name()}'")
+
+        sources.extend(asset.source for asset in result.assets)
+        await self._run_blocking(self.converter._index_post, target_config, paths['jekyll_md_path'], result.content)
+        if processor.asset_naming == 'hash' and processor.asset_store is None:
+            await self._run_blocking(self.converter._write_asset_headers, paths, processor, target_config)
+        return True
+
+    async def _publish_to_git(self, jekyll_root: str) -> bool:
+        """Commit and push one repository (serialized per repository)"""
+        lock = self._publish_locks.setdefault(jekyll_root, asyncio.Lock())
+        async with lock:
+            try:
+                await self._git(jekyll_root, 'add', '.')
+                returncode, _, _ = await self._git(jekyll_root, 'diff', '--cached', '--quiet', check=False)
+                if returncode == 0:
+                    self.reporter.user_info("Repository already up to date - no changes to publish")
+                    return True
+
+                _, stdout, _ = await self._git(jekyll_root, 'commit', '-m', 'Published blog post')
+                self.reporter.user_info("Changes committed to local repository")
+                self.reporter.log(f"Commit output: {stdout.strip()}")
+
+                start_time = time.perf_counter()
+                try:
+                    _, stdout, stderr = await self._git(jekyll_root, 'push')
+                except (OSError, RuntimeError):
+                    GIT_PUSH_FAILURES.inc()
+                    raise
+                finally:
+                    GIT_PUSH_SECONDS.observe(time.perf_counter() - start_time)
+                self.reporter.user_info("Blog post published to GitHub")
+                if stderr.strip():
+                    self.reporter.log(f"Push details: {stderr.strip()}")
+                return True
+            except (OSError, RuntimeError) as e:
+                self.reporter.error(f"Git publishing failed: {e}")
+                return False
+
+    async def _git(self, cwd: str, *args: str, check: bool = True) -> Tuple[int, str, str]:
+        """Run git without blocking the event loop"""
+        process = await asyncio.create_subprocess_exec(
+            'git', *args, cwd=cwd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        stdout, stderr = stdout.decode(errors='replace'), stderr.decode(errors='replace')
+        if check and process.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} exited with {process.returncode}: {stderr.strip()}")
+        return process.returncode, stdout, stderr
+
+    async def _run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
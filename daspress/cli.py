@@ -3,8 +3,10 @@ Command line interface for daspress
 """
 
 import argparse
+import json
 import sys
 import os
+import time
 from typing import Optional
 
 # Set UTF-8 encoding for the entire process
@@ -12,6 +14,14 @@ os.environ['PYTHONIOENCODING'] = 'utf-8'
 
 from .converter import DaspressConverter
 from .config import DaspressConfig
+from .jekyll_server import JekyllServerManager
+from .journal import BatchJournal
+from .work_queue import WorkQueue
+from .session import ConversionSession
+from .link_checker import LinkChecker
+from .asset_migration import AssetMigrator
+from .preview import PreviewServer
+from .metrics import REGISTRY, LAST_RUN
 from .status_reporter import StatusReporter, StatusCode
 from . import __version__
 
@@ -44,6 +54,53 @@ def create_parser():
     both_parser = subparsers.add_parser('both', help='Convert, run locally and publish remotely')
     both_parser.add_argument('blog_name', help='Name of the blog post file')
     
+    # Batch command (convert many posts with a resumable journal)
+    batch_parser = subparsers.add_parser('batch', help='Convert many posts, resumable after an interruption')
+    batch_parser.add_argument('posts', nargs='*', help='Blog post files (default: every post in the posts folder)')
+    batch_parser.add_argument('--resume', action='store_true', help='Skip posts completed by the previous batch run')
+    batch_parser.add_argument('--journal', type=str, help='Journal file (default: <state folder>/batch-journal.jsonl)')
+    batch_parser.add_argument('--queue', nargs='?', const='', metavar='DIR',
+                              help='Share the batch with other hosts through a queue folder (default: queue.folder)')
+    batch_parser.add_argument('--worker-id', type=str, help='Worker name in the queue (default: <hostname>-<pid>)')
+    batch_parser.add_argument('--report', type=str, help='Write the merged queue report as JSON to this file')
+    
+    # Rebuild command (reconvert posts that embed changed attachments)
+    rebuild_parser = subparsers.add_parser('rebuild', help='Reconvert the posts that embed changed attachments')
+    rebuild_parser.add_argument('attachments', nargs='*', help='Attachment files (default: detect changes)')
+    rebuild_parser.add_argument('--changed-attachments', action='store_true',
+                                help='Detect attachments changed since their posts were converted')
+    rebuild_parser.add_argument('--watch', action='store_true', help='Keep watching attachments and rebuild on change')
+    rebuild_parser.add_argument('--interval', type=float, default=1.0, help='Watch poll interval in seconds')
+    
+    # Preview command (instant preview without Jekyll)
+    preview_parser = subparsers.add_parser('preview', help='Preview a post with live reload, without Jekyll')
+    preview_parser.add_argument('blog_name', help='Name of the blog post file')
+    preview_parser.add_argument('--port', type=int, help='Preview server port (default: 4001)')
+    preview_parser.add_argument('--open', action='store_true', help='Open the preview in a browser')
+    
+    # Server command (manage the background Jekyll server)
+    server_parser = subparsers.add_parser('server', help='Manage the background Jekyll server')
+    server_parser.add_argument('action', choices=['start', 'status', 'stop'], help='Server action')
+    
+    # Optimize command (minify + precompress the built site)
+    optimize_parser = subparsers.add_parser('optimize', help='Minify and precompress the built Jekyll site')
+    optimize_parser.add_argument('--build', action='store_true', help='Run jekyll build first')
+    
+    # Deploy command (build + delta sync of _site)
+    deploy_parser = subparsers.add_parser('deploy', help='Build the site and sync changed files to a target')
+    deploy_parser.add_argument('--target', type=str, help='Local folder or [user@]host:/path (default: deploy.target)')
+    deploy_parser.add_argument('--no-build', action='store_true', help='Deploy the existing _site without building')
+    
+    # Migrate-assets command (move images into images.layout)
+    migrate_parser = subparsers.add_parser('migrate-assets', help='Move published images into the configured images.layout')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved')
+    
+    # Check command (verify internal links of the built site)
+    check_parser = subparsers.add_parser('check', help='Check internal links and assets of the built site')
+    check_parser.add_argument('--site', type=str, help='Built site folder (default: <jekyll root>/_site)')
+    check_parser.add_argument('--incremental', action='store_true', help='Only check pages changed since the last run')
+    check_parser.add_argument('--report', type=str, help='Write machine-readable JSON report to this file')
+    
     # Global options (apply to all commands)
     parser.add_argument('--config', type=str, help='Path to custom config file')
     parser.add_argument('--json', action='store_true', help='Output status in JSON format')
@@ -55,6 +112,48 @@ def create_parser():
 
 
 
+def export_metrics(config: DaspressConfig, reporter: StatusReporter, success: bool):
+    """Write the metrics textfile if one is configured"""
+    LAST_RUN.set(time.time(), result='success' if success else 'failure')
+    textfile = config.get_metrics_settings()['textfile']
+    if not textfile:
+        return
+    try:
+        REGISTRY.write_textfile(textfile)
+        reporter.log(f"Metrics written to: {textfile}")
+    except OSError as e:
+        reporter.warning(f"Failed to write metrics textfile {textfile}: {e}")
+
+
+def run_queue_batch(config: DaspressConfig, reporter: StatusReporter, args, posts):
+    """Work on a distributed batch through a shared queue folder"""
+    settings = config.get_queue_settings()
+    queue_dir = args.queue or settings['folder']
+    if not queue_dir:
+        reporter.report_final_status(StatusCode.ERROR_INVALID_ARGS, "No queue folder given (pass --queue DIR or set queue.folder)")
+        return
+    
+    queue = WorkQueue(queue_dir, args.worker_id, float(settings['lease_seconds']), reporter)
+    reporter.log(f"Queued {queue.enqueue(posts)} new post(s) in {queue_dir} as worker {queue.worker_id}")
+    try:
+        with ConversionSession(config, reporter) as session:
+            results = session.convert_queue(queue)
+    except KeyboardInterrupt:
+        export_metrics(config, reporter, False)
+        reporter.report_final_status(StatusCode.ERROR_PROCESSING, "Worker interrupted, its leases will expire and be reclaimed")
+        return
+    
+    report = queue.report()
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    reporter.log(f"Queue workers: {report['workers']}")
+    export_metrics(config, reporter, all(result.success for result in results))
+    summary = (f"This worker converted {len(results)} post(s); queue: {report['succeeded']} succeeded, "
+               f"{report['failed']} failed, {report['pending']} pending of {report['total']}")
+    reporter.report_final_status(StatusCode.ERROR_PROCESSING if report['failed'] else StatusCode.SUCCESS, summary)
+
+
 def main():
     """Main CLI entry point"""
     parser = create_parser()
@@ -86,6 +185,218 @@ def main():
             )
         return
     
+    # Handle server command
+    if args.command == 'server':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        if not config.load_config():
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Failed to load configuration")
+            return
+        
+        manager = JekyllServerManager(config, reporter)
+        if args.action == 'start':
+            ok = manager.ensure_running(wait=True)
+            summary = f"Jekyll server running at {manager.url}" if ok else "Jekyll server failed to start"
+        elif args.action == 'stop':
+            ok = manager.stop()
+            summary = "Jekyll server stopped" if ok else "Failed to stop Jekyll server"
+        else:
+            ok = True
+            status = manager.status()
+            reporter.log(f"Jekyll server status: {status}")
+            summary = f"Jekyll server {'running at ' + status['url'] if status['running'] else 'not running'}"
+            reporter.user_info(summary)
+        
+        reporter.report_final_status(
+            StatusCode.SUCCESS if ok else StatusCode.ERROR_JEKYLL_SERVER,
+            summary
+        )
+        return
+    
+    # Handle batch command
+    if args.command == 'batch':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        if not config.load_config():
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Failed to load configuration")
+            return
+        
+        posts = args.posts or sorted(
+            name for name in os.listdir(config.get_obsidian_posts_folder()) if name.lower().endswith('.md')
+        )
+        if args.queue is not None:
+            run_queue_batch(config, reporter, args, posts)
+            return
+        journal = BatchJournal(args.journal or os.path.join(config.get_state_folder(), 'batch-journal.jsonl'))
+        if args.resume:
+            reporter.log(f"Resuming batch: {journal.load()} post(s) in journal {journal.journal_path}")
+        else:
+            journal.reset()
+        
+        counts = {'converted': 0, 'skipped': 0, 'failed': 0}
+        try:
+            with ConversionSession(config, reporter) as session:
+                for index, result in enumerate(session.convert_many(posts, journal), 1):
+                    status = 'skipped' if result.skipped else 'converted' if result.success else 'failed'
+                    counts[status] += 1
+                    reporter.user_info(f"[{index}/{len(posts)}] {result.post}: {status}")
+        except KeyboardInterrupt:
+            export_metrics(config, reporter, False)
+            reporter.report_final_status(
+                StatusCode.ERROR_PROCESSING,
+                f"Batch interrupted after {counts['converted'] + counts['skipped']} post(s), rerun with --resume"
+            )
+            return
+        
+        export_metrics(config, reporter, not counts['failed'])
+        summary = f"{counts['converted']} converted, {counts['skipped']} skipped, {counts['failed']} failed"
+        reporter.report_final_status(StatusCode.ERROR_PROCESSING if counts['failed'] else StatusCode.SUCCESS, summary)
+        return
+    
+    # Handle rebuild command
+    if args.command == 'rebuild':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        if not args.attachments and not (args.changed_attachments or args.watch):
+            reporter.report_final_status(StatusCode.ERROR_INVALID_ARGS,
+                                         "Give attachment files or use --changed-attachments / --watch")
+            return
+        
+        session = ConversionSession(config, reporter)
+        if not session.open():
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Failed to load configuration")
+            return
+        
+        results = session.rebuild_attachments(args.attachments or None)
+        if args.watch:
+            reporter.user_info("Watching attachments for changes, press Ctrl+C to stop")
+            try:
+                while True:
+                    time.sleep(args.interval)
+                    results += session.rebuild_attachments()
+            except KeyboardInterrupt:
+                reporter.user_info("Stopped watching attachments")
+        session.close()
+        
+        failed = [result.post for result in results if not result.success]
+        export_metrics(config, reporter, not failed)
+        if failed:
+            reporter.report_final_status(StatusCode.ERROR_PROCESSING, f"Failed to rebuild: {', '.join(failed)}")
+        else:
+            reporter.report_final_status(StatusCode.SUCCESS, f"Rebuilt {len(results)} post(s)")
+        return
+    
+    # Handle preview command
+    if args.command == 'preview':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        preview = PreviewServer(config, reporter)
+        if not preview.start(args.blog_name, port=args.port):
+            reporter.report_final_status(StatusCode.ERROR_PROCESSING, f"Failed to preview '{args.blog_name}'")
+            return
+        
+        if args.open:
+            import webbrowser
+            webbrowser.open(preview.url)
+        reporter.user_info("Watching for changes, press Ctrl+C to stop")
+        preview.serve_forever()
+        reporter.report_final_status(StatusCode.SUCCESS, "Preview stopped")
+        return
+    
+    # Handle optimize command
+    if args.command == 'optimize':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        converter = DaspressConverter(config=config, reporter=reporter)
+        success = config.load_config() and converter.optimize_site(build=args.build)
+        export_metrics(config, reporter, success)
+        if success:
+            reporter.report_final_status(StatusCode.SUCCESS, "Site optimization completed")
+        else:
+            reporter.report_final_status(StatusCode.ERROR_PROCESSING, "Site optimization failed")
+        return
+    
+    # Handle deploy command
+    if args.command == 'deploy':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        converter = DaspressConverter(config=config, reporter=reporter)
+        success = config.load_config() and converter.deploy_site(args.target, build=not args.no_build)
+        export_metrics(config, reporter, success)
+        if success:
+            reporter.report_final_status(StatusCode.SUCCESS, "Site deployed")
+        else:
+            reporter.report_final_status(StatusCode.ERROR_PROCESSING, "Site deployment failed")
+        return
+    
+    # Handle migrate-assets command
+    if args.command == 'migrate-assets':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        if not config.load_config():
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Failed to load configuration")
+            return
+        
+        try:
+            summary = AssetMigrator(config, reporter).migrate(dry_run=args.dry_run)
+        except OSError as e:
+            reporter.report_final_status(StatusCode.ERROR_PROCESSING, f"Asset migration failed: {e}")
+            return
+        action = "would be moved" if args.dry_run else "moved"
+        reporter.report_final_status(
+            StatusCode.ERROR_PROCESSING if summary['skipped'] else StatusCode.SUCCESS,
+            f"{summary['moved']} image(s) {action}, {summary['posts_updated']} post(s) relinked, "
+            f"{summary['skipped']} skipped"
+        )
+        return
+    
+    # Handle check command
+    if args.command == 'check':
+        config = DaspressConfig(
+            config_path=args.config,
+            reporter=reporter
+        )
+        if not config.load_config():
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Failed to load configuration")
+            return
+        
+        report = LinkChecker(config, reporter).check(args.site, incremental=args.incremental)
+        export_metrics(config, reporter, bool(report) and not report['broken_count'])
+        if report is None:
+            reporter.report_final_status(StatusCode.ERROR_FILE_NOT_FOUND, "Built site not found")
+            return
+        
+        if args.report:
+            with open(args.report, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            reporter.log(f"Link report written to: {args.report}")
+        
+        if report['broken_count']:
+            reporter.report_final_status(
+                StatusCode.ERROR_PROCESSING,
+                f"{report['broken_count']} broken link(s) in {report['pages_total']} page(s)"
+            )
+        else:
+            reporter.report_final_status(
+                StatusCode.SUCCESS,
+                f"All internal links OK ({report['links_checked']} checked)"
+            )
+        return
+    
     # All other commands need blog_name and config
     blog_name = args.blog_name
     
@@ -116,6 +427,7 @@ def main():
             blog_name=blog_name,
             publishing_mode=publishing_mode
         )
+        export_metrics(config, reporter, success)
         
         if success:
             reporter.report_final_status(
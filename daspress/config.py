@@ -2,9 +2,10 @@
 Configuration management for daspress
 """
 
+import copy
 import os
 import yaml
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from .status_reporter import StatusReporter
 
 
@@ -105,12 +106,68 @@ class DaspressConfig:
             self.reporter.error(f"Obsidian images folder does not exist: {obsidian_images}")
             return False
         
-        if not os.path.exists(jekyll_root):
+        # A managed workspace is cloned on first use, so it may not exist yet
+        managed = bool(self.get_workspace_settings()['remote'])
+        if not managed and not os.path.exists(jekyll_root):
             self.reporter.error(f"Jekyll root folder does not exist: {jekyll_root}")
             return False
         
+        naming = self.config_data.get('images', {}).get('naming', 'original')
+        if naming not in ('original', 'hash'):
+            self.reporter.error(f"Invalid 'images.naming' value: {naming} (use 'original' or 'hash')")
+            return False
+        
+        image_output = self.config_data.get('images', {}).get('output', 'markdown')
+        if image_output not in ('markdown', 'html'):
+            self.reporter.error(f"Invalid 'images.output' value: {image_output} (use 'markdown' or 'html')")
+            return False
+        
+        store = self.get_asset_store_settings()
+        if store['url'] and not (store['folder'] or store['bucket']):
+            self.reporter.error("Config 'images.store' needs a 'folder' or a 'bucket' next to 'url'")
+            return False
+        
         # NEW: Validate Jekyll structure
-        return self._validate_jekyll_structure(jekyll_root)
+        if not managed and not self._validate_jekyll_structure(jekyll_root):
+            return False
+        
+        return self._validate_targets()
+    
+    def _validate_targets(self) -> bool:
+        """Validate additional publishing targets"""
+        targets = self.config_data.get('targets', [])
+        if not isinstance(targets, list):
+            self.reporter.error("Config 'targets' must be a list")
+            return False
+        
+        names = {self.config_data['jekyll'].get('name', 'main')}
+        for index, target in enumerate(targets):
+            if not isinstance(target, dict) or not target.get('root_folder'):
+                self.reporter.error(f"Config 'targets[{index}]' needs a 'root_folder' field")
+                return False
+            
+            name = target.get('name', f"target-{index + 1}")
+            if name in names:
+                self.reporter.error(f"Duplicate target name: {name}")
+                return False
+            names.add(name)
+            
+            naming = target.get('images', {}).get('naming', 'original')
+            if naming not in ('original', 'hash'):
+                self.reporter.error(f"Invalid 'images.naming' value for target '{name}': {naming}")
+                return False
+            
+            if (target.get('workspace') or {}).get('remote'):
+                continue
+            
+            if not os.path.exists(target['root_folder']):
+                self.reporter.error(f"Jekyll root folder for target '{name}' does not exist: {target['root_folder']}")
+                return False
+            
+            if not self._validate_jekyll_structure(target['root_folder']):
+                return False
+        
+        return True
     
     def get_obsidian_posts_folder(self) -> str:
         """Get obsidian posts folder path"""
@@ -120,6 +177,18 @@ class DaspressConfig:
         """Get obsidian images folder path"""
         return self.config_data['obsidian']['images_folder']
     
+    def get_embed_settings(self) -> Dict[str, Any]:
+        """Get note transclusion settings: enabled, extra search folders and depth"""
+        obsidian = self.config_data.get('obsidian', {})
+        folders = [obsidian['posts_folder']]
+        if obsidian.get('vault_folder'):
+            folders.append(obsidian['vault_folder'])
+        return {
+            'enabled': obsidian.get('embeds', True),
+            'folders': folders,
+            'max_depth': int(obsidian.get('embed_depth', 4))
+        }
+    
     def get_jekyll_posts_folder(self) -> str:
         """Get jekyll posts folder path"""
         return self.config_data['jekyll']['posts_folder']
@@ -180,6 +249,175 @@ class DaspressConfig:
         """Get jekyll images folder path - auto-calculated"""
         return os.path.join(self.get_jekyll_root_folder(), 'assets', 'images')
 
+    def get_jekyll_port(self) -> int:
+        """Get port for the local Jekyll server (default 4000)"""
+        return int(self.config_data.get('jekyll', {}).get('port', 4000))
+
+    def get_jekyll_host(self) -> str:
+        """Get host for the local Jekyll server (default localhost)"""
+        return self.config_data.get('jekyll', {}).get('host', 'localhost')
+
+    def get_jekyll_serve_command(self) -> str:
+        """Get command used to start the local Jekyll server"""
+        return self.config_data.get('jekyll', {}).get('serve_command', 'bundle exec jekyll serve')
+
+    def get_jekyll_idle_timeout(self) -> int:
+        """Get idle timeout in seconds for the local Jekyll server (0 disables)"""
+        return int(self.config_data.get('jekyll', {}).get('idle_timeout', 0))
+
+    def get_jekyll_preview_profile(self) -> Dict[str, Any]:
+        """
+        Get settings of the fast local preview profile
+        
+        When enabled, `local` runs serve only the posts converted in this run
+        (plus posts they link to) with `--incremental`.
+        """
+        jekyll = self.config_data.get('jekyll', {})
+        return {
+            'enabled': bool(jekyll.get('fast_preview', True)),
+            'exclude': list(jekyll.get('preview_exclude', []) or [])
+        }
+
+    def get_target_name(self) -> str:
+        """Get name of the Jekyll site this config publishes to"""
+        return self.config_data['jekyll'].get('name', 'main')
+
+    def get_targets(self) -> List['DaspressConfig']:
+        """
+        Get one config per publishing target
+        
+        The `jekyll` section is always the first (main) target. Entries of the
+        optional `targets` list add mirrors that override `root_folder` and,
+        optionally, `images`, `highlight` and `workspace` settings.
+        
+        Returns:
+            list: DaspressConfig instances, one per target
+        """
+        targets = [self]
+        for index, target in enumerate(self.config_data.get('targets', [])):
+            targets.append(self.for_target(target, f"target-{index + 1}"))
+        return targets
+
+    def for_target(self, target: Dict[str, Any], default_name: str = 'target') -> 'DaspressConfig':
+        """
+        Create a config view for one additional target
+        
+        Args:
+            target (dict): Target entry from the `targets` list
+            default_name (str): Name used when the entry has none
+            
+        Returns:
+            DaspressConfig: Config sharing obsidian settings with this one
+        """
+        target_config = DaspressConfig(self.config_path, self.reporter)
+        target_config.config_data = copy.deepcopy(self.config_data)
+        target_config.config_data.pop('targets', None)
+        target_config.config_data['jekyll'].update({
+            'root_folder': target['root_folder'],
+            'name': target.get('name', default_name),
+            'workspace': target.get('workspace', {})
+        })
+        for section in ('images', 'highlight'):
+            if section in target:
+                target_config.config_data.setdefault(section, {}).update(target[section])
+        return target_config
+
+    def get_asset_naming(self) -> str:
+        """Get naming mode for copied images: 'original' or 'hash'"""
+        return self.config_data.get('images', {}).get('naming', 'original')
+
+    def get_asset_layout(self) -> str:
+        """Get folder layout of copied images: 'flat', 'hash', 'post' or 'date'"""
+        return self.config_data.get('images', {}).get('layout', 'flat')
+
+    def get_asset_store_settings(self) -> Dict[str, Any]:
+        """Get content-addressed asset store settings (url set: images go to `folder` or `bucket`, not git)"""
+        settings = {'url': None, 'folder': None, 'bucket': None, 'prefix': '', 'endpoint': None, 'workers': 8}
+        settings.update(self.config_data.get('images', {}).get('store', {}) or {})
+        return settings
+
+    def get_image_output(self) -> str:
+        """Get output format of image links: 'markdown' or 'html'"""
+        return self.config_data.get('images', {}).get('output', 'markdown')
+
+    def get_responsive_settings(self) -> Dict[str, Any]:
+        """Get responsive image settings: breakpoint widths and worker count"""
+        settings = {'widths': [], 'workers': None}
+        settings.update(self.config_data.get('images', {}).get('responsive', {}) or {})
+        return settings
+
+    def get_headers_file(self) -> str:
+        """Get path of the hosting headers file written in hash naming mode"""
+        headers_file = self.config_data.get('images', {}).get('headers_file', '_headers')
+        return os.path.join(self.get_jekyll_root_folder(), headers_file)
+
+    def get_optimize_settings(self) -> Dict[str, Any]:
+        """Get post-build optimization settings merged with defaults"""
+        settings = {
+            'enabled': False,
+            'minify': True,
+            'gzip': True,
+            'brotli': True,
+            'workers': None
+        }
+        settings.update(self.config_data.get('optimize', {}) or {})
+        return settings
+
+    def get_preview_settings(self) -> Dict[str, Any]:
+        """Get settings of the built-in preview server"""
+        settings = {'host': '127.0.0.1', 'port': 4001, 'poll_interval': 0.5}
+        settings.update(self.config_data.get('preview', {}) or {})
+        return settings
+
+    def get_deploy_settings(self) -> Dict[str, Any]:
+        """Get deploy target and sync settings merged with defaults"""
+        settings = {
+            'target': None,
+            'workers': 8,
+            'keep_releases': 3,
+            'ssh': 'ssh',
+            'rsync': 'rsync'
+        }
+        settings.update(self.config_data.get('deploy', {}) or {})
+        return settings
+
+    def get_workspace_settings(self) -> Dict[str, Any]:
+        """Get managed publishing workspace settings (remote set: root_folder is a sparse clone)"""
+        settings = {'remote': None, 'branch': None, 'paths': []}
+        settings.update(self.config_data['jekyll'].get('workspace', {}) or {})
+        return settings
+
+    def get_queue_settings(self) -> Dict[str, Any]:
+        """Get shared work queue settings for distributed batch runs"""
+        settings = {'folder': None, 'lease_seconds': 60}
+        settings.update(self.config_data.get('queue', {}) or {})
+        return settings
+
+    def get_highlight_settings(self) -> Dict[str, Any]:
+        """Get code pre-highlighting settings (css is a stylesheet path relative to the Jekyll root)"""
+        settings = {'enabled': False, 'style': 'default', 'css': None}
+        settings.update(self.config_data.get('highlight', {}) or {})
+        return settings
+
+    def get_search_settings(self) -> Dict[str, Any]:
+        """Get client-side search index settings (folder is relative to the Jekyll root)"""
+        settings = {'enabled': False, 'folder': 'assets/search', 'prefix_length': 2}
+        settings.update(self.config_data.get('search', {}) or {})
+        return settings
+
+    def get_metrics_settings(self) -> Dict[str, Any]:
+        """Get metrics export settings: node-exporter textfile path and HTTP port"""
+        settings = {'textfile': None, 'port': None, 'host': ''}
+        settings.update(self.config_data.get('metrics', {}) or {})
+        return settings
+
+    def get_state_folder(self) -> str:
+        """Get folder for daspress runtime state and caches"""
+        state_folder = self.config_data.get('daspress', {}).get('state_folder')
+        if state_folder:
+            return state_folder
+        return os.path.join(os.path.expanduser('~'), '.daspress', 'state')
+
     def interactive_setup(self) -> bool:
         """Run interactive setup wizard"""
         self.reporter.log("Welcome to daspress! Let's set up your publishing pipeline.")
@@ -2,22 +2,38 @@
 Main converter class for daspress
 """
 
+import io
 import os
+import re
 import shutil
 import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 
 
 
 from .utils import (
     sanitize_filename, 
-    ensure_directory_exists, 
-    validate_file_exists, 
     validate_directory_exists
 )
 from .status_reporter import StatusReporter, StatusCode
 from .markdown_processor import MarkdownProcessor
 from .config import DaspressConfig
+from .jekyll_server import JekyllServerManager, SPARSE_WORKSPACE_ERROR
+from .assets import render_immutable_headers
+from .optimizer import SiteOptimizer
+from .deploy import SiteDeployer
+from .image_info import ImageSizeCache
+from .responsive import ResponsiveImageGenerator
+from .transclusion import NoteEmbedder
+from .highlight import CodeHighlighter
+from .dependencies import AttachmentIndex
+from .search_index import SearchIndex
+from .asset_store import create_asset_store
+from .workspace import PublishWorkspace
+from .filesystem import FileSystem, LocalFileSystem
+from .metrics import PHASE_SECONDS, POSTS_CONVERTED, GIT_PUSH_SECONDS, GIT_PUSH_FAILURES
 
 
 class DaspressConverter:
@@ -40,6 +56,17 @@ class DaspressConverter:
         self.reporter = reporter or StatusReporter()
         self.config = config or DaspressConfig(reporter=self.reporter)
         self.markdown_processor = markdown_processor or MarkdownProcessor(self.reporter)
+        self.jekyll_server = JekyllServerManager(self.config, self.reporter)
+        self._verified_dirs = None  # set of checked directory tuples when reused by a session
+        self._defer_cache_saves = False  # True while a session saves the caches once, on close
+        self.converted_posts = []  # Jekyll post paths written in this run, built by the preview profile
+        self.last_outputs = []  # files (posts and images, all targets) produced by the last post
+        self.attachment_index = None  # AttachmentIndex filled while converting
+        self.target_processors = {}  # target name -> MarkdownProcessor of each additional target
+        self.search_indexes = {}  # target name -> SearchIndex, for targets with search enabled
+        self.asset_stores = {}  # target name -> AssetStore, for targets with `images.store`
+        self._asset_store_settings = {}  # target name -> settings the store was created with
+        self._prepared_workspaces = set()  # roots of managed workspaces already cloned or pulled
     
     def convert(self, blog_name: str, start_server: bool = False) -> bool:
         """
@@ -54,8 +81,11 @@ class DaspressConverter:
         """
         try:
             # Load configuration
-            if not self.config.load_config():
+            with PHASE_SECONDS.time(phase='load_config'):
+                loaded = self.config.load_config()
+            if not loaded or not self._prepare_workspaces():
                 return False
+            self._configure_processor()
             
             # Validate inputs
             if not self._validate_inputs(blog_name):
@@ -84,6 +114,101 @@ class DaspressConverter:
             self.reporter.error(f"Unexpected error during conversion: {e}")
             return False
     
+    def _prepare_workspaces(self) -> bool:
+        """Clone or update the managed publishing workspace of each target, once per converter"""
+        for target_config in self.config.get_targets():
+            workspace = PublishWorkspace(target_config, self.reporter)
+            if not workspace.enabled or workspace.path in self._prepared_workspaces:
+                continue
+            with PHASE_SECONDS.time(phase='workspace'):
+                prepared = workspace.prepare()
+            if not prepared:
+                return False
+            self._prepared_workspaces.add(workspace.path)
+        return True
+
+    def _configure_processor(self):
+        """Apply loaded configuration to the markdown processor of every target"""
+        index_path = os.path.join(self.config.get_state_folder(), 'attachments.json')
+        if self.attachment_index is None or self.attachment_index.index_path != index_path:
+            self.attachment_index = AttachmentIndex(index_path)
+        self._configure_search()
+        self._configure_asset_stores()
+        
+        processor = self.markdown_processor
+        embeds = self.config.get_embed_settings()
+        if not embeds['enabled']:
+            processor.set_embedder(None)
+        elif processor.embedder is None or processor.embedder.notes_dirs != embeds['folders']:
+            processor.set_embedder(NoteEmbedder(
+                embeds['folders'],
+                os.path.join(self.config.get_state_folder(), 'notes.json'),
+                embeds['max_depth'],
+                self.reporter
+            ))
+        self._configure_target(self.config, processor)
+        
+        processors = {}
+        for target_config in self.config.get_targets()[1:]:
+            name = target_config.get_target_name()
+            target_processor = self.target_processors.get(name)
+            if target_processor is None:
+                # Targets render in parallel, so each gets its own caches and variant generator
+                target_processor = processor.copy()
+                target_processor.image_sizes = None
+                target_processor.responsive = None
+                target_processor.highlighter = None
+            elif (target_processor.source_fs, target_processor.sink_fs) != (processor.source_fs, processor.sink_fs):
+                target_processor.set_filesystems(processor.source_fs, processor.sink_fs)
+            # Notes are the same for every target; the embedder serializes its expansions
+            target_processor.set_embedder(processor.embedder)
+            self._configure_target(target_config, target_processor)
+            processors[name] = target_processor
+        for name, target_processor in self.target_processors.items():
+            if processors.get(name) is not target_processor and target_processor.responsive is not None:
+                target_processor.responsive.close()
+        self.target_processors = processors
+    
+    def _configure_target(self, target_config: DaspressConfig, processor: MarkdownProcessor):
+        """
+        Apply a target's image and highlight settings to the processor rendering it
+        
+        Args:
+            target_config (DaspressConfig): Config of the target
+            processor (MarkdownProcessor): Processor used only for this target
+        """
+        processor.set_asset_naming(target_config.get_asset_naming())
+        processor.set_asset_layout(target_config.get_asset_layout())
+        processor.set_asset_store(self.asset_stores.get(target_config.get_target_name()))
+        search_index = self.search_indexes.get(target_config.get_target_name())
+        if search_index is not None:
+            search_index.filesystem = processor.sink_fs
+        
+        responsive = target_config.get_responsive_settings()
+        if target_config.get_image_output() == 'html' or responsive['widths']:
+            cache_path = self._state_path(target_config, 'image-sizes.json')
+            if not processor.image_sizes or processor.image_sizes.cache_path != cache_path:
+                processor.image_sizes = ImageSizeCache(cache_path)
+        processor.set_image_output(target_config.get_image_output())
+        
+        self._configure_highlighter(target_config, processor)
+        
+        if not responsive['widths']:
+            if processor.responsive is not None:
+                processor.responsive.close()
+            processor.set_responsive(None)
+        elif processor.responsive is None or processor.responsive.widths != sorted(set(responsive['widths'])):
+            if processor.responsive is not None:
+                processor.responsive.close()
+            processor.set_responsive(ResponsiveImageGenerator(responsive['widths'], responsive['workers'], self.reporter))
+    
+    def _state_path(self, target_config: DaspressConfig, filename: str) -> str:
+        """Get a cache file in the state folder, suffixed with the target name for additional targets"""
+        if target_config is not self.config:
+            stem, ext = os.path.splitext(filename)
+            filename = f"{stem}-{re.sub(r'[^A-Za-z0-9_.-]', '_', target_config.get_target_name())}{ext}"
+        return os.path.join(self.config.get_state_folder(), filename)
+    
     def _validate_inputs(self, blog_name: str) -> bool:
         """
         Validate input parameters
@@ -143,34 +268,123 @@ class DaspressConverter:
 
 
     
-    def _create_directories(self, paths: Dict[str, str]) -> bool:
+    def _create_directories(self, paths: Dict[str, str], processor: Optional[MarkdownProcessor] = None) -> bool:
         """
         Create necessary directories
         
         Args:
             paths (dict): Dictionary containing paths
+            processor (MarkdownProcessor, optional): Processor of the target (default: the main one),
+                whose filesystems are checked and written to
             
         Returns:
             bool: True if directories created successfully
         """
-        # Ensure Jekyll directories exist
-        if not ensure_directory_exists(paths['jekyll_img_dir']):
-            self.reporter.error(f"Failed to create Jekyll images directory: {paths['jekyll_img_dir']}")
-            return False
+        processor = processor or self.markdown_processor
+        dirs_key = (paths['jekyll_img_dir'], paths['jekyll_post_dir'], paths['obsidian_img_dir'])
+        if self._verified_dirs is not None and dirs_key in self._verified_dirs:
+            return True
         
-        if not ensure_directory_exists(paths['jekyll_post_dir']):
-            self.reporter.error(f"Failed to create Jekyll posts directory: {paths['jekyll_post_dir']}")
-            return False
+        # Ensure Jekyll directories exist
+        for key, name in (('jekyll_img_dir', 'images'), ('jekyll_post_dir', 'posts')):
+            try:
+                processor.sink_fs.makedirs(paths[key])
+            except OSError:
+                self.reporter.error(f"Failed to create Jekyll {name} directory: {paths[key]}")
+                return False
         
-        # Validate obsidian images directory exists
-        is_valid, error_msg = validate_directory_exists(paths['obsidian_img_dir'])
-        if not is_valid:
-            self.reporter.error(error_msg)
-            return False
+        # Validate obsidian images directory exists (other storage has no directories)
+        if isinstance(processor.source_fs, LocalFileSystem):
+            is_valid, error_msg = validate_directory_exists(paths['obsidian_img_dir'])
+            if not is_valid:
+                self.reporter.error(error_msg)
+                return False
         
+        if self._verified_dirs is not None:
+            self._verified_dirs.add(dirs_key)
         return True
     
     
+    def _configure_highlighter(self, target_config: DaspressConfig, processor: MarkdownProcessor):
+        """Enable code pre-highlighting when the target sets `highlight.enabled`"""
+        settings = target_config.get_highlight_settings()
+        if not settings['enabled']:
+            processor.set_highlighter(None)
+            return
+        
+        cache_path = self._state_path(target_config, 'highlight.json')
+        highlighter = processor.highlighter
+        if highlighter is None or highlighter.cache_path != cache_path or highlighter.style != settings['style']:
+            highlighter = CodeHighlighter(cache_path, settings['style'], self.reporter)
+            processor.set_highlighter(highlighter)
+        
+        if settings['css'] and highlighter.available:
+            css_path = os.path.join(target_config.get_jekyll_root_folder(), settings['css'])
+            try:
+                processor.sink_fs.makedirs(os.path.dirname(css_path))
+                if processor.sink_fs.write_text_if_changed(css_path, highlighter.css()):
+                    self.reporter.log(f"Highlight stylesheet written: {css_path}")
+            except OSError as e:
+                self.reporter.warning(f"Failed to write highlight stylesheet {css_path}: {e}")
+    
+    def _configure_search(self):
+        """Create a search index for every target that has `search.enabled`"""
+        indexes = {}
+        for target_config in self.config.get_targets():
+            settings = target_config.get_search_settings()
+            if not settings['enabled']:
+                continue
+            name = target_config.get_target_name()
+            index = self.search_indexes.get(name)
+            index_dir = os.path.join(target_config.get_jekyll_root_folder(), settings['folder'])
+            if index is None or index.index_dir != index_dir:
+                index = SearchIndex(
+                    target_config.get_jekyll_root_folder(),
+                    self.config.get_state_folder(),
+                    settings['folder'],
+                    int(settings['prefix_length'])
+                )
+            indexes[name] = index
+        self.search_indexes = indexes
+    
+    def _configure_asset_stores(self):
+        """Create an asset store for every target that has `images.store.url`"""
+        stores = {}
+        for target_config in self.config.get_targets():
+            settings = target_config.get_asset_store_settings()
+            if not settings['url']:
+                continue
+            name = target_config.get_target_name()
+            store = self.asset_stores.get(name)
+            if store is None or self._asset_store_settings.get(name) != settings:
+                store = create_asset_store(settings, self.config.get_state_folder(), self.reporter)
+                self._asset_store_settings[name] = settings
+            stores[name] = store
+        for name, store in self.asset_stores.items():
+            if stores.get(name) is not store:
+                store.close()
+        self.asset_stores = stores
+    
+    def _wait_for_uploads(self, processor: MarkdownProcessor) -> bool:
+        """Wait until the images of the last render are in the asset store"""
+        if processor.asset_store is None:
+            return True
+        errors = processor.asset_store.wait(image.destination for image in processor.images_used)
+        for error in errors:
+            self.reporter.error(error)
+        return not errors
+    
+    def _index_post(self, target_config: DaspressConfig, post_path: str, content: str):
+        """Update the target's search index with a converted post"""
+        index = self.search_indexes.get(target_config.get_target_name())
+        if index is None:
+            return
+        try:
+            shards = index.update(post_path, content)
+            self.reporter.log(f"Search index updated for {os.path.basename(post_path)}: {shards} shard(s) written")
+        except OSError as e:
+            self.reporter.warning(f"Failed to update search index: {e}")
+    
     def _process_conversion(self, paths: Dict[str, str]) -> bool:
         """
         Process the actual conversion
@@ -181,64 +395,250 @@ class DaspressConverter:
         Returns:
             bool: True if conversion successful
         """
+        with PHASE_SECONDS.time(phase='convert'):
+            success = self._convert_post(paths)
+        POSTS_CONVERTED.inc(result='success' if success else 'failure')
+        return success
+    
+    def _convert_post(self, paths: Dict[str, str]) -> bool:
+        """
+        Read, render and write one post to every target
+        
+        Args:
+            paths (dict): Dictionary containing paths
+            
+        Returns:
+            bool: True if conversion successful
+        """
+        self.last_outputs = []
+        
         # Validate source markdown file
-        is_valid, error_msg = validate_file_exists(paths['obsidian_md_path'])
-        if not is_valid:
-            self.reporter.error(error_msg)
+        if not self.markdown_processor.source_fs.exists(paths['obsidian_md_path']):
+            self.reporter.error(f"File does not exist: {paths['obsidian_md_path']}")
             return False
         
-        # Copy markdown file to Jekyll directory
+        # Read the source markdown file once for all targets
         try:
-            shutil.copy2(paths['obsidian_md_path'], paths['jekyll_md_path'])
-            filename = os.path.basename(paths['obsidian_md_path'])
-            self.reporter.user_info(f"Blog post: \"{filename}\" copied")
-            self.reporter.log(f"Copied blog post: {paths['obsidian_md_path']} → {paths['jekyll_md_path']}")  # Keep debug info
+            content = self._read_text(self.markdown_processor.source_fs, paths['obsidian_md_path'])
         except Exception as e:
-            self.reporter.error(f"Failed to copy blog post: {e}")
+            self.reporter.error(f"Failed to read markdown file: {e}")
             return False
         
-        # Read the copied markdown file
-        try:
-            with open(paths['jekyll_md_path'], 'r', encoding='utf-8') as f:
-                content = f.read()
-        except Exception as e:
-            self.reporter.error(f"Failed to read copied markdown file: {e}")
+        # Inline embedded notes, then parse once - every target renders from the same tokens
+        content = self.markdown_processor.expand_embeds(content, paths['obsidian_md_path'])
+        tokens = self.markdown_processor.tokenize_images(content)
+        
+        targets = self.config.get_targets()
+        if len(targets) == 1:
+            success = self._render_target(self.config, self.markdown_processor, tokens, paths)
+        else:
+            jobs = [(self.config, self.markdown_processor, paths)]
+            for target_config in targets[1:]:
+                processor = self.target_processors[target_config.get_target_name()]
+                jobs.append((target_config, processor, self._target_paths(paths, target_config)))
+            
+            with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+                results = list(pool.map(lambda job: self._render_target(job[0], job[1], tokens, job[2]), jobs))
+            success = all(results)
+        
+        if success:
+            self.converted_posts.append(paths['jekyll_md_path'])
+            if self.attachment_index is not None:
+                # Targets may differ in the images they copy, so record the union
+                sources = [image.source for processor in self._processors() for image in processor.images_used]
+                self.attachment_index.record(paths['obsidian_md_path'], list(dict.fromkeys(sources)))
+        if not self._defer_cache_saves:
+            self._save_caches()
+        self.reporter.log(f"Files written: {self.reporter.files['written']}, unchanged: {self.reporter.files['unchanged']}")
+        return success
+    
+    @staticmethod
+    def _read_text(filesystem: FileSystem, path: str) -> str:
+        """Read a UTF-8 text file from a filesystem, with universal newlines"""
+        with io.TextIOWrapper(filesystem.open(path), encoding='utf-8') as f:
+            return f.read()
+    
+    def _processors(self) -> list:
+        """Get the processors of all targets, the main one first"""
+        return [self.markdown_processor, *self.target_processors.values()]
+    
+    def _save_caches(self):
+        """Persist caches filled while converting"""
+        if self.markdown_processor.embedder is not None:
+            try:
+                self.markdown_processor.embedder.save()
+            except OSError as e:
+                self.reporter.warning(f"Failed to save note cache: {e}")
+        for processor in self._processors():
+            if processor.image_sizes is not None:
+                try:
+                    processor.image_sizes.save()
+                except OSError as e:
+                    self.reporter.warning(f"Failed to save image size cache: {e}")
+            if processor.highlighter is not None:
+                try:
+                    processor.highlighter.save()
+                except OSError as e:
+                    self.reporter.warning(f"Failed to save highlight cache: {e}")
+        if self.attachment_index is not None:
+            try:
+                self.attachment_index.save()
+            except OSError as e:
+                self.reporter.warning(f"Failed to save attachment index: {e}")
+        for store in self.asset_stores.values():
+            try:
+                store.save()
+            except OSError as e:
+                self.reporter.warning(f"Failed to save asset store index: {e}")
+        for index in self.search_indexes.values():
+            try:
+                index.save()
+            except OSError as e:
+                self.reporter.warning(f"Failed to save search index state: {e}")
+    
+    def _target_paths(self, paths: Dict[str, str], target_config: DaspressConfig) -> Dict[str, str]:
+        """
+        Derive destination paths of an additional target from the main paths
+        
+        Args:
+            paths (dict): Paths of the main target
+            target_config (DaspressConfig): Config of the additional target
+            
+        Returns:
+            dict: Dictionary containing all paths for the target
+        """
+        jekyll_post_dir = target_config.get_jekyll_posts_folder()
+        return {
+            **paths,
+            'jekyll_img_dir': target_config.get_jekyll_images_folder(),
+            'jekyll_post_dir': jekyll_post_dir,
+            'jekyll_md_path': os.path.join(jekyll_post_dir, os.path.basename(paths['jekyll_md_path']))
+        }
+    
+    def _render_target(self, target_config: DaspressConfig, processor: MarkdownProcessor,
+                       tokens: list, paths: Dict[str, str]) -> bool:
+        """
+        Render a tokenized post into one target site and record its timing
+        
+        Args:
+            target_config (DaspressConfig): Config of the target
+            processor (MarkdownProcessor): Processor used only for this target
+            tokens (list): Output of MarkdownProcessor.tokenize_images
+            paths (dict): Dictionary containing paths for the target
+            
+        Returns:
+            bool: True if the target was written successfully
+        """
+        start_time = time.perf_counter()
+        success = self._write_target(target_config, processor, tokens, paths)
+        self.reporter.target_result(
+            target_config.get_target_name(),
+            success,
+            time.perf_counter() - start_time,
+            post=paths['jekyll_md_path'],
+            images_copied=processor.images_processed,
+            images_unchanged=processor.images_unchanged
+        )
+        return success
+    
+    def _write_target(self, target_config: DaspressConfig, processor: MarkdownProcessor,
+                      tokens: list, paths: Dict[str, str]) -> bool:
+        """
+        Render and write a tokenized post into one target site
+        
+        Args:
+            target_config (DaspressConfig): Config of the target
+            processor (MarkdownProcessor): Processor used only for this target
+            tokens (list): Output of MarkdownProcessor.tokenize_images
+            paths (dict): Dictionary containing paths for the target
+            
+        Returns:
+            bool: True if the target was written successfully
+        """
+        if target_config is not self.config and not self._create_directories(paths, processor):
             return False
         
         # Process markdown content
+        processor.current_post = paths['jekyll_md_path']
         try:
-            processed_content = self.markdown_processor.process_content(
-                content, 
-                paths['obsidian_img_dir'], 
+            processed_content = processor.render_content(
+                tokens,
+                paths['obsidian_img_dir'],
                 paths['jekyll_img_dir']
             )
         except Exception as e:
             self.reporter.error(f"Failed to process markdown content: {e}")
             return False
         
-        # Write processed content back to file
+        # Never publish a post before the images it links to are stored
+        if not self._wait_for_uploads(processor):
+            return False
+        
+        # Write processed content to the Jekyll directory
         try:
-            with open(paths['jekyll_md_path'], 'w', encoding='utf-8') as f:
-                f.write(processed_content)
-            self.reporter.log(f"Processed markdown content saved to: {paths['jekyll_md_path']}")
+            changed = processor.sink_fs.write_text_if_changed(paths['jekyll_md_path'], processed_content)
+            self.reporter.record_write(changed)
+            filename = os.path.basename(paths['obsidian_md_path'])
+            action = "copied" if changed else "unchanged"
+            if target_config is self.config:
+                self.reporter.user_info(f"Blog post: \"{filename}\" {action}")
+            else:
+                self.reporter.user_info(f"Blog post: \"{filename}\" {action} in '{target_config.get_target_name()}'")
+            if changed:
+                self.reporter.log(f"Processed markdown content saved to: {paths['jekyll_md_path']}")
         except Exception as e:
             self.reporter.error(f"Failed to write processed content: {e}")
             return False
         
+        self.last_outputs.append(paths['jekyll_md_path'])
+        if processor.asset_store is None:
+            self.last_outputs.extend(image.destination for image in processor.images_used)
+        self._index_post(target_config, paths['jekyll_md_path'], processed_content)
+        
+        if processor.asset_naming == 'hash' and processor.asset_store is None:
+            self._write_asset_headers(paths, processor, target_config)
+        
         return True
     
+    def _write_asset_headers(self, paths: Dict[str, str], processor: MarkdownProcessor,
+                             target_config: DaspressConfig):
+        """
+        Mark content-addressed images as immutable in the hosting headers file
+        
+        Args:
+            paths (dict): Dictionary containing paths
+            processor (MarkdownProcessor): Processor that rendered the target
+            target_config (DaspressConfig): Config of the target
+        """
+        headers_path = target_config.get_headers_file()
+        hashed_assets = processor.get_hashed_assets(paths['jekyll_img_dir'])
+        url_paths = [f"/assets/images/{name}" for name in hashed_assets.values()]
+        sink_fs = processor.sink_fs
+        try:
+            existing = ""
+            if sink_fs.exists(headers_path):
+                existing = self._read_text(sink_fs, headers_path)
+            content = render_immutable_headers(existing, url_paths)
+            if content != existing and sink_fs.write_text_if_changed(headers_path, content):
+                self.reporter.log(f"Updated immutable asset headers: {headers_path}")
+        except Exception as e:
+            self.reporter.warning(f"Failed to write headers file {headers_path}: {e}")
+    
     
 
     def _start_jekyll_server(self):
         """Start Jekyll server in Jekyll directory"""
+        if not self.jekyll_server.has_full_checkout():
+            self.reporter.error(SPARSE_WORKSPACE_ERROR)
+            return
         try:
             jekyll_root = self.config.get_jekyll_root_folder()
             self.reporter.user_info("Starting Jekyll server...")
-            self.reporter.user_info("Server will be available at: http://localhost:4000")
+            self.reporter.user_info(f"Server will be available at: {self.jekyll_server.url}")
             self.reporter.log("Press Ctrl+C to stop the server")
             
             subprocess.run(
-                "bundle exec jekyll serve", 
+                f"{self.config.get_jekyll_serve_command()} --port {self.config.get_jekyll_port()}",
                 cwd=jekyll_root,
                 shell=True,
                 check=True
@@ -262,6 +662,7 @@ class DaspressConverter:
             config_path (str): Path to config file
         """
         self.config = DaspressConfig(config_path, self.reporter)
+        self.jekyll_server = JekyllServerManager(self.config, self.reporter)
     
     def get_status(self) -> Dict[str, Any]:
         """
@@ -286,8 +687,11 @@ class DaspressConverter:
         """
         try:
             # Load configuration
-            if not self.config.load_config():
+            with PHASE_SECONDS.time(phase='load_config'):
+                loaded = self.config.load_config()
+            if not loaded or not self._prepare_workspaces():
                 return False
+            self._configure_processor()
             
             # Validate inputs
             if not self._validate_inputs(blog_name):
@@ -307,7 +711,10 @@ class DaspressConverter:
             self.reporter.success(f"Conversion completed: {paths['jekyll_md_path']}")
             
             # Handle publishing based on mode
-            return self._handle_publishing_mode(publishing_mode)
+            with PHASE_SECONDS.time(phase='publish'):
+                published = self._handle_publishing_mode(publishing_mode)
+            
+            return published
             
         except Exception as e:
             self.reporter.error(f"Unexpected error during conversion: {e}")
@@ -330,10 +737,12 @@ class DaspressConverter:
             return True
             
         elif publishing_mode == "local_only":
+            if not self.jekyll_server.has_full_checkout():
+                self.reporter.error(SPARSE_WORKSPACE_ERROR)
+                return False
+            
             # Give immediate feedback
             self.reporter.user_info("Conversion completed")
-            self.reporter.user_info("Starting Jekyll server in background...")
-            self.reporter.user_info("Server will be available at http://localhost:4000 in 30-60 seconds")
             
             # Start Jekyll and return immediately (don't wait)
             self._start_jekyll_truly_background()
@@ -341,117 +750,121 @@ class DaspressConverter:
             
         elif publishing_mode == "remote_only":
             self.reporter.log("Publishing to remote repository...")
-            return self._publish_to_git()
+            return self._publish_all_targets()
             
         elif publishing_mode == "both":
             # Give immediate feedback like local_only
             self.reporter.user_info("Conversion completed")
-            self.reporter.user_info("Starting Jekyll server in background...")
-            self.reporter.user_info("Server will be available at http://localhost:4000 in 30-60 seconds")
             self.reporter.user_info("Publishing to remote repository...")
             
             # Start Jekyll truly in background (no waiting)
-            self._start_jekyll_truly_background()
+            if self.jekyll_server.has_full_checkout():
+                self._start_jekyll_truly_background()
+            else:
+                self.reporter.warning(f"Local server skipped: {SPARSE_WORKSPACE_ERROR}")
             
             # Publish to git
-            return self._publish_to_git()
+            return self._publish_all_targets()
             
         else:
             self.reporter.error(f"Unknown publishing mode: {publishing_mode}")
             return False
 
-    def _start_jekyll_truly_background(self):
-        """Start Jekyll and return immediately - no waiting"""
-        try:
-            if self._is_jekyll_running():
-                self.reporter.user_info("Jekyll server already running")
-                return True
+    def optimize_site(self, build: bool = False) -> bool:
+        """
+        Minify and precompress the built Jekyll site
+        
+        Args:
+            build (bool): Run `jekyll build` before optimizing
             
-            jekyll_root = self.config.get_jekyll_root_folder()
-            subprocess.Popen(
-                "bundle exec jekyll serve",
-                cwd=jekyll_root,
+        Returns:
+            bool: True if optimization ran
+        """
+        if build:
+            with PHASE_SECONDS.time(phase='build'):
+                if not self._build_site():
+                    return False
+        with PHASE_SECONDS.time(phase='optimize'):
+            return SiteOptimizer(self.config, self.reporter).optimize() is not None
+    
+    def deploy_site(self, target: Optional[str] = None, build: bool = True) -> bool:
+        """
+        Build the site and sync it to the deploy target
+        
+        Args:
+            target (str, optional): Local path or [user@]host:/path (default: deploy.target)
+            build (bool): Run `jekyll build` before deploying
+            
+        Returns:
+            bool: True if the new release is live
+        """
+        if build:
+            with PHASE_SECONDS.time(phase='build'):
+                if not self._build_site():
+                    return False
+            # Optimize only a tree this call just built: nothing else writes `_site` meanwhile
+            if self.config.get_optimize_settings()['enabled'] and not self.optimize_site():
+                return False
+        with PHASE_SECONDS.time(phase='deploy'):
+            return SiteDeployer(self.config, self.reporter).deploy(target) is not None
+    
+    def _build_site(self) -> bool:
+        """Run `jekyll build` in the Jekyll root folder"""
+        if not self.jekyll_server.has_full_checkout():
+            self.reporter.error(SPARSE_WORKSPACE_ERROR)
+            return False
+        try:
+            self.reporter.user_info("Building Jekyll site...")
+            subprocess.run(
+                "bundle exec jekyll build",
+                cwd=self.config.get_jekyll_root_folder(),
                 shell=True,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+                check=True,
+                capture_output=True,
+                text=True
             )
-            
-            # Return immediately - don't wait for startup
             return True
-            
-        except Exception as e:
-            self.reporter.error(f"Failed to start Jekyll: {e}")
+        except subprocess.CalledProcessError as e:
+            self.reporter.error(f"Jekyll build failed: {e}")
+            if e.stderr:
+                self.reporter.log(e.stderr.strip())
             return False
+    
+    def _start_jekyll_truly_background(self):
+        """Start Jekyll and return immediately - no waiting"""
+        if self.jekyll_server.status()['ready']:
+            # Warm server is reused (restarted if it does not build these posts)
+            started = self.jekyll_server.ensure_running(wait=False, posts=self.converted_posts)
+            self.reporter.user_info(f"Available at: {self.jekyll_server.url}")
+            return started
+
+        self.reporter.user_info("Starting Jekyll server in background...")
+        if self.config.get_jekyll_preview_profile()['enabled']:
+            self.reporter.user_info(f"Server will be available at {self.jekyll_server.url} shortly (building only this post)")
+        else:
+            self.reporter.user_info(f"Server will be available at {self.jekyll_server.url} in 30-60 seconds")
+
+        # Restarts a crashed server, otherwise starts a new one
+        return self.jekyll_server.ensure_running(wait=False, posts=self.converted_posts)
 
     def _start_jekyll_server_background(self):
         """Start Jekyll server with smart detection and user feedback"""
-        try:
-            jekyll_root = self.config.get_jekyll_root_folder()
-            
-            # Phase 1: Smart Detection
-            self.reporter.user_info("Checking for existing Jekyll server...")
-            
-            if self._is_jekyll_running():
-                self.reporter.user_info("Jekyll server already running")
-                self.reporter.user_info("🌐 Available at: http://localhost:4000")
-                self._open_browser()
-                return True
-            
-            # Phase 2: Start with feedback
-            self.reporter.user_info("Starting Jekyll server...")
-            
-            process = subprocess.Popen(
-                "bundle exec jekyll serve",
-                cwd=jekyll_root,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1
-            )
-            
-            # Phase 3: Monitor startup (10 second timeout)
-            import time
-            start_time = time.time()
-            server_ready = False
-            
-            while time.time() - start_time < 10:  # 10 second timeout
-                if process.poll() is not None:
-                    # Process ended unexpectedly
-                    self.reporter.error("Jekyll server failed to start")
-                    return False
-                
-                if self._is_jekyll_running():
-                    server_ready = True
-                    break
-                
-                time.sleep(0.5)  # Check every 500ms
-            
-            if server_ready:
-                self.reporter.user_info("Jekyll server started successfully")
-                self.reporter.user_info("🌐 Available at: http://localhost:4000")
-                self._open_browser()
-                return True
-            else:
-                self.reporter.error("Jekyll server startup timed out")
-                process.terminate()
-                return False
-                
-        except Exception as e:
-            self.reporter.error(f"Failed to start Jekyll server: {e}")
-            return False
-        
+        self.reporter.user_info("Checking for existing Jekyll server...")
 
+        if not self.jekyll_server.ensure_running(wait=True):
+            return False
 
+        self.reporter.user_info(f"🌐 Available at: {self.jekyll_server.url}")
+        self._open_browser()
+        return True
 
-    def _is_jekyll_running(self, port: int = 4000) -> bool:
+    def _is_jekyll_running(self, port: Optional[int] = None) -> bool:
         """Check if Jekyll server is already running on the specified port"""
         try:
             import socket
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(1)  # 1 second timeout
-                result = sock.connect_ex(('localhost', port))
-                return result == 0  # 0 means connection successful (port in use)
+            port = port or self.config.get_jekyll_port()
+            with socket.create_connection((self.config.get_jekyll_host(), port), timeout=0.2):
+                return True
         except Exception:
             return False
         
@@ -460,18 +873,29 @@ class DaspressConverter:
         """Open browser to Jekyll server (with error handling)"""
         try:
             import webbrowser
-            webbrowser.open('http://localhost:4000')
-            self.reporter.log("Browser opened to http://localhost:4000")
+            webbrowser.open(self.jekyll_server.url)
+            self.reporter.log(f"Browser opened to {self.jekyll_server.url}")
         except Exception as e:
             self.reporter.log(f"Could not open browser automatically: {e}")
             # Not an error - user can open manually
 
 
 
-    def _publish_to_git(self) -> bool:
+    def _publish_all_targets(self) -> bool:
+        """Publish every target site to its git repository"""
+        results = []
+        for target in self.config.get_targets():
+            workspace = PublishWorkspace(target, self.reporter)
+            if workspace.enabled:
+                results.append(workspace.publish())
+            else:
+                results.append(self._publish_to_git(target.get_jekyll_root_folder()))
+        return all(results)
+
+    def _publish_to_git(self, jekyll_root: Optional[str] = None) -> bool:
         """Publish to git repository"""
         try:
-            jekyll_root = self.config.get_jekyll_root_folder()
+            jekyll_root = jekyll_root or self.config.get_jekyll_root_folder()
             
             # Add all changes
             self.reporter.log("Adding files to git staging...")
@@ -497,8 +921,13 @@ class DaspressConverter:
             
             # Push to remote
             self.reporter.log("Pushing to remote repository...")
-            push_result = subprocess.run("git push", cwd=jekyll_root, shell=True, check=True,
-                                    capture_output=True, text=True)
+            with GIT_PUSH_SECONDS.time():
+                try:
+                    push_result = subprocess.run("git push", cwd=jekyll_root, shell=True, check=True,
+                                            capture_output=True, text=True)
+                except subprocess.CalledProcessError:
+                    GIT_PUSH_FAILURES.inc()
+                    raise
             self.reporter.user_info("Blog post published to GitHub")
             
             # Show git push details only in debug mode
@@ -0,0 +1,131 @@
+"""
+Attachment dependency index for daspress
+Remembers which posts embed which attachments, so a changed image can be
+republished by reconverting exactly the posts that use it
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+INDEX_VERSION = 2
+
+
+class AttachmentIndex:
+    """
+    Persistent post → attachments index with its reverse lookup
+
+    The index is filled as a by-product of converting posts. Every post keeps
+    the size and mtime each of its attachments had when that post was last
+    converted, so reconverting one post that shares an image does not hide
+    the change from the other posts using it.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Initialize index
+
+        Args:
+            index_path (str, optional): JSON file to persist the index in
+        """
+        self.index_path = index_path
+        # post source path -> {attachment path: [size, mtime_ns] when the post was converted}
+        self.posts: Dict[str, Dict[str, Optional[List[int]]]] = {}
+        self._dirty = False
+        if index_path:
+            self._load()
+
+    def record(self, post_path: str, attachments: Iterable[str]):
+        """
+        Record the attachments a post embeds (replacing the previous list)
+
+        Args:
+            post_path (str): Source path of the post
+            attachments (iterable): Source paths of the embedded attachments
+        """
+        post_path = os.path.abspath(post_path)
+        used = {path: self._stat(path) for path in sorted({os.path.abspath(path) for path in attachments})}
+        if self.posts.get(post_path) != used:
+            self.posts[post_path] = used
+            self._dirty = True
+
+    def dependents(self, attachments: Iterable[str]) -> List[str]:
+        """
+        Get posts embedding any of the given attachments
+
+        Args:
+            attachments (iterable): Attachment paths
+
+        Returns:
+            list: Source paths of dependent posts that still exist
+        """
+        wanted = {os.path.abspath(path) for path in attachments}
+        return sorted(
+            post for post, used in self.posts.items()
+            if wanted.intersection(used) and os.path.exists(post)
+        )
+
+    def changed_attachments(self) -> List[str]:
+        """
+        Get attachments modified (or deleted) since any post using them was converted
+
+        Returns:
+            list: Attachment paths
+        """
+        return sorted({path for _, path in self._stale()})
+
+    def stale_posts(self) -> List[str]:
+        """
+        Get posts with an attachment modified (or deleted) since the post was converted
+
+        Returns:
+            list: Source paths of stale posts that still exist
+        """
+        return sorted({post for post, _ in self._stale() if os.path.exists(post)})
+
+    def prune(self):
+        """Drop posts that no longer exist"""
+        for post in [post for post in self.posts if not os.path.exists(post)]:
+            del self.posts[post]
+            self._dirty = True
+
+    def save(self):
+        """Write the index to disk if it changed"""
+        if not self.index_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'posts': self.posts}, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def _stale(self) -> Set[Tuple[str, str]]:
+        """Get (post, attachment) pairs whose attachment changed since the post was converted"""
+        current: Dict[str, Optional[List[int]]] = {}
+        stale = set()
+        for post, used in self.posts.items():
+            for path, signature in used.items():
+                if path not in current:
+                    current[path] = self._stat(path)
+                if current[path] != signature:
+                    stale.add((post, path))
+        return stale
+
+    def _stat(self, path: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Older indexes kept one signature per attachment: start over
+        if data.get('version') == INDEX_VERSION:
+            self.posts = data.get('posts', {})
@@ -0,0 +1,260 @@
+"""
+Delta deployment for daspress
+Syncs the built Jekyll site to a local directory or an SSH/rsync destination,
+transferring only changed files and switching releases atomically
+"""
+
+import json
+import os
+import re
+import shlex
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from .assets import file_digest
+from .config import DaspressConfig
+from .status_reporter import StatusReporter
+
+
+CURRENT_LINK = 'current'
+RELEASES_FOLDER = 'releases'
+REMOTE_TARGET_PATTERN = re.compile(r'^(?P<host>(?:[^@/:\s]+@)?[^/:\s]{2,}):(?P<path>.+)$')
+
+
+def parse_target(target: str) -> Tuple[Optional[str], str]:
+    """
+    Split a deploy target into (host, path)
+
+    Args:
+        target (str): Local path, `host:/path` or `user@host:/path`
+
+    Returns:
+        tuple: (host or None for a local target, path)
+    """
+    match = REMOTE_TARGET_PATTERN.match(target)
+    if match and not os.path.isabs(target):
+        return match.group('host'), match.group('path')
+    return None, target
+
+
+class SiteDeployer:
+    """
+    Deploy the built site as immutable releases behind a `current` symlink
+
+    Target layout::
+
+        <target>/releases/<id>/      one folder per deployment
+        <target>/releases/<id>.json  manifest: relative path -> SHA-256
+        <target>/current -> releases/<id>
+
+    The web server serves `<target>/current`. A new release starts as a
+    hard-linked copy of the current one, then only files whose hash differs
+    from the current manifest are transferred (in parallel) and files that
+    disappeared are removed. Switching `current` is a single atomic rename,
+    so readers never see a half-deployed site.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize deployer
+
+        Args:
+            config (DaspressConfig): Loaded configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+        self.settings = config.get_deploy_settings()
+
+    def deploy(self, target: Optional[str] = None, site_dir: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Sync the built site to the target
+
+        Args:
+            target (str, optional): Deploy target (default: deploy.target)
+            site_dir (str, optional): Built site folder (default: <jekyll root>/_site)
+
+        Returns:
+            dict or None: Deployment summary, None on failure
+        """
+        target = target or self.settings['target']
+        if not target:
+            self.reporter.error("No deploy target configured (set deploy.target or pass --target)")
+            return None
+        site_dir = site_dir or os.path.join(self.config.get_jekyll_root_folder(), '_site')
+        if not os.path.isdir(site_dir):
+            self.reporter.error(f"Built site not found: {site_dir}")
+            return None
+
+        manifest = self._site_manifest(site_dir)
+        release = datetime.now().strftime('%Y%m%d-%H%M%S-%f')  # sorts by deployment time
+        host, path = parse_target(target)
+        try:
+            if host:
+                summary = self._deploy_remote(host, path, site_dir, manifest, release)
+            else:
+                summary = self._deploy_local(path, site_dir, manifest, release)
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.reporter.error(f"Deployment to {target} failed: {e}")
+            stderr = getattr(e, 'stderr', None)
+            if stderr:
+                self.reporter.log(stderr.strip() if isinstance(stderr, str) else stderr.decode(errors='replace').strip())
+            return None
+
+        summary.update({'target': target, 'release': release, 'files': len(manifest)})
+        self.reporter.user_info(
+            f"Deployed release {release}: {summary['uploaded']} uploaded, "
+            f"{summary['unchanged']} unchanged, {summary['removed']} removed"
+        )
+        self.reporter.log(f"Deploy summary: {summary}")
+        return summary
+
+    def _site_manifest(self, site_dir: str) -> Dict[str, str]:
+        """Hash every file of the built site in parallel"""
+        files = []
+        for root, _, filenames in os.walk(site_dir):
+            for filename in filenames:
+                files.append(os.path.relpath(os.path.join(root, filename), site_dir).replace(os.sep, '/'))
+        with ThreadPoolExecutor(max_workers=self.settings['workers']) as pool:
+            digests = pool.map(lambda rel_path: file_digest(os.path.join(site_dir, rel_path)), files)
+            return dict(zip(files, digests))
+
+    @staticmethod
+    def _diff(manifest: Dict[str, str], current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+        """Get (changed or new files, removed files) against the current manifest"""
+        changed = sorted(rel_path for rel_path, digest in manifest.items() if current.get(rel_path) != digest)
+        removed = sorted(rel_path for rel_path in current if rel_path not in manifest)
+        return changed, removed
+
+    def _deploy_local(self, target: str, site_dir: str, manifest: Dict[str, str], release: str) -> Dict[str, Any]:
+        releases_dir = os.path.join(target, RELEASES_FOLDER)
+        current_link = os.path.join(target, CURRENT_LINK)
+        os.makedirs(releases_dir, exist_ok=True)
+
+        current_release = os.path.basename(os.readlink(current_link)) if os.path.islink(current_link) else None
+        current = self._load_manifest(os.path.join(releases_dir, f"{current_release}.json")) if current_release else {}
+        changed, removed = self._diff(manifest, current)
+        changed_set = set(changed)
+
+        release_dir = os.path.join(releases_dir, release)
+        for rel_path in manifest:
+            if rel_path in changed_set:
+                continue
+            # Unchanged file: hard link from the current release (no data copied)
+            dest = os.path.join(release_dir, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            try:
+                os.link(os.path.join(releases_dir, current_release, rel_path), dest)
+            except OSError:
+                shutil.copy2(os.path.join(site_dir, rel_path), dest)
+
+        def upload(rel_path: str) -> int:
+            dest = os.path.join(release_dir, rel_path)
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            shutil.copy2(os.path.join(site_dir, rel_path), dest)
+            return os.path.getsize(dest)
+
+        with ThreadPoolExecutor(max_workers=self.settings['workers']) as pool:
+            uploaded_bytes = sum(pool.map(upload, changed))
+        os.makedirs(release_dir, exist_ok=True)
+
+        self._save_manifest(os.path.join(releases_dir, f"{release}.json"), manifest)
+        self._switch_local(target, release)
+        self._prune_local(releases_dir, release)
+        return {'uploaded': len(changed), 'unchanged': len(manifest) - len(changed),
+                'removed': len(removed), 'bytes': uploaded_bytes}
+
+    def _switch_local(self, target: str, release: str):
+        """Point `current` at the new release with one atomic rename"""
+        tmp_link = os.path.join(target, f".{CURRENT_LINK}-{release}")
+        os.symlink(os.path.join(RELEASES_FOLDER, release), tmp_link, target_is_directory=True)
+        os.replace(tmp_link, os.path.join(target, CURRENT_LINK))
+
+    def _prune_local(self, releases_dir: str, release: str):
+        """Remove old releases beyond deploy.keep_releases"""
+        for old in self._expired(os.listdir(releases_dir), release):
+            shutil.rmtree(os.path.join(releases_dir, old), ignore_errors=True)
+            try:
+                os.remove(os.path.join(releases_dir, f"{old}.json"))
+            except OSError:
+                pass
+
+    def _expired(self, names: List[str], release: str) -> List[str]:
+        releases = sorted({
+            name[:-5] if name.endswith('.json') else name
+            for name in names if not name.startswith('.') and not name.endswith('.tmp')
+        })
+        keep = max(1, int(self.settings['keep_releases']))
+        return [name for name in releases[:-keep] if name != release]
+
+    def _deploy_remote(self, host: str, path: str, site_dir: str, manifest: Dict[str, str],
+                       release: str) -> Dict[str, Any]:
+        remote_root = shlex.quote(path)
+        release_path = f"{path.rstrip('/')}/{RELEASES_FOLDER}/{release}"
+        quoted_release = shlex.quote(release_path)
+
+        # Manifest of the release `current` points to (empty on first deploy)
+        result = self._ssh(
+            host,
+            f'cd {remote_root} 2>/dev/null && cat "{RELEASES_FOLDER}/$(basename "$(readlink {CURRENT_LINK})").json"',
+            check=False
+        )
+        try:
+            current = json.loads(result.stdout) if result.returncode == 0 else {}
+        except ValueError:
+            current = {}
+        changed, removed = self._diff(manifest, current)
+
+        # Start the new release as a hard-linked copy of the current one
+        self._ssh(host, f'mkdir -p {quoted_release} && '
+                        f'(cp -al {remote_root}/{CURRENT_LINK}/. {quoted_release}/ 2>/dev/null || true)')
+        if removed:
+            self._ssh(host, f'cd {quoted_release} && xargs -0 rm -f --', input='\0'.join(removed))
+
+        # rsync replaces files by rename, so hard links into the live release are never modified
+        workers = max(1, min(int(self.settings['workers'] or 1), len(changed)))
+        chunks = [changed[index::workers] for index in range(workers)] if changed else []
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            list(pool.map(lambda chunk: self._run(
+                [self.settings['rsync'], '-a', '--protect-args', '--files-from=-', '-e', self.settings['ssh'],
+                 site_dir.rstrip('/\\') + '/', f"{host}:{release_path}/"],
+                input='\n'.join(chunk)
+            ), chunks))
+
+        self._ssh(host, f'cat > {shlex.quote(release_path + ".json")}', input=json.dumps(manifest))
+        self._ssh(host, f'cd {remote_root} && ln -sfn {shlex.quote(RELEASES_FOLDER + "/" + release)} '
+                        f'.{CURRENT_LINK}-{release} && mv -T .{CURRENT_LINK}-{release} {CURRENT_LINK}')
+
+        listing = self._ssh(host, f'ls -1 {remote_root}/{RELEASES_FOLDER}', check=False)
+        expired = self._expired(listing.stdout.split(), release) if listing.returncode == 0 else []
+        if expired:
+            paths = ' '.join(shlex.quote(f"{path.rstrip('/')}/{RELEASES_FOLDER}/{name}") for name in expired)
+            jsons = ' '.join(shlex.quote(f"{path.rstrip('/')}/{RELEASES_FOLDER}/{name}.json") for name in expired)
+            self._ssh(host, f'rm -rf {paths} {jsons}', check=False)
+
+        uploaded_bytes = sum(os.path.getsize(os.path.join(site_dir, rel_path)) for rel_path in changed)
+        return {'uploaded': len(changed), 'unchanged': len(manifest) - len(changed),
+                'removed': len(removed), 'bytes': uploaded_bytes}
+
+    def _ssh(self, host: str, command: str, input: Optional[str] = None, check: bool = True):
+        return self._run(shlex.split(self.settings['ssh']) + [host, command], input=input, check=check)
+
+    def _run(self, args: List[str], input: Optional[str] = None, check: bool = True):
+        self.reporter.log(f"Running: {' '.join(args)}")
+        return subprocess.run(args, input=input, capture_output=True, text=True, check=check)
+
+    def _load_manifest(self, manifest_path: str) -> Dict[str, str]:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest_path: str, manifest: Dict[str, str]):
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
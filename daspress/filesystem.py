@@ -0,0 +1,229 @@
+"""
+Filesystem abstraction for daspress
+Lets MarkdownProcessor and the converter read attachments and posts from,
+and write assets and site files to, storage other than the local disk, such
+as memory or an object store
+"""
+
+import hashlib
+import io
+import os
+import posixpath
+import threading
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional
+
+from .assets import file_digest
+from .utils import copy_file_if_changed
+
+
+class FileSystem(ABC):
+    """
+    File operations used by MarkdownProcessor and the converter
+
+    Subclass and implement the abstract methods to convert from or into other
+    storage. Paths are the same strings the processor builds from the
+    configured folders; implementations decide how to map them.
+    """
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """Check whether a file exists"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def open(self, path: str) -> BinaryIO:
+        """Open a file for binary reading"""
+        raise NotImplementedError
+
+    def read_bytes(self, path: str) -> bytes:
+        """Read a whole file"""
+        with self.open(path) as f:
+            return f.read()
+
+    def digest(self, path: str) -> str:
+        """Get SHA-256 hex digest of a file"""
+        return hashlib.sha256(self.read_bytes(path)).hexdigest()
+
+    def size(self, path: str) -> int:
+        """Get size of a file in bytes"""
+        return len(self.read_bytes(path))
+
+    def makedirs(self, path: str):
+        """Create a directory (and its parents) if the storage needs it"""
+
+    @abstractmethod
+    def write_if_changed(self, path: str, data: bytes) -> bool:
+        """
+        Write a file unless it already has this content
+
+        Returns:
+            bool: True if the file was written
+        """
+        raise NotImplementedError
+
+    def write_text_if_changed(self, path: str, text: str) -> bool:
+        """Write text (UTF-8, platform newlines) unless the file already contains it"""
+        return self.write_if_changed(path, text.replace('\n', os.linesep).encode('utf-8'))
+
+    def copy_if_changed(self, source_fs: 'FileSystem', src_path: str, dest_path: str) -> bool:
+        """
+        Copy a file from another filesystem unless the destination is identical
+
+        Returns:
+            bool: True if the file was written
+        """
+        return self.write_if_changed(dest_path, source_fs.read_bytes(src_path))
+
+    def remove(self, path: str):
+        """Delete a file (needed only by sinks of a search index, which drops empty shards)"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_files(self, directory: str) -> Iterator[str]:
+        """Yield paths of all files below a directory, relative to it with '/' separators"""
+        raise NotImplementedError
+
+
+class LocalFileSystem(FileSystem):
+    """The local disk (default for every processor)"""
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(path)
+
+    def open(self, path: str) -> BinaryIO:
+        return open(path, 'rb')
+
+    def digest(self, path: str) -> str:
+        return file_digest(path)
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(path)
+
+    def makedirs(self, path: str):
+        os.makedirs(path, exist_ok=True)
+
+    def write_if_changed(self, path: str, data: bytes) -> bool:
+        try:
+            if os.path.getsize(path) == len(data):
+                with open(path, 'rb') as f:
+                    if f.read() == data:
+                        return False
+        except OSError:
+            pass
+        with open(path, 'wb') as f:
+            f.write(data)
+        return True
+
+    def copy_if_changed(self, source_fs: FileSystem, src_path: str, dest_path: str) -> bool:
+        if isinstance(source_fs, LocalFileSystem):
+            return copy_file_if_changed(src_path, dest_path)
+        return self.write_if_changed(dest_path, source_fs.read_bytes(src_path))
+
+    def remove(self, path: str):
+        os.remove(path)
+
+    def list_files(self, directory: str) -> Iterator[str]:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+LOCAL_FILESYSTEM = LocalFileSystem()
+
+
+class MemoryFileSystem(FileSystem):
+    """
+    Files kept in a dict, for conversions that should not touch the disk
+
+    Also a stand-in for object stores in tests: keys are normalized
+    '/'-separated paths and directories exist implicitly. Written files stay
+    in memory until commit() copies them to another filesystem (and deletes
+    the files removed here from it).
+    """
+
+    def __init__(self, files: Optional[Dict[str, bytes]] = None):
+        """
+        Initialize filesystem
+
+        Args:
+            files (dict, optional): Initial content, path → bytes
+        """
+        self.files: Dict[str, bytes] = {}
+        self.written = set()  # paths changed by write_if_changed, in normalized form
+        self.removed = set()  # paths deleted by remove, in normalized form
+        self._lock = threading.Lock()
+        for path, data in (files or {}).items():
+            self.files[self._key(path)] = data
+
+    def exists(self, path: str) -> bool:
+        return self._key(path) in self.files
+
+    def open(self, path: str) -> BinaryIO:
+        return io.BytesIO(self.read_bytes(path))
+
+    def read_bytes(self, path: str) -> bytes:
+        try:
+            return self.files[self._key(path)]
+        except KeyError:
+            raise FileNotFoundError(path) from None
+
+    def write_if_changed(self, path: str, data: bytes) -> bool:
+        key = self._key(path)
+        with self._lock:
+            if self.files.get(key) == data:
+                return False
+            self.files[key] = bytes(data)
+            self.written.add(key)
+            self.removed.discard(key)
+            return True
+
+    def remove(self, path: str):
+        key = self._key(path)
+        with self._lock:
+            if self.files.pop(key, None) is None:
+                raise FileNotFoundError(path)
+            self.written.discard(key)
+            self.removed.add(key)
+
+    def list_files(self, directory: str) -> Iterator[str]:
+        prefix = self._key(directory).rstrip('/') + '/'
+        for key in sorted(self.files):
+            if key.startswith(prefix):
+                yield key[len(prefix):]
+
+    def commit(self, root: str = '', target: Optional[FileSystem] = None,
+               paths: Optional[Iterable[str]] = None) -> int:
+        """
+        Copy files written to this filesystem to another one
+
+        Without `paths`, files removed here are deleted from the target as well.
+
+        Args:
+            root (str): Folder relative paths are placed under
+            target (FileSystem, optional): Destination (default: local disk)
+            paths (iterable, optional): Files to copy (default: every written file)
+
+        Returns:
+            int: Number of files the target actually changed
+        """
+        target = target or LOCAL_FILESYSTEM
+        changed = 0
+        for key in sorted(self._key(path) for path in paths) if paths is not None else sorted(self.written):
+            dest = self._commit_path(root, key)
+            target.makedirs(posixpath.dirname(dest) or '.')
+            changed += target.write_if_changed(dest, self.files[key])
+        for key in sorted(self.removed) if paths is None else ():
+            dest = self._commit_path(root, key)
+            if target.exists(dest):
+                target.remove(dest)
+                changed += 1
+        return changed
+
+    @staticmethod
+    def _commit_path(root: str, key: str) -> str:
+        return key if key.startswith('/') or not root else posixpath.join(root.replace(os.sep, '/'), key)
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return posixpath.normpath(str(path).replace('\\', '/'))
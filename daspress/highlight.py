@@ -0,0 +1,182 @@
+"""
+Code block pre-highlighting for daspress
+Renders fenced code blocks to highlighted HTML at conversion time so Jekyll
+has no syntax highlighting left to do
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from .status_reporter import StatusReporter
+from .metrics import CACHE_REQUESTS
+
+try:
+    import pygments
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # optional dependency
+    pygments = None
+
+
+FENCE_OPEN = re.compile(r'^(?P<indent> {0,3})(?P<fence>`{3,}|~{3,})[ \t]*(?P<lang>[^\s`{]*)[^\n`]*$')
+CACHE_VERSION = 1
+
+
+class CodeHighlighter:
+    """
+    Replace fenced code blocks with Pygments HTML in Rouge's markup
+
+    Output uses the same wrapper and token classes as Jekyll's default
+    Rouge highlighter (`div.highlighter-rouge > div.highlight > pre.highlight`),
+    so existing theme stylesheets keep working. Rendered blocks are cached by
+    content hash, language and style, so an unchanged block is never
+    highlighted twice. Blocks without a language or with a language Pygments
+    does not know are left for Jekyll.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, style: str = 'default',
+                 reporter: Optional[StatusReporter] = None):
+        """
+        Initialize highlighter
+
+        Args:
+            cache_path (str, optional): JSON file to persist rendered blocks in
+            style (str): Pygments style (used for css() and in the cache key)
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.cache_path = cache_path
+        self.style = style
+        self.reporter = reporter or StatusReporter()
+        self.blocks: Dict[str, str] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._warned_missing_pygments = False
+        if cache_path:
+            self._load()
+
+    @property
+    def available(self) -> bool:
+        """Check whether Pygments is installed"""
+        return pygments is not None
+
+    def highlight(self, content: str) -> str:
+        """
+        Pre-highlight every fenced code block of a markdown document
+
+        Args:
+            content (str): Markdown content
+
+        Returns:
+            str: Content with known-language code blocks replaced by HTML
+        """
+        if pygments is None:
+            if not self._warned_missing_pygments:
+                self.reporter.warning("Pygments not installed, leaving code highlighting to Jekyll "
+                                      "(pip install daspress[highlight])")
+                self._warned_missing_pygments = True
+            return content
+        if '```' not in content and '~~~' not in content:
+            return content
+
+        lines = content.split('\n')
+        output = []
+        index = 0
+        while index < len(lines):
+            match = FENCE_OPEN.match(lines[index])
+            if not match:
+                output.append(lines[index])
+                index += 1
+                continue
+
+            fence = match.group('fence')
+            closing = re.compile(r'^ {0,3}%s{%d,}[ \t]*$' % (re.escape(fence[0]), len(fence)))
+            end = index + 1
+            while end < len(lines) and not closing.match(lines[end]):
+                end += 1
+            if end == len(lines):  # unclosed fence: leave the rest untouched
+                output.extend(lines[index:])
+                break
+
+            indent = len(match.group('indent'))
+            code = '\n'.join(line[indent:] if line[:indent].isspace() else line.lstrip()
+                             for line in lines[index + 1:end])
+            rendered = self._render(match.group('lang').lower(), code + '\n')
+            if rendered is None:
+                output.extend(lines[index:end + 1])
+            else:
+                # Blank lines around the HTML keep kramdown from treating it as inline
+                output.extend(['', rendered, ''])
+            index = end + 1
+        return '\n'.join(output)
+
+    def css(self, selector: str = '.highlight') -> str:
+        """
+        Get the stylesheet of the configured Pygments style
+
+        Args:
+            selector (str): CSS selector of the highlighted blocks
+
+        Returns:
+            str: CSS rules ('' without Pygments)
+        """
+        if pygments is None:
+            return ''
+        return HtmlFormatter(style=self.style).get_style_defs(selector)
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with self._lock:
+            data = {'version': CACHE_VERSION, 'pygments': pygments.__version__ if pygments else None,
+                    'blocks': dict(self.blocks)}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def _render(self, lang: str, code: str) -> Optional[str]:
+        """Render one block, from the cache when possible"""
+        if not lang:
+            return None
+        key = hashlib.sha256(f"{lang}\0{self.style}\0{code}".encode('utf-8')).hexdigest()
+        with self._lock:
+            cached = self.blocks.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.inc(cache='highlight', result='hit')
+            return cached or None
+        CACHE_REQUESTS.inc(cache='highlight', result='miss')
+
+        try:
+            lexer = get_lexer_by_name(lang, stripnl=False, ensurenl=False)
+        except ClassNotFound:
+            rendered = ''  # cached as "leave to Jekyll"
+        else:
+            body = highlight(code, lexer, HtmlFormatter(nowrap=True))
+            css_lang = html.escape(lang, quote=True)
+            rendered = (f'<div class="language-{css_lang} highlighter-rouge"><div class="highlight">'
+                        f'<pre class="highlight"><code>{body}</code></pre></div></div>')
+        with self._lock:
+            self.blocks[key] = rendered
+            self._dirty = True
+        return rendered or None
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Rendered HTML depends on the Pygments version: start over when it changes
+        if data.get('version') == CACHE_VERSION and pygments is not None \
+                and data.get('pygments') == pygments.__version__:
+            self.blocks = data.get('blocks', {})
@@ -0,0 +1,212 @@
+"""
+Image header parsing for daspress
+Reads intrinsic image dimensions from file headers without decoding pixels
+"""
+
+import json
+import os
+import re
+import struct
+import threading
+from typing import BinaryIO, Dict, Optional, Tuple
+
+from .assets import file_digest
+from .metrics import CACHE_REQUESTS
+
+
+_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_SVG_TAG = re.compile(rb'<svg\b[^>]*>', re.IGNORECASE | re.DOTALL)
+_SVG_LENGTH = r'\s%s\s*=\s*["\']\s*([0-9.]+)\s*(px)?\s*["\']'
+_SVG_VIEWBOX = re.compile(rb'\sviewBox\s*=\s*["\']\s*[-0-9.]+[\s,]+[-0-9.]+[\s,]+([0-9.]+)[\s,]+([0-9.]+)', re.IGNORECASE)
+
+
+def get_image_size(file_path: str) -> Optional[Tuple[int, int]]:
+    """
+    Get width and height of an image by reading its header
+
+    Supports PNG, JPEG, GIF, WebP and SVG. Only the first few hundred bytes are
+    read (JPEG reads segment headers until the frame header).
+
+    Args:
+        file_path (str): Path to image file
+
+    Returns:
+        tuple or None: (width, height), None if the format is unknown
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            return read_image_size(f)
+    except OSError:
+        return None
+
+
+def read_image_size(f: BinaryIO) -> Optional[Tuple[int, int]]:
+    """
+    Get width and height of an image from an open binary file
+
+    Args:
+        f (file): Seekable binary file positioned at the start of the image
+
+    Returns:
+        tuple or None: (width, height), None if the format is unknown
+    """
+    try:
+        head = f.read(32)
+        if head.startswith(b'\x89PNG\r\n\x1a\n') and head[12:16] == b'IHDR':
+            return struct.unpack('>II', head[16:24])
+        if head[:6] in (b'GIF87a', b'GIF89a'):
+            return struct.unpack('<HH', head[6:10])
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return _webp_size(head)
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            return _jpeg_size(f)
+        f.seek(0)
+        return _svg_size(f.read(4096))
+    except (OSError, struct.error):
+        return None
+
+
+def _webp_size(head: bytes) -> Optional[Tuple[int, int]]:
+    chunk = head[12:16]
+    if chunk == b'VP8 ' and len(head) >= 30:
+        width, height = struct.unpack('<HH', head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L' and len(head) >= 25:
+        b0, b1, b2, b3 = head[21:25]
+        width = (b0 | ((b1 & 0x3F) << 8)) + 1
+        height = ((b1 >> 6) | (b2 << 2) | ((b3 & 0x0F) << 10)) + 1
+        return width, height
+    if chunk == b'VP8X' and len(head) >= 30:
+        width = int.from_bytes(head[24:27], 'little') + 1
+        height = int.from_bytes(head[27:30], 'little') + 1
+        return width, height
+    return None
+
+
+def _jpeg_size(f) -> Optional[Tuple[int, int]]:
+    while True:
+        byte = f.read(1)
+        while byte and byte != b'\xff':
+            byte = f.read(1)
+        while byte == b'\xff':  # skip fill bytes
+            byte = f.read(1)
+        if not byte:
+            return None
+
+        marker = byte[0]
+        if marker in (0x01,) or 0xD0 <= marker <= 0xD9:
+            continue  # markers without a length
+
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+
+        if marker in _SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack('>HH', frame[1:5])
+            return width, height
+
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _svg_size(head: bytes) -> Optional[Tuple[int, int]]:
+    tag = _SVG_TAG.search(head)
+    if not tag:
+        return None
+    tag = tag.group(0)
+
+    width = re.search((_SVG_LENGTH % 'width').encode(), tag, re.IGNORECASE)
+    height = re.search((_SVG_LENGTH % 'height').encode(), tag, re.IGNORECASE)
+    if width and height:
+        return round(float(width.group(1))), round(float(height.group(1)))
+
+    view_box = _SVG_VIEWBOX.search(tag)
+    if view_box:
+        return round(float(view_box.group(1))), round(float(view_box.group(2)))
+    return None
+
+
+class ImageSizeCache:
+    """
+    Persistent cache of image dimensions keyed by content hash
+
+    A stat index (path, size, mtime) in front of the hash lets unchanged
+    files skip both hashing and header parsing on later runs.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Initialize cache
+
+        Args:
+            cache_path (str, optional): JSON file to persist the cache in
+        """
+        self.cache_path = cache_path
+        self.sizes: Dict[str, Tuple[int, int]] = {}
+        self.files: Dict[str, list] = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if cache_path:
+            self._load()
+
+    def get(self, file_path: str) -> Optional[Tuple[int, int]]:
+        """
+        Get dimensions of an image, parsing its header on a cache miss
+
+        Args:
+            file_path (str): Path to image file
+
+        Returns:
+            tuple or None: (width, height)
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            key = os.path.abspath(file_path)
+            known = self.files.get(key)
+            if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+                digest = known[2]
+            else:
+                digest = file_digest(file_path)
+                self.files[key] = [stat.st_size, stat.st_mtime_ns, digest]
+                self._dirty = True
+
+            if digest in self.sizes:
+                CACHE_REQUESTS.inc(cache='image_sizes', result='hit')
+            else:
+                CACHE_REQUESTS.inc(cache='image_sizes', result='miss')
+                size = get_image_size(file_path)
+                if size is None:
+                    return None
+                self.sizes[digest] = tuple(size)
+                self._dirty = True
+            return self.sizes[digest]
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with self._lock:
+            data = {'sizes': dict(self.sizes), 'files': dict(self.files)}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.sizes = {digest: tuple(size) for digest, size in data.get('sizes', {}).items()}
+            self.files = data.get('files', {})
+        except (OSError, ValueError):
+            pass
@@ -0,0 +1,587 @@
+"""
+Local Jekyll server management for daspress
+Keeps track of the background `jekyll serve` process so repeated runs can reuse it
+"""
+
+import json
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional, Dict, Any, Iterable, List, Set
+
+import yaml
+
+from .status_reporter import StatusReporter
+from .config import DaspressConfig
+from .workspace import PublishWorkspace
+
+
+READY_MARKER = "Server running"
+STOP_TIMEOUT = 10  # seconds to wait for a stopped server to exit and free its port
+
+# Jekyll's own default `exclude` and `include`, which custom lists replace
+JEKYLL_DEFAULT_EXCLUDE = [
+    ".sass-cache", ".jekyll-cache", "gemfiles", "Gemfile", "Gemfile.lock", "node_modules",
+    "vendor/bundle/", "vendor/cache/", "vendor/gems/", "vendor/ruby/"
+]
+JEKYLL_DEFAULT_INCLUDE = [".htaccess"]
+# A sparse workspace only checks out the paths daspress writes, not the theme
+SPARSE_WORKSPACE_ERROR = ("The Jekyll root is a sparse publishing workspace without _layouts, _includes or _sass; "
+                          "serve or build the site from a full checkout instead")
+POST_URL_PATTERN = re.compile(r'{%-?\s*post_url\s+(\S+?)\s*-?%}')
+IMAGE_URL_PATTERN = re.compile(r'/assets/images/([^\s"\')>]+)')
+
+
+class JekyllServerManager:
+    """
+    Start, reuse, restart and stop the local Jekyll server
+
+    The PID, port and log location of the server are recorded in a state file
+    so that a later daspress run can tell whether a healthy server is already
+    serving the blog.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize server manager
+
+        Args:
+            config (DaspressConfig): Loaded configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+        self._process = None  # Popen handle when the server was started by this process
+
+    @property
+    def port(self) -> int:
+        return self.config.get_jekyll_port()
+
+    @property
+    def host(self) -> str:
+        return self.config.get_jekyll_host()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def get_state_path(self) -> str:
+        """Get path of the state file for the configured port"""
+        return os.path.join(self.config.get_state_folder(), f"jekyll-server-{self.port}.json")
+
+    def get_log_path(self) -> str:
+        """Get path of the server log file for the configured port"""
+        return os.path.join(self.config.get_state_folder(), f"jekyll-server-{self.port}.log")
+
+    def ensure_running(self, wait: bool = False, timeout: float = 60,
+                       posts: Optional[Iterable[str]] = None) -> bool:
+        """
+        Make sure a Jekyll server is serving the configured blog
+
+        Reuses a healthy server, restarts one that crashed and starts a new
+        one otherwise.
+
+        Args:
+            wait (bool): Whether to block until the server reports it is ready
+            timeout (float): Seconds to wait for readiness when wait is True
+            posts (iterable, optional): Post files to preview; with the fast
+                preview profile only these posts are built (default: full site)
+
+        Returns:
+            bool: True if a server is running (or starting)
+        """
+        if not self.has_full_checkout():
+            self.reporter.error(SPARSE_WORKSPACE_ERROR)
+            return False
+
+        state = self.load_state()
+        posts = self._preview_posts(posts)
+
+        if state and self._is_server_process(state):
+            served = state.get('posts')
+            if state.get('root') != self.config.get_jekyll_root_folder():
+                self.reporter.warning(f"Port {self.port} is used by a Jekyll server for another blog, restarting it")
+                if not self.stop():
+                    return False
+            elif served is not None and (posts is None or not set(posts) <= set(served)):
+                # The overlay is read at startup, so new posts need a restart
+                self.reporter.user_info("Restarting Jekyll preview for the new set of posts")
+                if not self.stop():
+                    return False
+            else:
+                self.touch()
+                if self.is_ready(state):
+                    self.reporter.user_info("Jekyll server already running")
+                    return True
+                self.reporter.user_info("Jekyll server is still starting")
+                return self.wait_until_ready(timeout) if wait else True
+
+        elif state:
+            # Exited, or the PID now belongs to an unrelated process (reboot, PID reuse)
+            self.reporter.warning(f"Jekyll server (PID {state['pid']}) is no longer running, restarting")
+            tail = self._read_log_tail()
+            if tail:
+                self.reporter.log(f"Last server output:\n{tail}")
+            self._remove_state()
+
+        elif self._is_port_open():
+            # Something we did not start is already listening, keep previous behaviour
+            self.reporter.user_info("Jekyll server already running")
+            return True
+
+        if not self.start(posts):
+            return False
+
+        return self.wait_until_ready(timeout) if wait else True
+
+    def start(self, posts: Optional[List[str]] = None) -> bool:
+        """
+        Start Jekyll in the background and record its state
+
+        Args:
+            posts (list, optional): Post files to build with the fast preview
+                profile (default: full site)
+
+        Returns:
+            bool: True if the process was launched
+        """
+        jekyll_root = self.config.get_jekyll_root_folder()
+        command = f"{self.config.get_jekyll_serve_command()} --port {self.port}"
+        if posts is not None:
+            try:
+                overlay_path = self.write_preview_overlay(posts)
+            except (OSError, yaml.YAMLError) as e:
+                self.reporter.warning(f"Could not write preview config, serving the full site: {e}")
+                posts = None
+            else:
+                configs = [name for name in ('_config.yml',) if os.path.exists(os.path.join(jekyll_root, name))]
+                command += f' --incremental --config "{",".join(configs + [overlay_path])}"'
+
+        try:
+            os.makedirs(self.config.get_state_folder(), exist_ok=True)
+            log_file = open(self.get_log_path(), 'w', encoding='utf-8')
+        except OSError as e:
+            self.reporter.error(f"Failed to prepare Jekyll server log: {e}")
+            return False
+
+        popen_kwargs = {}
+        if os.name == 'nt':
+            popen_kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            popen_kwargs['start_new_session'] = True
+
+        try:
+            self._process = subprocess.Popen(
+                command,
+                cwd=jekyll_root,
+                shell=True,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL,
+                **popen_kwargs
+            )
+        except Exception as e:
+            self.reporter.error(f"Failed to start Jekyll: {e}")
+            return False
+        finally:
+            log_file.close()
+
+        now = time.time()
+        self.save_state({
+            'pid': self._process.pid,
+            'pid_started': self._process_start_time(self._process.pid),
+            'port': self.port,
+            'host': self.host,
+            'root': jekyll_root,
+            'log': self.get_log_path(),
+            'posts': posts,
+            'started_at': now,
+            'last_used': now
+        })
+        self.reporter.log(f"Started Jekyll server (PID {self._process.pid}): {command}")
+
+        idle_timeout = self.config.get_jekyll_idle_timeout()
+        if idle_timeout > 0:
+            self._spawn_idle_watchdog()
+
+        return True
+
+    def has_full_checkout(self) -> bool:
+        """Check that the Jekyll root can be built, i.e. is not a sparse publishing workspace"""
+        return not PublishWorkspace(self.config, self.reporter).enabled
+
+    def write_preview_overlay(self, posts: List[str]) -> str:
+        """
+        Write a Jekyll config overlay that builds only the given posts
+
+        The posts and images folders are excluded as a whole, together with
+        the configured heavy folders, and the kept posts and the images they
+        use are added back with `include`, so the overlay stays small and the
+        preview build time follows the size of the change rather than the
+        size of the site. Posts linked with `{% post_url %}` are kept so the
+        build does not fail. Jekyll matches `include` against entry names, so
+        kept files (and the folders leading to kept images) are listed by name.
+
+        Args:
+            posts (list): Post file paths to keep
+
+        Returns:
+            str: Path of the overlay file
+        """
+        jekyll_root = self.config.get_jekyll_root_folder()
+        posts_dir = self.config.get_jekyll_posts_folder()
+        images_dir = self.config.get_jekyll_images_folder()
+        keep = self._with_linked_posts(posts, posts_dir)
+        site_config = self._site_config(jekyll_root)
+
+        exclude = list(site_config.get('exclude') or JEKYLL_DEFAULT_EXCLUDE)
+        exclude += self.config.get_jekyll_preview_profile()['exclude']
+        exclude += [os.path.relpath(folder, jekyll_root).replace(os.sep, '/') for folder in (posts_dir, images_dir)]
+
+        include = list(site_config.get('include') or JEKYLL_DEFAULT_INCLUDE)
+        include += sorted(os.path.basename(post) for post in keep)
+
+        used_images: Set[str] = set()
+        for post in keep:
+            try:
+                with open(post, 'r', encoding='utf-8') as f:
+                    used_images.update(IMAGE_URL_PATTERN.findall(f.read()))
+            except OSError:
+                pass
+        if used_images:
+            names = {os.path.basename(images_dir)}
+            for image in used_images:
+                names.update(part for part in image.split('/') if part)
+            include += sorted(names)
+
+        overlay = {'incremental': True, 'exclude': exclude, 'include': include}
+        overlay_path = os.path.join(self.config.get_state_folder(), f"jekyll-preview-{self.port}.yml")
+        os.makedirs(os.path.dirname(overlay_path), exist_ok=True)
+        with open(overlay_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(overlay, f, default_flow_style=False)
+        self.reporter.log(f"Preview profile: {len(keep)} post(s), {len(used_images)} image(s)")
+        return overlay_path
+
+    def _preview_posts(self, posts: Optional[Iterable[str]]) -> Optional[List[str]]:
+        """Normalize the posts to preview, None when the full site is served"""
+        if posts is None or not self.config.get_jekyll_preview_profile()['enabled']:
+            return None
+        if '--config' in self.config.get_jekyll_serve_command():
+            self.reporter.log("serve_command sets --config, fast preview profile disabled")
+            return None
+        posts = sorted({os.path.abspath(post) for post in posts})
+        return posts or None
+
+    def _with_linked_posts(self, posts: List[str], posts_dir: str) -> Set[str]:
+        """Add posts referenced through {% post_url %}, transitively"""
+        by_slug = {}
+        for root, _, filenames in os.walk(posts_dir):
+            for filename in filenames:
+                path = os.path.abspath(os.path.join(root, filename))
+                by_slug[os.path.splitext(filename)[0]] = path
+
+        keep = set(posts)
+        pending = list(posts)
+        while pending:
+            try:
+                with open(pending.pop(), 'r', encoding='utf-8') as f:
+                    slugs = POST_URL_PATTERN.findall(f.read())
+            except OSError:
+                continue
+            for slug in slugs:
+                linked = by_slug.get(slug.rsplit('/', 1)[-1])
+                if linked and linked not in keep:
+                    keep.add(linked)
+                    pending.append(linked)
+        return keep
+
+    def _site_config(self, jekyll_root: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(jekyll_root, '_config.yml'), 'r', encoding='utf-8') as f:
+                return yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError):
+            return {}
+
+    def stop(self) -> bool:
+        """
+        Stop the recorded Jekyll server
+
+        Returns:
+            bool: True if no server is left running
+        """
+        state = self.load_state()
+        if not state:
+            return True
+
+        pid = state['pid']
+        if self._is_server_process(state):
+            try:
+                self._terminate(pid)
+            except Exception as e:
+                self.reporter.error(f"Failed to stop Jekyll server (PID {pid}): {e}")
+                return False
+            # A restart binds the same port right away, so wait until it is free
+            if not self._wait_for_exit(pid, STOP_TIMEOUT):
+                self.reporter.error(f"Jekyll server (PID {pid}) did not exit within {STOP_TIMEOUT}s")
+                return False
+            self.reporter.user_info(f"Jekyll server stopped (PID {pid})")
+
+        self._remove_state()
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get status of the recorded Jekyll server
+
+        Returns:
+            dict: Server status information
+        """
+        state = self.load_state() or {}
+        running = bool(state) and self._is_server_process(state)
+        return {
+            'running': running,
+            'ready': running and self.is_ready(state),
+            'url': self.url,
+            'pid': state.get('pid'),
+            'idle_seconds': int(time.time() - state['last_used']) if running else None
+        }
+
+    def is_ready(self, state: Optional[Dict[str, Any]] = None) -> bool:
+        """Check whether the recorded server is alive, reported it is serving and answers on its port"""
+        state = state or self.load_state()
+        if not state or not self._is_server_process(state):
+            return False
+        return READY_MARKER in self._read_log(state.get('log', self.get_log_path())) and self._is_port_open()
+
+    def wait_until_ready(self, timeout: float = 60) -> bool:
+        """
+        Follow the server log until Jekyll reports it is serving
+
+        Args:
+            timeout (float): Maximum seconds to wait
+
+        Returns:
+            bool: True if the server became ready in time
+        """
+        state = self.load_state()
+        if not state:
+            return False
+
+        log_path = state.get('log', self.get_log_path())
+        deadline = time.time() + timeout
+        offset = 0
+        tail = ""
+
+        while time.time() < deadline:
+            try:
+                with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                    f.seek(offset)
+                    chunk = f.read()
+                    offset = f.tell()
+            except OSError:
+                chunk = ""
+
+            # Keep the end of the previous chunk in case the marker is split
+            tail = tail[-len(READY_MARKER):] + chunk
+            if READY_MARKER in tail and self._is_port_open():
+                self.reporter.user_info(f"Jekyll server ready at {self.url}")
+                return True
+
+            if not self._is_process_alive(state['pid']):
+                self.reporter.error("Jekyll server exited during startup")
+                self.reporter.log(f"Last server output:\n{self._read_log_tail()}")
+                self._remove_state()
+                return False
+
+            time.sleep(0.1)
+
+        self.reporter.error("Jekyll server startup timed out")
+        return False
+
+    def touch(self):
+        """Record that the server was just used (resets the idle timer)"""
+        state = self.load_state()
+        if state:
+            state['last_used'] = time.time()
+            self.save_state(state)
+
+    def load_state(self) -> Optional[Dict[str, Any]]:
+        """Load server state file, None if missing or unreadable"""
+        try:
+            with open(self.get_state_path(), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_state(self, state: Dict[str, Any]):
+        """Atomically write server state file"""
+        state_path = self.get_state_path()
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, state_path)
+
+    def _remove_state(self):
+        try:
+            os.remove(self.get_state_path())
+        except OSError:
+            pass
+
+    def _read_log(self, log_path: str) -> str:
+        try:
+            with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        except OSError:
+            return ""
+
+    def _read_log_tail(self, lines: int = 20) -> str:
+        return "\n".join(self._read_log(self.get_log_path()).splitlines()[-lines:])
+
+    def _is_port_open(self) -> bool:
+        try:
+            with socket.create_connection((self.host, self.port), timeout=0.2):
+                return True
+        except OSError:
+            return False
+
+    def _is_process_alive(self, pid: int) -> bool:
+        """Check whether a process with the given PID is still running"""
+        if self._process is not None and self._process.pid == pid:
+            return self._process.poll() is None
+
+        if os.name == 'nt':
+            result = subprocess.run(
+                ['tasklist', '/FI', f'PID eq {pid}', '/NH'],
+                capture_output=True, text=True
+            )
+            return str(pid) in result.stdout
+
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _is_server_process(self, state: Dict[str, Any]) -> bool:
+        """Check whether the recorded PID is still the server daspress started, not a reused PID"""
+        pid = state['pid']
+        if not self._is_process_alive(pid):
+            return False
+        recorded = state.get('pid_started')
+        return recorded is None or self._process_start_time(pid) == recorded
+
+    @staticmethod
+    def _process_start_time(pid: int) -> Optional[str]:
+        """Get an identifier of when a process started (None where it cannot be read)"""
+        try:
+            with open(f"/proc/{pid}/stat", 'r') as f:
+                # Field 22 is the start time; the command name (field 2) may contain spaces
+                return f.read().rsplit(')', 1)[1].split()[19]
+        except (OSError, IndexError):
+            pass
+        if os.name == 'nt':
+            return None
+        try:
+            result = subprocess.run(['ps', '-o', 'lstart=', '-p', str(pid)], capture_output=True, text=True)
+        except OSError:
+            return None
+        return result.stdout.strip() or None
+
+    def _wait_for_exit(self, pid: int, timeout: float) -> bool:
+        """Wait until a terminated server is gone and its port is closed"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if os.name != 'nt':
+                try:
+                    os.waitpid(pid, os.WNOHANG)  # reap it if it is our child
+                except ChildProcessError:
+                    pass
+            if not self._is_process_alive(pid) and not self._is_port_open():
+                return True
+            time.sleep(0.1)
+        return False
+
+    def _terminate(self, pid: int):
+        """Terminate the server and the shell that launched it"""
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/T', '/F', '/PID', str(pid)], capture_output=True)
+        else:
+            try:
+                os.killpg(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                return
+
+        if self._process is not None and self._process.pid == pid:
+            try:
+                self._process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+            self._process = None
+
+    def _spawn_idle_watchdog(self):
+        """Launch a detached process that stops the server once it is idle"""
+        if getattr(sys, 'frozen', False):
+            self.reporter.log("Idle shutdown is not available in the bundled executable")
+            return
+
+        popen_kwargs = {}
+        if os.name == 'nt':
+            popen_kwargs['creationflags'] = subprocess.DETACHED_PROCESS
+        else:
+            popen_kwargs['start_new_session'] = True
+
+        try:
+            subprocess.Popen(
+                [sys.executable, '-m', 'daspress.jekyll_server',
+                 self.config.get_config_path(), str(self.port)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                **popen_kwargs
+            )
+        except Exception as e:
+            self.reporter.log(f"Could not start idle watchdog: {e}")
+
+    def run_idle_watchdog(self):
+        """
+        Block until the recorded server is idle for longer than the timeout,
+        then stop it. Returns early if the server goes away on its own.
+        """
+        idle_timeout = self.config.get_jekyll_idle_timeout()
+        if idle_timeout <= 0:
+            return
+
+        initial = self.load_state()
+        if not initial:
+            return
+
+        interval = max(1.0, min(30.0, idle_timeout / 4))
+        while True:
+            time.sleep(interval)
+            state = self.load_state()
+            if not state or state['pid'] != initial['pid'] or not self._is_server_process(state):
+                return
+            if time.time() - state['last_used'] > idle_timeout:
+                self.stop()
+                return
+
+
+def _watchdog_main(argv):
+    """Entry point of the detached idle watchdog process"""
+    config_path, port = argv[0], int(argv[1])
+    config = DaspressConfig(config_path=config_path, reporter=StatusReporter(verbose=False))
+    if not config.load_config():
+        return
+    config.config_data.setdefault('jekyll', {})['port'] = port
+    JekyllServerManager(config, config.reporter).run_idle_watchdog()
+
+
+if __name__ == '__main__':
+    _watchdog_main(sys.argv[1:])
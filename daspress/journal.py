@@ -0,0 +1,124 @@
+"""
+Checkpoint journal for daspress batch runs
+Records every completed post so an interrupted batch can be resumed
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from .assets import file_digest
+
+
+def _signature(path: str) -> Optional[List[Any]]:
+    """[size, mtime_ns, sha256] of a file, None if it is missing"""
+    try:
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns, file_digest(path)]
+    except OSError:
+        return None
+
+
+def _matches(path: str, recorded: List[Any]) -> bool:
+    """Check a file against its recorded signature, hashing only if its stat changed"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    if stat.st_size != recorded[0]:
+        return False
+    if stat.st_mtime_ns == recorded[1]:
+        return True
+    return file_digest(path) == recorded[2]
+
+
+class BatchJournal:
+    """
+    Append-only JSON Lines journal of completed posts
+
+    Each line records the source file and every output file (posts and images
+    for all targets) with size, mtime and content hash. Lines are flushed and
+    fsynced as they are written, so a crash loses at most the post being
+    converted. A journaled post is verified with a stat per file, and only
+    hashed when its mtime moved.
+    """
+
+    def __init__(self, journal_path: str):
+        """
+        Initialize journal
+
+        Args:
+            journal_path (str): JSON Lines file to append to
+        """
+        self.journal_path = journal_path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> int:
+        """
+        Read completed entries from an existing journal
+
+        A partially written last line (from a crash) is ignored.
+
+        Returns:
+            int: Number of completed posts in the journal
+        """
+        self.entries = {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry['source']] = entry
+        except OSError:
+            pass
+        return len(self.entries)
+
+    def reset(self):
+        """Start a new, empty journal"""
+        self.entries = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+        open(self.journal_path, 'w', encoding='utf-8').close()
+
+    def is_complete(self, source_path: str) -> bool:
+        """
+        Check whether a post was completed and its outputs are still intact
+
+        Args:
+            source_path (str): Path of the source post
+
+        Returns:
+            bool: True if the post can be skipped
+        """
+        entry = self.entries.get(os.path.abspath(source_path))
+        if not entry or not entry['source_signature'] or not _matches(source_path, entry['source_signature']):
+            return False
+        return all(_matches(path, signature) for path, signature in entry['outputs'].items())
+
+    def record(self, post: str, source_path: str, outputs: List[str]):
+        """
+        Append a completed post to the journal
+
+        Args:
+            post (str): Post name as given to the batch
+            source_path (str): Path of the source post
+            outputs (list): Files written (or verified unchanged) for the post
+        """
+        source_path = os.path.abspath(source_path)
+        signatures = {}
+        for path in outputs:
+            signature = _signature(path)
+            if signature is not None:
+                signatures[os.path.abspath(path)] = signature
+        entry = {
+            'post': post,
+            'source': source_path,
+            'source_signature': _signature(source_path),
+            'outputs': signatures
+        }
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.entries[source_path] = entry
@@ -0,0 +1,219 @@
+"""
+Internal link checker for daspress
+Verifies that every internal href/src in the built site points to an existing file
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import yaml
+
+from .status_reporter import StatusReporter
+from .config import DaspressConfig
+
+
+LINK_ATTRIBUTES = {'href', 'src', 'srcset', 'poster'}
+SKIPPED_SCHEMES = ('mailto:', 'tel:', 'javascript:', 'data:')
+
+
+class _LinkCollector(HTMLParser):
+    """Collect (attribute, url) pairs from an HTML document"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Tuple[str, str]] = []
+
+    def handle_starttag(self, tag, attrs):
+        for name, value in attrs:
+            if name not in LINK_ATTRIBUTES or not value:
+                continue
+            if name == 'srcset':
+                for candidate in value.split(','):
+                    url = candidate.strip().split(' ')[0]
+                    if url:
+                        self.links.append((name, url))
+            else:
+                self.links.append((name, value.strip()))
+
+
+class LinkChecker:
+    """
+    Check internal links of the built Jekyll site
+
+    Pages are parsed in a thread pool. Resolved target paths are cached and
+    shared between threads, so a link used on every page (logo, CSS) hits
+    the filesystem once. In incremental mode only changed pages are parsed
+    again, but the stored links of every page are re-resolved, so a page
+    whose targets appeared or vanished is still reported correctly.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None,
+                 workers: Optional[int] = None):
+        """
+        Initialize link checker
+
+        Args:
+            config (DaspressConfig): Loaded configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+            workers (int, optional): Number of checker threads
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+        self.workers = workers
+        self._resolved: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def get_state_path(self, site_dir: str) -> str:
+        """Get path of the incremental state file for a site"""
+        site_key = hashlib.sha256(os.path.abspath(site_dir).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.config.get_state_folder(), f"check-{site_key}.json")
+
+    def check(self, site_dir: Optional[str] = None, incremental: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Check all internal links of the built site
+
+        Args:
+            site_dir (str, optional): Built site folder (default: <jekyll root>/_site)
+            incremental (bool): Only check pages changed since the last run
+
+        Returns:
+            dict or None: Machine-readable report, None if the site is missing
+        """
+        site_dir = os.path.abspath(site_dir or os.path.join(self.config.get_jekyll_root_folder(), '_site'))
+        if not os.path.isdir(site_dir):
+            self.reporter.error(f"Built site not found: {site_dir} (run jekyll build first)")
+            return None
+
+        baseurl = self._get_baseurl()
+        state_path = self.get_state_path(site_dir)
+        previous = self._load_state(state_path) if incremental else {}
+
+        pages = {}
+        for root, _, filenames in os.walk(site_dir):
+            for filename in filenames:
+                if filename.endswith(('.html', '.htm')):
+                    path = os.path.join(root, filename)
+                    stat = os.stat(path)
+                    pages[os.path.relpath(path, site_dir)] = [stat.st_size, stat.st_mtime_ns]
+
+        to_check = [
+            rel_path for rel_path, signature in pages.items()
+            if previous.get(rel_path, {}).get('signature') != signature or 'links' not in previous[rel_path]
+        ]
+
+        state = {rel_path: previous[rel_path] for rel_path in pages if rel_path not in to_check}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            results = pool.map(lambda rel_path: self._collect_links(site_dir, rel_path, baseurl), to_check)
+            for rel_path, entry in results:
+                state[rel_path] = {'signature': pages[rel_path], **entry}
+
+        self._save_state(state_path, state)
+
+        # Targets of skipped pages may have changed too: resolve every stored link
+        broken_links = []
+        links_checked = 0
+        for rel_path in sorted(state):
+            page = rel_path.replace(os.sep, '/')
+            if 'error' in state[rel_path]:
+                broken_links.append({'page': page, 'attribute': 'page', 'url': page, 'error': state[rel_path]['error']})
+                continue
+            for attribute, url, target in state[rel_path]['links']:
+                links_checked += 1
+                if not self._exists(os.path.normpath(os.path.join(site_dir, target))):
+                    broken_links.append({'page': page, 'attribute': attribute, 'url': url})
+        report = {
+            'site': site_dir,
+            'incremental': incremental,
+            'pages_total': len(pages),
+            'pages_checked': len(to_check),
+            'pages_skipped': len(pages) - len(to_check),
+            'links_checked': links_checked,
+            'broken_count': len(broken_links),
+            'broken': broken_links
+        }
+
+        if broken_links:
+            self.reporter.warning(f"Found {len(broken_links)} broken internal link(s)")
+            for link in broken_links:
+                self.reporter.log(f"Broken {link['attribute']} in {link['page']}: {link['url']}", "WARNING")
+        else:
+            self.reporter.user_info(f"No broken links ({len(to_check)} page(s) checked)")
+        return report
+
+    def _collect_links(self, site_dir: str, rel_path: str, baseurl: str) -> Tuple[str, Dict[str, Any]]:
+        """Parse one page and return (page, state entry with its internal links or a read error)"""
+        page_path = os.path.join(site_dir, rel_path)
+        collector = _LinkCollector()
+        try:
+            with open(page_path, 'r', encoding='utf-8', errors='replace') as f:
+                collector.feed(f.read())
+        except OSError as e:
+            return rel_path, {'error': str(e)}
+
+        links = []
+        for attribute, url in collector.links:
+            target = self._target_path(site_dir, os.path.dirname(page_path), url, baseurl)
+            if target is not None:
+                links.append([attribute, url, os.path.relpath(target, site_dir)])
+        return rel_path, {'links': links}
+
+    def _target_path(self, site_dir: str, page_dir: str, url: str, baseurl: str) -> Optional[str]:
+        """Map an internal URL to a filesystem path, None for external links"""
+        if url.startswith(('#', '//')) or url.lower().startswith(SKIPPED_SCHEMES):
+            return None
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc or not parts.path:
+            return None
+
+        path = unquote(parts.path)
+        if path.startswith('/'):
+            if baseurl and (path == baseurl or path.startswith(baseurl + '/')):
+                path = path[len(baseurl):] or '/'
+            return os.path.normpath(os.path.join(site_dir, path.lstrip('/')))
+        return os.path.normpath(os.path.join(page_dir, path))
+
+    def _exists(self, target: str) -> bool:
+        """Check a target path, following Jekyll's index.html and .html rules"""
+        with self._lock:
+            cached = self._resolved.get(target)
+        if cached is not None:
+            return cached
+
+        if os.path.isdir(target):
+            exists = os.path.isfile(os.path.join(target, 'index.html'))
+        else:
+            exists = os.path.isfile(target) or os.path.isfile(target + '.html')
+
+        with self._lock:
+            self._resolved[target] = exists
+        return exists
+
+    def _get_baseurl(self) -> str:
+        """Read baseurl from the Jekyll _config.yml"""
+        config_path = os.path.join(self.config.get_jekyll_root_folder(), '_config.yml')
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                baseurl = (yaml.safe_load(f) or {}).get('baseurl') or ''
+        except (OSError, yaml.YAMLError):
+            return ''
+        return '/' + baseurl.strip('/') if baseurl.strip('/') else ''
+
+    def _load_state(self, state_path: str) -> Dict[str, Any]:
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state_path: str, state: Dict[str, Any]):
+        os.makedirs(os.path.dirname(state_path), exist_ok=True)
+        tmp_path = state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, state_path)
@@ -3,12 +3,57 @@ Markdown processing functionality for daspress
 This module handles markdown content transformation and image processing
 """
 
+import copy
+import html
 import os
 import re
 import shutil
-from typing import Optional, Dict, Callable
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Callable, List, NamedTuple, Tuple, Union
 from .utils import sanitize_filename
 from .status_reporter import StatusReporter
+from .assets import (
+    hashed_asset_name, scan_hashed_assets, asset_subdir, ASSET_LAYOUTS, HASH_LENGTH, HASHED_NAME_PATTERN
+)
+from .filesystem import FileSystem, LocalFileSystem, MemoryFileSystem, LOCAL_FILESYSTEM
+from .image_info import ImageSizeCache, read_image_size
+from .responsive import ResponsiveImageGenerator, VARIANTS_FOLDER
+from .transclusion import NoteEmbedder
+from .highlight import CodeHighlighter
+from .asset_store import AssetStore
+from .metrics import IMAGES_COPIED, IMAGES_UNCHANGED, BYTES_COPIED, CACHE_REQUESTS
+
+
+class UsedImage(NamedTuple):
+    """Image referenced by a rendered post"""
+    source: str
+    destination: str
+    copied: bool  # False when the destination already had identical content
+
+
+@dataclass
+class ConversionResult:
+    """Result of MarkdownProcessor.convert"""
+    content: str
+    assets: List[UsedImage] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)
+    sink: Optional[FileSystem] = None  # filesystem the assets were written to
+    
+    @property
+    def success(self) -> bool:
+        return not self.errors
+    
+    @property
+    def images_copied(self) -> int:
+        return sum(1 for asset in self.assets if asset.copied)
+    
+    @property
+    def images_unchanged(self) -> int:
+        return sum(1 for asset in self.assets if not asset.copied)
 
 
 class MarkdownProcessor:
@@ -28,6 +73,25 @@ class MarkdownProcessor:
         self.image_extensions = ['.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg']
         self.obsidian_img_pattern = r'!\[\[(.*?)\]\]'
         self.images_processed = 0  # Add this line
+        self.images_unchanged = 0  # images whose destination already had identical content
+        self.images_used = []  # UsedImage entries of the last render
+        self.variant_jobs = {}  # responsive variants scheduled by the current render, path -> future
+        self._srcset_tags = []  # (tag, url, alt, size, srcset) emitted while variants are pending
+        self._skipped_features = set()  # local-only features already reported as skipped this render
+        self.asset_naming = 'original'  # 'original' or 'hash'
+        self._hashed_assets = {}  # jekyll_img_dir -> {short hash: path relative to jekyll_img_dir}
+        self._hashed_lock = threading.RLock()  # guards _hashed_assets
+        self.asset_layout = 'flat'  # folder layout inside jekyll_img_dir, see assets.asset_subdir
+        self.current_post = None  # Jekyll post being rendered (folder of post/date layouts)
+        self.path_exists = os.path.exists  # replaced by a caching lookup in ConversionSession
+        self.image_output = 'markdown'  # 'markdown' or 'html'
+        self.image_sizes = None  # ImageSizeCache used in html output mode
+        self.responsive = None  # ResponsiveImageGenerator for srcset variants
+        self.embedder = None  # NoteEmbedder for ![[Note]] transclusion
+        self.highlighter = None  # CodeHighlighter pre-rendering fenced code blocks
+        self.source_fs = LOCAL_FILESYSTEM  # where attachments are read from
+        self.sink_fs = LOCAL_FILESYSTEM  # where copied assets are written to
+        self.asset_store = None  # AssetStore receiving images instead of the images folder
     
     # def process_content(self, content: str, obsidian_img_dir: str, jekyll_img_dir: str) -> str:
     #     """
@@ -49,21 +113,138 @@ class MarkdownProcessor:
         
     #     return processed_content
 
+    def convert(self, content: str, obsidian_img_dir: str, jekyll_img_dir: str,
+                source_path: Optional[str] = None, post_path: Optional[str] = None,
+                source_fs: Optional[FileSystem] = None, sink_fs: Optional[FileSystem] = None) -> ConversionResult:
+        """
+        Convert markdown content without touching the processor's own state
+
+        Reentrant: each call renders with a private copy of the processor and
+        collects its messages instead of reporting them, so one processor can
+        serve a thread pool or a server. Never exits the process.
+
+        Args:
+            content (str): Original markdown content
+            obsidian_img_dir (str): Source images directory
+            jekyll_img_dir (str): Destination images directory
+            source_path (str, optional): Path of the note (for embed cycle detection)
+            post_path (str, optional): Jekyll post being written (for post/date asset layouts)
+            source_fs (FileSystem, optional): Read attachments from here instead of the processor's source
+            sink_fs (FileSystem, optional): Write assets here instead of the processor's sink
+
+        Returns:
+            ConversionResult: Output text, images used, warnings, errors and timings
+        """
+        start_time = time.perf_counter()
+        worker = self.copy()
+        worker.reporter = StatusReporter(verbose=False)
+        worker.current_post = post_path
+        if source_fs is not None or sink_fs is not None:
+            worker.set_filesystems(source_fs or self.source_fs, sink_fs or self.sink_fs)
+        timings = {}
+
+        try:
+            content = worker.expand_embeds(content, source_path)
+            timings['embeds'] = time.perf_counter() - start_time
+            render_start = time.perf_counter()
+            content = worker.render_content(worker.tokenize_images(content), obsidian_img_dir, jekyll_img_dir)
+            timings['render'] = time.perf_counter() - render_start
+        except Exception as e:
+            worker.reporter.error(f"Failed to process markdown content: {e}")
+        timings['total'] = time.perf_counter() - start_time
+
+        messages = worker.reporter.messages
+        return ConversionResult(
+            content=content,
+            assets=list(worker.images_used),
+            warnings=[m['message'] for m in messages if m['level'] == 'WARNING'],
+            errors=[m['message'] for m in messages if m['level'] == 'ERROR'],
+            timings=timings,
+            sink=worker.sink_fs
+        )
+    
+    def convert_in_memory(self, content: str, attachments: Dict[str, bytes], post_path: Optional[str] = None,
+                          sink_fs: Optional[FileSystem] = None,
+                          jekyll_img_dir: str = 'assets/images') -> ConversionResult:
+        """
+        Convert markdown content and its attachments without touching the disk
+        
+        Copied images land in a MemoryFileSystem (result.sink) under paths
+        relative to the Jekyll root; result.assets is the asset plan. Call
+        `result.sink.commit(jekyll_root)` to write them out. Note embeds and
+        responsive variants need the local filesystem; they are skipped with
+        a warning.
+        
+        Args:
+            content (str): Original markdown content
+            attachments (dict): Attachment name → bytes
+            post_path (str, optional): Jekyll post name (for post/date asset layouts)
+            sink_fs (FileSystem, optional): Write assets here (default: a new MemoryFileSystem)
+            jekyll_img_dir (str): Images folder relative to the Jekyll root
+            
+        Returns:
+            ConversionResult: Output text, asset plan, warnings, errors and timings
+        """
+        source_fs = MemoryFileSystem({f"attachments/{name}": data for name, data in attachments.items()})
+        return self.convert(content, 'attachments', jekyll_img_dir, post_path=post_path,
+                            source_fs=source_fs, sink_fs=sink_fs or MemoryFileSystem())
+
     def process_content(self, content: str, obsidian_img_dir: str, jekyll_img_dir: str) -> str:
         self.images_processed = 0  # Reset counter
+        self.images_unchanged = 0
+        self.images_used = []
+        self.variant_jobs = {}
+        self._srcset_tags = []
+        self._skipped_features = set()
+        
+        # Inline embedded notes so their images are processed too
+        content = self.expand_embeds(content)
         
         # Process images first
-        processed_content = self.process_images(content, obsidian_img_dir, jekyll_img_dir)
+        processed_content = self._finish_variants(self.process_images(content, obsidian_img_dir, jekyll_img_dir))
         
         # Add this summary
-        if self.images_processed > 0:
-            self.reporter.user_info(f"Images processed: {self.images_processed} image{'s' if self.images_processed != 1 else ''} copied")
+        self._report_image_summary()
+        
+        if self.highlighter is not None:
+            processed_content = self.highlighter.highlight(processed_content)
         
         # Apply any additional processing
         processed_content = self.apply_custom_processing(processed_content)
         
         return processed_content
     
+    def render_content(self, tokens: List[Union[str, re.Match]], obsidian_img_dir: str, jekyll_img_dir: str) -> str:
+        """
+        Render pre-tokenized markdown content for one destination
+        
+        Same as process_content, but takes the output of tokenize_images so a
+        post parsed once can be rendered for several sites.
+        
+        Args:
+            tokens (list): Output of tokenize_images
+            obsidian_img_dir (str): Source images directory
+            jekyll_img_dir (str): Destination images directory
+            
+        Returns:
+            str: Processed markdown content
+        """
+        self.images_processed = 0  # Reset counter
+        self.images_unchanged = 0
+        self.images_used = []
+        self.variant_jobs = {}
+        self._srcset_tags = []
+        self._skipped_features = set()
+        
+        processed_content = self._finish_variants(self.render_images(tokens, obsidian_img_dir, jekyll_img_dir))
+        
+        self._report_image_summary()
+        
+        if self.highlighter is not None:
+            processed_content = self.highlighter.highlight(processed_content)
+        
+        return self.apply_custom_processing(processed_content)
+    
     def process_images(self, content: str, obsidian_img_dir: str, jekyll_img_dir: str) -> str:
         """
         Process image links in markdown content
@@ -76,10 +257,95 @@ class MarkdownProcessor:
         Returns:
             str: Content with processed image links
         """
-        def replace_image_link(match):
-            return self._replace_single_image(match, obsidian_img_dir, jekyll_img_dir)
+        return self.render_images(self.tokenize_images(content), obsidian_img_dir, jekyll_img_dir)
+    
+    def _report_image_summary(self):
+        """Report how many images were copied and left unchanged"""
+        if self.images_processed > 0 or self.images_unchanged > 0:
+            summary = f"Images processed: {self.images_processed} image{'s' if self.images_processed != 1 else ''} copied"
+            if self.images_unchanged > 0:
+                summary += f", {self.images_unchanged} unchanged"
+            self.reporter.user_info(summary)
+    
+    def expand_embeds(self, content: str, source_path: Optional[str] = None) -> str:
+        """
+        Inline embedded notes (![[Note]], ![[Note#Section]])
+        
+        Args:
+            content (str): Markdown content
+            source_path (str, optional): Path of the note being converted
+            
+        Returns:
+            str: Content with note embeds expanded (unchanged without an embedder)
+        """
+        if self.embedder is None:
+            return content
+        if not isinstance(self.source_fs, LocalFileSystem):
+            if any(os.path.splitext(match.group(1).split('|', 1)[0].split('#', 1)[0])[1].lower() in ('', '.md')
+                   for match in re.finditer(self.obsidian_img_pattern, content)):
+                self._warn_skipped('Note embeds')
+            return content
+        return self.embedder.expand(content, source_path)
+    
+    def tokenize_images(self, content: str) -> List[Union[str, re.Match]]:
+        """
+        Split markdown content into text and image link tokens
         
-        return re.sub(self.obsidian_img_pattern, replace_image_link, content)
+        Args:
+            content (str): Original markdown content
+            
+        Returns:
+            list: Alternating plain text strings and image regex matches
+        """
+        tokens = []
+        position = 0
+        for match in re.finditer(self.obsidian_img_pattern, content):
+            tokens.append(content[position:match.start()])
+            tokens.append(match)
+            position = match.end()
+        tokens.append(content[position:])
+        return tokens
+    
+    def render_images(self, tokens: List[Union[str, re.Match]], obsidian_img_dir: str, jekyll_img_dir: str) -> str:
+        """
+        Render image link tokens for one destination directory
+        
+        Args:
+            tokens (list): Output of tokenize_images
+            obsidian_img_dir (str): Source images directory
+            jekyll_img_dir (str): Destination images directory
+            
+        Returns:
+            str: Content with processed image links
+        """
+        return "".join(
+            token if isinstance(token, str)
+            else self._replace_single_image(token, obsidian_img_dir, jekyll_img_dir)
+            for token in tokens
+        )
+    
+    def copy(self) -> 'MarkdownProcessor':
+        """
+        Create an independent processor with the same settings
+        
+        Used to render one post for several sites in parallel; each copy keeps
+        its own per-run counters.
+        
+        Returns:
+            MarkdownProcessor: Processor copy
+        """
+        clone = copy.copy(self)
+        clone.image_extensions = list(self.image_extensions)
+        clone.images_processed = 0
+        clone.images_unchanged = 0
+        clone.images_used = []
+        clone.variant_jobs = {}
+        clone._srcset_tags = []
+        clone._skipped_features = set()
+        # A private hash index: names chosen by one render never leak into another
+        clone._hashed_assets = {}
+        clone._hashed_lock = threading.RLock()
+        return clone
     
     def _replace_single_image(self, match, obsidian_img_dir: str, jekyll_img_dir: str) -> str:
         """
@@ -104,25 +370,228 @@ class MarkdownProcessor:
         
         # Check if source image exists
         original_img_path = os.path.join(obsidian_img_dir, img_filename)
-        if not os.path.exists(original_img_path):
+        if not self.path_exists(original_img_path):
             self.reporter.warning(f"Image not found: {original_img_path}")
             return match.group(0)  # Return original if not found
         
+        if self.asset_store is not None:
+            return self._store_image(match, original_img_path, img_filename)
+        
         # Copy image to Jekyll directory
-        sanitized_img_name = sanitize_filename(img_filename)
-        jekyll_img_path = os.path.join(jekyll_img_dir, sanitized_img_name)
+        if self.asset_naming == 'hash':
+            sanitized_img_name, already_present = self._get_hashed_name(original_img_path, jekyll_img_dir)
+            if already_present:
+                # Identical content is already published under this name
+                self.reporter.log(f"Reused image: {original_img_path} → {sanitized_img_name}")
+                reused_path = os.path.join(jekyll_img_dir, *sanitized_img_name.split('/'))
+                self.images_used.append(UsedImage(original_img_path, reused_path, False))
+                return self._image_link(f"/assets/images/{sanitized_img_name}", img_filename, original_img_path,
+                                        os.path.dirname(reused_path))
+        else:
+            sanitized_img_name = self._asset_path(sanitize_filename(img_filename), original_img_path)
+        jekyll_img_path = os.path.join(jekyll_img_dir, *sanitized_img_name.split('/'))
         
         try:
-            shutil.copy2(original_img_path, jekyll_img_path)
-            self.images_processed += 1
-            self.reporter.log(f"Copied image: {original_img_path} → {jekyll_img_path}")  # Keep debug info
+            if '/' in sanitized_img_name:
+                self.sink_fs.makedirs(os.path.dirname(jekyll_img_path))
+            copied = self.sink_fs.copy_if_changed(self.source_fs, original_img_path, jekyll_img_path)
+            if copied:
+                self.images_processed += 1
+                self.reporter.record_write(True)
+                IMAGES_COPIED.inc()
+                BYTES_COPIED.inc(self.sink_fs.size(jekyll_img_path))
+                self.reporter.log(f"Copied image: {original_img_path} → {jekyll_img_path}")  # Keep debug info
+            else:
+                self.images_unchanged += 1
+                self.reporter.record_write(False)
+                IMAGES_UNCHANGED.inc()
+                self.reporter.log(f"Image unchanged: {jekyll_img_path}")
         except Exception as e:
             self.reporter.error(f"Failed to copy image {original_img_path}: {e}")
+            if self.asset_naming == 'hash':
+                self._forget_hashed_name(sanitized_img_name, jekyll_img_dir)
             return match.group(0)  # Return original if copy failed
         
+        self.images_used.append(UsedImage(original_img_path, jekyll_img_path, copied))
+        
         # Generate Jekyll-compatible image link
         rel_img_path = f"/assets/images/{sanitized_img_name}"
-        return self._generate_jekyll_image_link(rel_img_path, img_filename)
+        return self._image_link(rel_img_path, img_filename, original_img_path, os.path.dirname(jekyll_img_path))
+    
+    def _store_image(self, match, original_img_path: str, img_filename: str) -> str:
+        """
+        Upload an image to the asset store and link to its store URL
+        
+        Args:
+            match: Regex match object
+            original_img_path (str): Source image path
+            img_filename (str): Image filename (alt text)
+            
+        Returns:
+            str: Replacement string for the image link
+        """
+        try:
+            url, uploading = self.asset_store.upload(self.source_fs, original_img_path)
+        except Exception as e:
+            self.reporter.error(f"Failed to store image {original_img_path}: {e}")
+            return match.group(0)  # Return original if the store failed
+        
+        if uploading:
+            self.images_processed += 1
+            IMAGES_COPIED.inc()
+            self.reporter.log(f"Uploading image: {original_img_path} → {url}")
+        else:
+            self.images_unchanged += 1
+            IMAGES_UNCHANGED.inc()
+            self.reporter.log(f"Image already stored: {url}")
+        self.images_used.append(UsedImage(original_img_path, url, uploading))
+        return self._image_link(url, img_filename, original_img_path, None)
+    
+    def _finish_variants(self, content: str) -> str:
+        """
+        Wait for the responsive variants of this render and drop failed ones from srcset
+        
+        Args:
+            content (str): Rendered content
+            
+        Returns:
+            str: Content whose srcset candidates all exist
+        """
+        if self.responsive is None or not self.variant_jobs:
+            return content
+        generated = self.responsive.wait(self.variant_jobs, self.reporter)
+        if generated > 0:
+            self.reporter.user_info(f"Responsive variants generated: {generated}")
+        
+        failed = {os.path.basename(path) for path, future in self.variant_jobs.items() if future.exception()}
+        if failed:
+            for tag, rel_img_path, alt_text, size, srcset in self._srcset_tags:
+                kept = [(url, width) for url, width in srcset if url.rsplit('/', 1)[-1] not in failed]
+                if len(kept) != len(srcset):
+                    content = content.replace(tag, self._generate_html_image_tag(rel_img_path, alt_text, size, kept))
+        return content
+    
+    def _asset_path(self, filename: str, source_path: str) -> str:
+        """
+        Place a copied image in the configured asset layout
+        
+        Args:
+            filename (str): Destination filename
+            source_path (str): Source image path
+            
+        Returns:
+            str: Path relative to the images folder ('/' separators), also used in the URL
+        """
+        digest = self.source_fs.digest(source_path) if self.asset_layout == 'hash' else None
+        subdir = asset_subdir(self.asset_layout, source_path, self.current_post, digest)
+        return f"{subdir}/{filename}" if subdir else filename
+    
+    def _image_link(self, rel_img_path: str, alt_text: str, source_path: str,
+                    jekyll_img_dir: Optional[str]) -> str:
+        """
+        Generate the image link in the configured output mode
+        
+        Args:
+            rel_img_path (str): Relative image path
+            alt_text (str): Alt text for image
+            source_path (str): Path of the source image (used for dimensions)
+            jekyll_img_dir (str): Folder the image was copied to (None for stored images)
+            
+        Returns:
+            str: Markdown image link or HTML image tag
+        """
+        if self.image_output == 'html' or self.responsive is not None:
+            local = self._local_files()
+            if not local:
+                with self.source_fs.open(source_path) as f:
+                    size = read_image_size(f)
+            else:
+                size = self.image_sizes.get(source_path) if self.image_sizes else None
+            srcset = None
+            if self.responsive is not None and not local:
+                self._warn_skipped('Responsive image variants')
+            if self.responsive is not None and local and jekyll_img_dir is not None:
+                scheduled = len(self.variant_jobs)
+                srcset = self.responsive.variants(source_path, jekyll_img_dir, rel_img_path, size, self.variant_jobs)
+                if len(self.variant_jobs) > scheduled:
+                    tag = self._generate_html_image_tag(rel_img_path, alt_text, size, srcset)
+                    self._srcset_tags.append((tag, rel_img_path, alt_text, size, srcset))
+                    return tag
+            return self._generate_html_image_tag(rel_img_path, alt_text, size, srcset)
+        return self._generate_jekyll_image_link(rel_img_path, alt_text)
+    
+    def _get_hashed_name(self, original_img_path: str, jekyll_img_dir: str):
+        """
+        Get content-addressed name for an image
+        
+        Args:
+            original_img_path (str): Source image path
+            jekyll_img_dir (str): Destination images directory
+            
+        Returns:
+            tuple: (path relative to the images folder, already_present) -
+            already_present is True when an asset with the same content exists
+            in the destination
+        """
+        digest = self.source_fs.digest(original_img_path)[:HASH_LENGTH]
+        with self._hashed_lock:
+            index = self._hashed_index(jekyll_img_dir)
+            if digest in index:
+                CACHE_REQUESTS.inc(cache='hashed_assets', result='hit')
+                return index[digest], True
+            CACHE_REQUESTS.inc(cache='hashed_assets', result='miss')
+            
+            name = self._asset_path(hashed_asset_name(original_img_path, digest), original_img_path)
+            index[digest] = name
+            return name, False
+    
+    def _forget_hashed_name(self, name: str, jekyll_img_dir: str):
+        """Drop a name chosen by _get_hashed_name whose copy failed, so later uses copy it again"""
+        with self._hashed_lock:
+            index = self._hashed_index(jekyll_img_dir)
+            for digest in [digest for digest, known in index.items() if known == name]:
+                del index[digest]
+    
+    def get_hashed_assets(self, jekyll_img_dir: str) -> Dict[str, str]:
+        """
+        Get content-addressed assets known in a destination directory
+        
+        Args:
+            jekyll_img_dir (str): Destination images directory
+            
+        Returns:
+            dict: Short hash → path relative to the images folder
+        """
+        with self._hashed_lock:
+            return dict(self._hashed_index(jekyll_img_dir))
+    
+    def _hashed_index(self, jekyll_img_dir: str) -> Dict[str, str]:
+        """Get (lazily scanned) hash index of a destination directory"""
+        if jekyll_img_dir not in self._hashed_assets:
+            recursive = self.asset_layout != 'flat'
+            if isinstance(self.sink_fs, LocalFileSystem):
+                index = scan_hashed_assets(jekyll_img_dir, recursive=recursive, skip_dirs=(VARIANTS_FOLDER,))
+            else:
+                index = {}
+                for rel_path in self.sink_fs.list_files(jekyll_img_dir):
+                    parts = rel_path.split('/')
+                    match = HASHED_NAME_PATTERN.match(parts[-1])
+                    if match and (recursive or len(parts) == 1) and VARIANTS_FOLDER not in parts[:-1]:
+                        index.setdefault(match.group(1), rel_path)
+            self._hashed_assets[jekyll_img_dir] = index
+        return self._hashed_assets[jekyll_img_dir]
+    
+    def _local_files(self) -> bool:
+        """Check whether attachments are read from and written to the local disk"""
+        return isinstance(self.source_fs, LocalFileSystem) and isinstance(self.sink_fs, LocalFileSystem)
+    
+    def _warn_skipped(self, feature: str):
+        """Report once per render that a local-only feature was skipped"""
+        if feature in self._skipped_features:
+            return
+        self._skipped_features.add(feature)
+        filesystem = self.source_fs if not isinstance(self.source_fs, LocalFileSystem) else self.sink_fs
+        self.reporter.warning(f"{feature} need the local filesystem and are skipped with {type(filesystem).__name__}")
     
     def _find_image_with_extension(self, img_filename: str, obsidian_img_dir: str) -> Optional[str]:
         """
@@ -138,7 +607,7 @@ class MarkdownProcessor:
         for ext in self.image_extensions:
             test_file = img_filename + ext
             test_path = os.path.join(obsidian_img_dir, test_file)
-            if os.path.exists(test_path):
+            if self.path_exists(test_path):
                 return test_file
         return None
     
@@ -157,6 +626,34 @@ class MarkdownProcessor:
         alt = alt_text if alt_text else "Image"
         return f"![{alt}]({rel_img_path})"
     
+    def _generate_html_image_tag(self, rel_img_path: str, alt_text: str = "",
+                                 size: Optional[Tuple[int, int]] = None,
+                                 srcset: Optional[List[Tuple[str, int]]] = None) -> str:
+        """
+        Generate HTML image tag with intrinsic size and lazy loading
+        Override this method to customize HTML image output
+        
+        Args:
+            rel_img_path (str): Relative image path
+            alt_text (str): Alt text for image
+            size (tuple, optional): (width, height) from the image header
+            srcset (list, optional): (url, width) candidates for responsive images
+            
+        Returns:
+            str: HTML image tag
+        """
+        alt = html.escape(alt_text if alt_text else "Image", quote=True)
+        attributes = [f'src="{html.escape(rel_img_path, quote=True)}"', f'alt="{alt}"']
+        if srcset and len(srcset) > 1:
+            candidates = ", ".join(f"{html.escape(url, quote=True)} {width}w" for url, width in srcset)
+            attributes.append(f'srcset="{candidates}"')
+            largest = srcset[-1][1]
+            attributes.append(f'sizes="(max-width: {largest}px) 100vw, {largest}px"')
+        if size:
+            attributes.append(f'width="{size[0]}" height="{size[1]}"')
+        attributes.append('loading="lazy" decoding="async"')
+        return f"<img {' '.join(attributes)}>"
+    
     def apply_custom_processing(self, content: str) -> str:
         """
         Apply custom processing to markdown content
@@ -181,6 +678,98 @@ class MarkdownProcessor:
         """
         self.obsidian_img_pattern = pattern
     
+    def set_asset_naming(self, mode: str):
+        """
+        Set naming mode for copied images
+        
+        Args:
+            mode (str): 'original' keeps the sanitized filename, 'hash' uses
+                content-addressed <hash>-<slug> names that never change content
+        """
+        if mode not in ('original', 'hash'):
+            raise ValueError(f"Unknown asset naming mode: {mode}")
+        self.asset_naming = mode
+    
+    def set_asset_layout(self, layout: str):
+        """
+        Set folder layout of copied images inside the images folder
+        
+        Args:
+            layout (str): 'flat', 'hash' (content hash prefix folders),
+                'post' (folder per post) or 'date' (year/month of the post)
+        """
+        if layout not in ASSET_LAYOUTS:
+            raise ValueError(f"Unknown asset layout: {layout}")
+        self.asset_layout = layout
+    
+    def set_filesystems(self, source_fs: Optional[FileSystem] = None, sink_fs: Optional[FileSystem] = None):
+        """
+        Set where attachments are read from and copied assets are written to
+        
+        Args:
+            source_fs (FileSystem, optional): Attachment storage (default: local disk)
+            sink_fs (FileSystem, optional): Asset storage (default: local disk)
+        """
+        self.source_fs = source_fs or LOCAL_FILESYSTEM
+        self.sink_fs = sink_fs or LOCAL_FILESYSTEM
+        self.path_exists = self.source_fs.exists
+        self._hashed_assets = {}
+    
+    def set_asset_store(self, store: Optional[AssetStore]):
+        """
+        Send images to a content-addressed asset store instead of the images folder
+        
+        Args:
+            store (AssetStore, optional): Asset store, None copies images into the site again
+        """
+        self.asset_store = store
+    
+    def set_image_output(self, mode: str, image_sizes: Optional[ImageSizeCache] = None):
+        """
+        Set output format of image links
+        
+        Args:
+            mode (str): 'markdown' for ![alt](path) links, 'html' for <img> tags
+                with width/height, loading="lazy" and decoding="async"
+            image_sizes (ImageSizeCache, optional): Dimension cache for html mode
+        """
+        if mode not in ('markdown', 'html'):
+            raise ValueError(f"Unknown image output mode: {mode}")
+        self.image_output = mode
+        if mode == 'html':
+            self.image_sizes = image_sizes or self.image_sizes or ImageSizeCache()
+    
+    def set_responsive(self, generator: Optional[ResponsiveImageGenerator],
+                       image_sizes: Optional[ImageSizeCache] = None):
+        """
+        Enable or disable responsive srcset variants
+        
+        Args:
+            generator (ResponsiveImageGenerator, optional): Variant generator, None disables
+            image_sizes (ImageSizeCache, optional): Dimension cache for the originals
+        """
+        self.responsive = generator
+        if generator is not None:
+            self.image_sizes = image_sizes or self.image_sizes or ImageSizeCache()
+    
+    def set_highlighter(self, highlighter: Optional[CodeHighlighter]):
+        """
+        Enable or disable pre-highlighting of fenced code blocks
+        
+        Args:
+            highlighter (CodeHighlighter, optional): Code highlighter, None disables
+        """
+        self.highlighter = highlighter
+    
+    def set_embedder(self, embedder: Optional[NoteEmbedder]):
+        """
+        Enable or disable note transclusion
+        
+        Args:
+            embedder (NoteEmbedder, optional): Note embedder, None disables
+        """
+        self.embedder = embedder
+    
     def add_image_extension(self, extension: str):
         """
         Add custom image extension
@@ -0,0 +1,298 @@
+"""
+Post-build optimization for daspress
+Minifies HTML/CSS/JS in the built Jekyll site and writes precompressed siblings
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from .status_reporter import StatusReporter
+from .config import DaspressConfig
+from .metrics import CACHE_REQUESTS
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.html', '.htm', '.css', '.js', '.mjs', '.json', '.xml', '.svg',
+    '.txt', '.map', '.webmanifest'
+}
+MIN_COMPRESS_SIZE = 256
+
+_HTML_PRESERVE = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+_HTML_COMMENT = re.compile(r'<!--(?!\[if|<!|>).*?-->', re.DOTALL)
+_CSS_STRING_OR_COMMENT = re.compile(r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|/\*.*?\*/)', re.DOTALL)
+
+
+def minify_html(text: str) -> str:
+    """
+    Conservatively minify HTML
+
+    Removes comments (except conditional comments) and collapses whitespace
+    between tags. Content of pre, textarea, script and style is left as is.
+
+    Args:
+        text (str): HTML source
+
+    Returns:
+        str: Minified HTML
+    """
+    parts = _HTML_PRESERVE.split(text)
+    result = []
+    # split() with two groups yields: text, full match, tag name, text, ...
+    for index in range(0, len(parts), 3):
+        chunk = _HTML_COMMENT.sub('', parts[index])
+        chunk = re.sub(r'>\s+<', '> <', chunk)
+        chunk = re.sub(r'\s{2,}', ' ', chunk)
+        result.append(chunk)
+        if index + 1 < len(parts):
+            result.append(parts[index + 1])
+    return ''.join(result).strip()
+
+
+def minify_css(text: str) -> str:
+    """
+    Minify CSS by removing comments and redundant whitespace
+
+    String literals are kept as they are. Whitespace before `:` is only
+    removed in declarations, because in a selector it is a descendant
+    combinator (`div :hover`).
+
+    Args:
+        text (str): CSS source
+
+    Returns:
+        str: Minified CSS
+    """
+    strings = []
+
+    def hide(match):
+        if match.group(0).startswith('/*'):
+            return ''
+        strings.append(match.group(0))
+        return f"\0{len(strings) - 1}\0"
+
+    text = _CSS_STRING_OR_COMMENT.sub(hide, text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+    # A declaration's colon is followed by `;` or `}` before any `{`
+    text = re.sub(r'\s*:\s*(?=[^{};]*(?:[;}]|$))', ':', text)
+    text = text.replace(';}', '}')
+    return re.sub(r'\0(\d+)\0', lambda match: strings[int(match.group(1))], text).strip()
+
+
+def minify_js(text: str) -> str:
+    """
+    Minify JavaScript safely by dropping indentation and blank lines
+
+    Comments and inner whitespace are kept because removing them requires a
+    real parser (strings, regex literals and ASI all depend on them).
+
+    Args:
+        text (str): JavaScript source
+
+    Returns:
+        str: Minified JavaScript
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+MINIFIERS = {
+    '.html': minify_html,
+    '.htm': minify_html,
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+def _optimize_file(path: str, previous: Optional[Dict[str, str]], options: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, str]], Dict[str, int]]:
+    """
+    Minify and compress one file (runs in a worker process)
+
+    Args:
+        path (str): File to optimize
+        previous (dict, optional): Manifest entry from the last run
+        options (dict): Optimization settings
+
+    Returns:
+        tuple: (path, new manifest entry or None if skipped, byte counts)
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    if previous and digest in (previous.get('source'), previous.get('output')):
+        siblings_present = all(
+            os.path.exists(path + suffix)
+            for suffix in previous.get('siblings', [])
+        )
+        if siblings_present:
+            if digest == previous.get('source') and previous.get('source') != previous.get('output'):
+                # Jekyll rebuilt the same page, restore our minified output
+                with open(path + '.min.tmp', 'wb') as f:
+                    f.write(_minified(path, data, options))
+                os.replace(path + '.min.tmp', path)
+            return path, None, {}
+
+    ext = os.path.splitext(path)[1].lower()
+    output = _minified(path, data, options)
+    if output != data:
+        tmp_path = path + '.min.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(output)
+        os.replace(tmp_path, path)
+
+    stats = {'original': len(data), 'minified': len(output)}
+    siblings = []
+    if ext in COMPRESSIBLE_EXTENSIONS and len(output) >= MIN_COMPRESS_SIZE:
+        if options.get('gzip', True):
+            compressed = gzip.compress(output, compresslevel=9, mtime=0)
+            if len(compressed) < len(output):
+                _write_sibling(path + '.gz', compressed)
+                siblings.append('.gz')
+                stats['gzip'] = len(compressed)
+        if options.get('brotli', True) and brotli is not None:
+            compressed = brotli.compress(output, quality=11)
+            if len(compressed) < len(output):
+                _write_sibling(path + '.br', compressed)
+                siblings.append('.br')
+                stats['brotli'] = len(compressed)
+
+    entry = {
+        'source': digest,
+        'output': hashlib.sha256(output).hexdigest(),
+        'siblings': siblings
+    }
+    return path, entry, stats
+
+
+def _minified(path: str, data: bytes, options: Dict[str, Any]) -> bytes:
+    """Get minified bytes of a file, or the original bytes if not minifiable"""
+    minifier = MINIFIERS.get(os.path.splitext(path)[1].lower())
+    if not options.get('minify', True) or minifier is None:
+        return data
+    try:
+        return minifier(data.decode('utf-8')).encode('utf-8')
+    except UnicodeDecodeError:
+        return data
+
+
+def _write_sibling(path: str, data: bytes):
+    """Atomically write a precompressed sibling file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class SiteOptimizer:
+    """
+    Minify and precompress the built Jekyll site
+
+    Files whose content hash matches the previous run (and whose compressed
+    siblings still exist) are skipped, so repeated runs only touch what
+    Jekyll actually changed.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize site optimizer
+
+        Args:
+            config (DaspressConfig): Loaded configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+
+    def get_manifest_path(self, site_dir: str) -> str:
+        """Get path of the manifest recording the last optimization of a site"""
+        site_key = hashlib.sha256(os.path.abspath(site_dir).encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.config.get_state_folder(), f"optimize-{site_key}.json")
+
+    def optimize(self, site_dir: Optional[str] = None) -> Optional[Dict[str, int]]:
+        """
+        Optimize all files of a built site
+
+        Args:
+            site_dir (str, optional): Built site folder (default: <jekyll root>/_site)
+
+        Returns:
+            dict or None: Summary counts, None if the site folder is missing
+        """
+        site_dir = site_dir or os.path.join(self.config.get_jekyll_root_folder(), '_site')
+        if not os.path.isdir(site_dir):
+            self.reporter.warning(f"Built site not found, skipping optimization: {site_dir}")
+            return None
+
+        options = self.config.get_optimize_settings()
+        if options.get('brotli', True) and brotli is None:
+            self.reporter.log("brotli module not installed, skipping .br files")
+
+        manifest_path = self.get_manifest_path(site_dir)
+        manifest = self._load_manifest(manifest_path)
+
+        files = []
+        for root, _, filenames in os.walk(site_dir):
+            for filename in filenames:
+                if filename.endswith(('.gz', '.br', '.tmp')):
+                    continue
+                ext = os.path.splitext(filename)[1].lower()
+                if ext in COMPRESSIBLE_EXTENSIONS or ext in MINIFIERS:
+                    files.append(os.path.join(root, filename))
+
+        summary = {'files': len(files), 'optimized': 0, 'skipped': 0, 'bytes_saved': 0}
+        new_manifest = {}
+
+        with ProcessPoolExecutor(max_workers=options.get('workers')) as pool:
+            futures = [
+                pool.submit(_optimize_file, path, manifest.get(os.path.relpath(path, site_dir)), options)
+                for path in files
+            ]
+            for future in futures:
+                try:
+                    path, entry, stats = future.result()
+                except Exception as e:
+                    self.reporter.warning(f"Failed to optimize file: {e}")
+                    continue
+
+                rel_path = os.path.relpath(path, site_dir)
+                if entry is None:
+                    CACHE_REQUESTS.inc(cache='optimize', result='hit')
+                    summary['skipped'] += 1
+                    new_manifest[rel_path] = manifest[rel_path]
+                else:
+                    CACHE_REQUESTS.inc(cache='optimize', result='miss')
+                    summary['optimized'] += 1
+                    summary['bytes_saved'] += stats['original'] - stats['minified']
+                    new_manifest[rel_path] = entry
+
+        self._save_manifest(manifest_path, new_manifest)
+        self.reporter.user_info(
+            f"Site optimized: {summary['optimized']} file(s) updated, {summary['skipped']} unchanged"
+        )
+        self.reporter.log(f"Optimization summary: {summary}")
+        return summary
+
+    def _load_manifest(self, manifest_path: str) -> Dict[str, Dict[str, str]]:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self, manifest_path: str, manifest: Dict[str, Dict[str, str]]):
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        tmp_path = manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
@@ -0,0 +1,427 @@
+"""
+Instant preview server for daspress
+Renders the converted post to HTML in Python and live-reloads it over SSE,
+without starting Jekyll
+"""
+
+import html
+import mimetypes
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from .config import DaspressConfig
+from .session import ConversionSession
+from .status_reporter import StatusReporter
+
+try:
+    import markdown as _markdown
+except ImportError:  # optional: pip install daspress[preview]
+    _markdown = None
+
+
+FRONTMATTER_PATTERN = re.compile(r'\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)', re.DOTALL)
+TITLE_PATTERN = re.compile(r'^title:\s*["\']?(.*?)["\']?\s*$', re.MULTILINE)
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} - daspress preview</title>
+<style>
+body {{ max-width: 46rem; margin: 2rem auto; padding: 0 1rem; font: 17px/1.6 -apple-system, "Segoe UI", sans-serif; color: #222; }}
+img {{ max-width: 100%; height: auto; }}
+pre {{ background: #f5f5f5; padding: .8rem; overflow-x: auto; }}
+code {{ background: #f5f5f5; padding: 0 .2rem; }}
+blockquote {{ border-left: 3px solid #ccc; margin-left: 0; padding-left: 1rem; color: #555; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+{body}
+<script>
+new EventSource("/events").addEventListener("reload", function () {{ location.reload(); }});
+</script>
+</body>
+</html>
+"""
+
+
+def _render_inline(text: str) -> str:
+    """Render inline markdown (code, images, links, emphasis) to HTML"""
+    parts = re.split(r'(`[^`]+`|<[^>]+>)', text)
+    rendered = []
+    for part in parts:
+        if part.startswith('`') and part.endswith('`') and len(part) > 1:
+            rendered.append(f"<code>{html.escape(part[1:-1])}</code>")
+        elif part.startswith('<') and part.endswith('>'):
+            rendered.append(part)  # inline HTML such as <img> tags from html image output
+        else:
+            part = html.escape(part, quote=False)
+            part = re.sub(r'!\[([^\]]*)\]\(([^)\s]+)\)',
+                          lambda m: f'<img src="{m.group(2)}" alt="{m.group(1)}">', part)
+            part = re.sub(r'\[([^\]]+)\]\(([^)\s]+)\)', r'<a href="\2">\1</a>', part)
+            part = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', part)
+            part = re.sub(r'(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])', r'<em>\1</em>', part)
+            rendered.append(part)
+    return ''.join(rendered)
+
+
+def render_markdown(text: str) -> str:
+    """
+    Render markdown to HTML for preview
+
+    Uses the `markdown` package when installed, otherwise a small built-in
+    renderer covering headings, paragraphs, lists, quotes, code and images.
+
+    Args:
+        text (str): Markdown content without front matter
+
+    Returns:
+        str: HTML fragment
+    """
+    if _markdown is not None:
+        return _markdown.markdown(text, extensions=['fenced_code', 'tables'])
+
+    blocks = []
+    paragraph: List[str] = []
+    list_tag = None
+    lines = text.splitlines()
+    index = 0
+
+    def flush():
+        nonlocal list_tag
+        if paragraph:
+            blocks.append(f"<p>{_render_inline(' '.join(paragraph))}</p>")
+            paragraph.clear()
+        if list_tag:
+            blocks.append(f"</{list_tag}>")
+            list_tag = None
+
+    while index < len(lines):
+        line = lines[index]
+        stripped = line.strip()
+        fence = re.match(r'^(```|~~~)\s*([\w+-]*)', stripped)
+        if fence:
+            flush()
+            code = []
+            index += 1
+            while index < len(lines) and not lines[index].strip().startswith(fence.group(1)):
+                code.append(lines[index])
+                index += 1
+            lang = f' class="language-{fence.group(2)}"' if fence.group(2) else ''
+            blocks.append(f"<pre><code{lang}>{html.escape(chr(10).join(code))}</code></pre>")
+        elif not stripped:
+            flush()
+        elif re.match(r'^#{1,6}\s', stripped):
+            flush()
+            level = len(stripped) - len(stripped.lstrip('#'))
+            blocks.append(f"<h{level}>{_render_inline(stripped[level:].strip().rstrip('#').strip())}</h{level}>")
+        elif stripped.startswith('>'):
+            flush()
+            blocks.append(f"<blockquote>{_render_inline(stripped.lstrip('> '))}</blockquote>")
+        elif re.match(r'^([-*+]|\d+\.)\s', stripped):
+            tag = 'ol' if stripped[0].isdigit() else 'ul'
+            if paragraph or list_tag != tag:
+                flush()
+                blocks.append(f"<{tag}>")
+                list_tag = tag
+            blocks.append(f"<li>{_render_inline(stripped.split(None, 1)[1] if ' ' in stripped else '')}</li>")
+        elif re.match(r'^(-{3,}|\*{3,})$', stripped):
+            flush()
+            blocks.append("<hr>")
+        elif stripped.startswith('<') and not paragraph:
+            flush()
+            blocks.append(stripped)  # block-level HTML is passed through
+        else:
+            if list_tag:
+                flush()
+            paragraph.append(stripped)
+        index += 1
+    flush()
+    return '\n'.join(blocks)
+
+
+class PreviewConfig(DaspressConfig):
+    """
+    Configuration that sends every file a preview writes to an overlay site
+
+    The overlay (`preview` in the state folder) takes the place of the Jekyll
+    root, so previewing never touches the published `_posts` or images.
+    Extra targets, the managed workspace, the asset store and the search index
+    are left out: a preview renders one post for one local page.
+    """
+
+    def __init__(self, config: DaspressConfig):
+        """
+        Initialize config
+
+        Args:
+            config (DaspressConfig): Configuration of the real site
+        """
+        super().__init__(config.config_path, config.reporter)
+
+    def load_config(self) -> bool:
+        if not super().load_config():
+            return False
+        self.config_data.pop('targets', None)
+        self.config_data['jekyll'].update({
+            'root_folder': os.path.join(self.get_state_folder(), 'preview'),
+            'workspace': {}
+        })
+        self.config_data['images'] = {k: v for k, v in (self.config_data.get('images') or {}).items() if k != 'store'}
+        self.config_data['search'] = {**(self.config_data.get('search') or {}), 'enabled': False}
+        return True
+
+
+class PreviewServer:
+    """
+    Serve a rendered post and push live-reload events over Server-Sent Events
+
+    The post is converted with a ConversionSession into an overlay site (see
+    PreviewConfig), so images are copied exactly as for a real build without
+    changing the Jekyll site, and served from the overlay. A watcher thread
+    reconverts the post when it, a note it embeds or an image it uses changes
+    and notifies connected browsers.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize preview server
+
+        Args:
+            config (DaspressConfig): Configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+        self.session = ConversionSession(PreviewConfig(config), self.reporter)
+        self.post: Optional[str] = None
+        self.version = 0
+        self._changed = threading.Condition()
+        self._watched: Dict[str, Tuple[int, int]] = {}
+        self._stopping = threading.Event()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._watcher: Optional[threading.Thread] = None
+        self._output_path: Optional[str] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the running preview"""
+        host, port = self._server.server_address[:2] if self._server else ('127.0.0.1', 0)
+        return f"http://{'localhost' if host in ('', '0.0.0.0', '127.0.0.1') else host}:{port}/"
+
+    def start(self, post: str, port: Optional[int] = None, watch: bool = True) -> bool:
+        """
+        Convert the post and start serving it
+
+        Args:
+            post (str): Name of the blog post file or absolute path
+            port (int, optional): Port to listen on (default: preview.port)
+            watch (bool): Reconvert automatically when sources change
+
+        Returns:
+            bool: True if the server is running
+        """
+        if not self.session.open():
+            return False
+        settings = self.session.config.get_preview_settings()
+
+        self.post = post
+        if not self.reconvert():
+            return False
+
+        port = settings['port'] if port is None else port
+        try:
+            self._server = ThreadingHTTPServer((settings['host'], int(port)), self._make_handler())
+        except OSError as e:
+            self.reporter.error(f"Failed to start preview server on port {port}: {e}")
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name='daspress-preview', daemon=True).start()
+
+        if watch:
+            self._watcher = threading.Thread(
+                target=self._watch, args=(float(settings['poll_interval']),), name='daspress-preview-watch', daemon=True
+            )
+            self._watcher.start()
+        self.reporter.user_info(f"Preview available at: {self.url}")
+        return True
+
+    def serve_forever(self):
+        """Block until interrupted, then stop the server"""
+        try:
+            while not self._stopping.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            self.reporter.user_info("Preview stopped by user")
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Stop the HTTP server, the watcher and the session"""
+        self._stopping.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.session.close()
+
+    def reconvert(self) -> bool:
+        """
+        Convert the post again and notify connected browsers
+
+        Returns:
+            bool: True if conversion succeeded
+        """
+        self.session.refresh()
+        result = self.session.convert(self.post)
+        if not result.success:
+            self.reporter.warning(f"Preview conversion failed: {'; '.join(result.errors)}")
+            return False
+
+        self._output_path = result.output_path
+        self._watched = self._snapshot(self._watch_paths())
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+        self.reporter.log(f"Preview updated in {result.duration * 1000:.0f} ms")
+        return True
+
+    def check_for_changes(self) -> bool:
+        """
+        Reconvert if a watched file changed since the last conversion
+
+        Returns:
+            bool: True if the post was reconverted
+        """
+        if self._snapshot(self._watched) == self._watched:
+            return False
+        return self.reconvert()
+
+    def render_page(self) -> str:
+        """
+        Render the converted post as a standalone HTML page
+
+        Returns:
+            str: HTML document
+        """
+        with open(self._output_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        title = os.path.splitext(os.path.basename(self._output_path))[0]
+        frontmatter = FRONTMATTER_PATTERN.match(content)
+        if frontmatter:
+            found = TITLE_PATTERN.search(frontmatter.group(1))
+            if found and found.group(1):
+                title = found.group(1)
+            content = content[frontmatter.end():]
+        return PAGE_TEMPLATE.format(title=html.escape(title), body=render_markdown(content))
+
+    def _watch_paths(self) -> List[str]:
+        """Source post, converted post, the notes it embeds and the source images of all of them"""
+        paths = self.session.converter._setup_paths(self.post)
+        processor = self.session.converter.markdown_processor
+        notes = [paths['obsidian_md_path']]
+        if processor.embedder is not None:
+            notes += processor.embedder.dependencies.get(os.path.abspath(paths['obsidian_md_path']), [])
+        watched = notes + [self._output_path]
+        for note in notes:
+            try:
+                with open(note, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            for match in re.finditer(processor.obsidian_img_pattern, content):
+                name = match.group(1).split('|', 1)[0].strip()
+                image_path = os.path.join(paths['obsidian_img_dir'], name)
+                if os.path.splitext(name)[1] and os.path.isfile(image_path) and image_path not in watched:
+                    watched.append(image_path)
+        return watched
+
+    def _snapshot(self, paths) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                snapshot[path] = (-1, -1)
+        return snapshot
+
+    def _watch(self, interval: float):
+        while not self._stopping.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                self.reporter.warning(f"Preview watcher error: {e}")
+
+    def _wait_for_change(self, version: int, timeout: float) -> int:
+        """Wait until the version moves past `version` (or timeout)"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self._stopping.is_set(), timeout)
+            return self.version
+
+    def _make_handler(self):
+        preview = self
+        assets_root = os.path.realpath(os.path.join(self.session.config.get_jekyll_root_folder(), 'assets'))
+
+        class PreviewHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path in ('/', '/index.html'):
+                    self._send(200, preview.render_page().encode('utf-8'), 'text/html; charset=utf-8')
+                elif path == '/events':
+                    self._events()
+                elif path.startswith('/assets/'):
+                    self._asset(path)
+                else:
+                    self.send_error(404)
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _asset(self, path: str):
+                file_path = os.path.realpath(os.path.join(assets_root, unquote(path[len('/assets/'):])))
+                if not file_path.startswith(assets_root + os.sep) or not os.path.isfile(file_path):
+                    self.send_error(404)
+                    return
+                with open(file_path, 'rb') as f:
+                    body = f.read()
+                self._send(200, body, mimetypes.guess_type(file_path)[0] or 'application/octet-stream')
+
+            def _events(self):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                version = preview.version
+                try:
+                    self.wfile.write(b": connected\n\n")
+                    self.wfile.flush()
+                    while not preview._stopping.is_set():
+                        current = preview._wait_for_change(version, 15)
+                        if current != version:
+                            version = current
+                            self.wfile.write(f"event: reload\ndata: {version}\n\n".encode('utf-8'))
+                        else:
+                            self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        return PreviewHandler
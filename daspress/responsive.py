@@ -0,0 +1,177 @@
+"""
+Responsive image variants for daspress
+Generates resized copies of raster images in a process pool for srcset markup
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .assets import file_digest, HASH_LENGTH
+from .status_reporter import StatusReporter
+
+try:
+    import PIL  # noqa: F401  (optional dependency, imported in worker processes)
+    HAS_PILLOW = True
+except ImportError:
+    HAS_PILLOW = False
+
+
+RASTER_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+VARIANTS_FOLDER = 'responsive'
+
+
+def _resize_image(source_path: str, dest_path: str, width: int) -> str:
+    """
+    Write a resized copy of an image (runs in a worker process)
+
+    Args:
+        source_path (str): Original image
+        dest_path (str): Variant to create
+        width (int): Target width in pixels
+
+    Returns:
+        str: dest_path
+    """
+    from PIL import Image
+
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            resized.save(tmp_path, format=image.format, optimize=True)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return dest_path
+
+
+class ResponsiveImageGenerator:
+    """
+    Create width variants of raster images for srcset
+
+    Variants are named <source hash>-<width>w<ext>, so a variant that already
+    exists is never generated again. Missing variants are resized in a
+    process pool while the rest of the post is rendered; call wait() before
+    relying on the files. Concurrent renders pass their own `scheduled` dict
+    to variants() and wait() so each waits for, and reports, only its own
+    variants.
+    """
+
+    def __init__(self, widths: List[int], workers: Optional[int] = None,
+                 reporter: Optional[StatusReporter] = None):
+        """
+        Initialize generator
+
+        Args:
+            widths (list): Breakpoint widths in pixels
+            workers (int, optional): Size of the resize process pool
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.widths = sorted(set(int(width) for width in widths))
+        self.workers = workers
+        self.reporter = reporter or StatusReporter()
+        self._pool = None
+        self._pending: Dict[str, Future] = {}  # variant path -> resize job not yet waited for
+        self._lock = threading.Lock()
+        self._warned_missing_pillow = False
+
+    def variants(self, source_path: str, jekyll_img_dir: str, rel_img_path: str,
+                 size: Optional[Tuple[int, int]],
+                 scheduled: Optional[Dict[str, Future]] = None) -> List[Tuple[str, int]]:
+        """
+        Get srcset candidates for an image, scheduling missing variants
+
+        Args:
+            source_path (str): Original image in the vault
+            jekyll_img_dir (str): Destination images directory
+            rel_img_path (str): URL of the full size copy
+            size (tuple, optional): (width, height) of the original
+            scheduled (dict, optional): Collects variant path → future of the
+                variants this image is waiting for
+
+        Returns:
+            list: (url, width) candidates, empty if the image is not resizable
+        """
+        ext = os.path.splitext(source_path)[1].lower()
+        if ext not in RASTER_EXTENSIONS or not size:
+            return []
+
+        digest = file_digest(source_path)[:HASH_LENGTH]
+        url_prefix = rel_img_path.rsplit('/', 1)[0]
+        variants_dir = os.path.join(jekyll_img_dir, VARIANTS_FOLDER)
+
+        candidates = []
+        for width in self.widths:
+            if width >= size[0]:
+                break
+            name = f"{digest}-{width}w{ext}"
+            dest_path = os.path.join(variants_dir, name)
+            if os.path.exists(dest_path):
+                candidates.append((f"{url_prefix}/{VARIANTS_FOLDER}/{name}", width))
+                continue
+            future = self._schedule(source_path, dest_path, width)
+            if future is not None:
+                candidates.append((f"{url_prefix}/{VARIANTS_FOLDER}/{name}", width))
+                if scheduled is not None:
+                    scheduled[dest_path] = future
+
+        candidates.append((rel_img_path, size[0]))
+        return candidates
+
+    def wait(self, scheduled: Optional[Dict[str, Future]] = None,
+             reporter: Optional[StatusReporter] = None) -> int:
+        """
+        Wait for scheduled variants
+
+        Args:
+            scheduled (dict, optional): Variants collected by variants() for one
+                render (default: every pending variant)
+            reporter (StatusReporter, optional): Where to report results
+                (default: the generator's reporter)
+
+        Returns:
+            int: Number of variants generated
+        """
+        with self._lock:
+            pending = dict(self._pending if scheduled is None else scheduled)
+
+        reporter = reporter or self.reporter
+        generated = 0
+        for dest_path, future in pending.items():
+            try:
+                future.result()
+                generated += 1
+                reporter.log(f"Generated responsive variant: {dest_path}")
+            except Exception as e:
+                reporter.warning(f"Failed to generate responsive variant {dest_path}: {e}")
+            with self._lock:
+                if self._pending.get(dest_path) is future:
+                    del self._pending[dest_path]
+        return generated
+
+    def close(self):
+        """Wait for pending work and shut down the process pool"""
+        self.wait()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _schedule(self, source_path: str, dest_path: str, width: int) -> Optional[Future]:
+        """Submit a resize job unless one is already pending; None if impossible"""
+        if not HAS_PILLOW:
+            if not self._warned_missing_pillow:
+                self.reporter.warning("Pillow is not installed, missing responsive variants are skipped")
+                self._warned_missing_pillow = True
+            return None
+
+        with self._lock:
+            if dest_path not in self._pending:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.workers)
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                self._pending[dest_path] = self._pool.submit(_resize_image, source_path, dest_path, width)
+            return self._pending[dest_path]
@@ -0,0 +1,323 @@
+"""
+Client-side search index for daspress
+Maintains a compact inverted index, sharded by term prefix, under the Jekyll
+root and updates it only for the posts converted in the current run
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+import yaml
+
+from .filesystem import FileSystem, LOCAL_FILESYSTEM
+
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'if', 'in',
+    'into', 'is', 'it', 'its', 'of', 'on', 'or', 'so', 'that', 'the', 'their', 'then', 'there',
+    'these', 'this', 'to', 'was', 'were', 'will', 'with'
+}
+# (suffix, replacement, endings the stem must have - empty for any) tried in order; mirrored in SEARCH_JS.
+# "-es" is a plural ending only after a sibilant (boxes, wishes); a final "e" after one is dropped too,
+# so "cache" and "caches" share the stem "cach" while "images" and "notes" lose just the "s".
+SIBILANTS = ('s', 'x', 'z', 'ch', 'sh')
+STEM_RULES = (('ies', 'y', ()), ('ing', '', ()), ('ed', '', ()), ('es', '', SIBILANTS), ('e', '', SIBILANTS),
+              ('ly', '', ()), ('s', '', ()))
+MIN_STEM_LENGTH = 3
+
+_FRONTMATTER = re.compile(r'\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)', re.DOTALL)
+_CODE_FENCE = re.compile(r'^(```|~~~).*?^\1', re.MULTILINE | re.DOTALL)
+_MARKUP = re.compile(r'<[^>]+>|!\[[^\]]*\]\([^)]*\)|\]\([^)]*\)|\{[%{].*?[%}]\}')
+_WORD = re.compile(r'[^\W_]+')
+_POST_NAME = re.compile(r'^(\d{4})-(\d{2})-(\d{2})-(.+)$')
+
+SEARCH_JS = """// Generated by daspress: queries the sharded index next to this file
+(function () {
+  var base = document.currentScript.src.replace(/[^/]*$/, "");
+  var STOP = new Set(%(stop_words)s);
+  var RULES = %(rules)s;
+  var PREFIX = %(prefix)d;
+  var cache = {};
+  function stem(word) {
+    for (var i = 0; i < RULES.length; i++) {
+      var suffix = RULES[i][0], after = RULES[i][2];
+      var rest = word.slice(0, word.length - suffix.length);
+      if (word.endsWith(suffix) && !(suffix === "s" && word.endsWith("ss")) &&
+          rest.length >= %(min_stem)d &&
+          (after.length === 0 || after.some(function (a) { return rest.endsWith(a); }))) {
+        return rest + RULES[i][1];
+      }
+    }
+    return word;
+  }
+  function terms(text) {
+    return (text.toLowerCase().match(/[\\p{L}\\p{N}]+/gu) || [])
+      .filter(function (w) { return !STOP.has(w); }).map(stem);
+  }
+  function load(name) {
+    if (!cache[name]) {
+      cache[name] = fetch(base + name + ".json").then(function (r) { return r.ok ? r.json() : {}; });
+    }
+    return cache[name];
+  }
+  function shard(term) {
+    var prefix = term.slice(0, PREFIX);
+    return /^[a-z0-9]+$/.test(prefix) ? prefix : "_";
+  }
+  window.daspressSearch = function (query) {
+    var words = terms(query);
+    return Promise.all([load("docs")].concat(words.map(function (t) { return load(shard(t)); })))
+      .then(function (loaded) {
+        var docs = loaded[0], scores = {};
+        words.forEach(function (term, i) {
+          (loaded[i + 1][term] || []).forEach(function (p) { scores[p[0]] = (scores[p[0]] || 0) + p[1]; });
+        });
+        return Object.keys(scores).sort(function (a, b) { return scores[b] - scores[a]; })
+          .map(function (id) { return {title: docs[id][0], url: docs[id][1], score: scores[id]}; });
+      });
+  };
+})();
+"""
+
+
+def stem(word: str) -> str:
+    """
+    Reduce a word to its stem with a few suffix rules
+
+    Args:
+        word (str): Lowercase word
+
+    Returns:
+        str: Stemmed word
+    """
+    for suffix, replacement, after in STEM_RULES:
+        rest = word[:len(word) - len(suffix)]
+        if word.endswith(suffix) and not (suffix == 's' and word.endswith('ss')) \
+                and len(rest) >= MIN_STEM_LENGTH and (not after or rest.endswith(after)):
+            return rest + replacement
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase, stemmed terms without stop words
+
+    Args:
+        text (str): Plain or markdown text
+
+    Returns:
+        list: Terms in order of appearance
+    """
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+
+
+class SearchIndex:
+    """
+    Inverted index sharded by term prefix
+
+    Output in the search folder (default `assets/search`)::
+
+        docs.json       {doc id: [title, url]}
+        <prefix>.json   {term: [[doc id, term frequency], ...]}
+        search.js       window.daspressSearch(query) -> Promise of results
+
+    The terms each post contributed are kept in the state folder, so updating
+    a post only rewrites the shards of the terms it gained or lost. That state
+    is written by save(), once at the end of a run rather than per post. The
+    index files and the posts are on `filesystem` (the local disk unless the
+    converter routes the target through another one); the state is always local.
+    """
+
+    def __init__(self, jekyll_root: str, state_folder: str, folder: str = 'assets/search',
+                 prefix_length: int = 2, filesystem: Optional[FileSystem] = None):
+        """
+        Initialize index
+
+        Args:
+            jekyll_root (str): Jekyll site root
+            state_folder (str): Folder for the per-post term state
+            folder (str): Index folder relative to the Jekyll root
+            prefix_length (int): Characters of a term that select its shard
+            filesystem (FileSystem, optional): Storage of the site (default: local disk)
+        """
+        self.index_dir = os.path.join(jekyll_root, folder)
+        self.prefix_length = prefix_length
+        self.filesystem = filesystem or LOCAL_FILESYSTEM
+        root_key = hashlib.sha256(os.path.abspath(jekyll_root).encode('utf-8')).hexdigest()[:16]
+        self.state_path = os.path.join(state_folder, f"search-{root_key}.json")
+        self.state = self._load_state()
+        self._pruned = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def update(self, post_path: str, content: str) -> int:
+        """
+        Index (or re-index) one converted post
+
+        Args:
+            post_path (str): Path of the converted post in `_posts`
+            content (str): Converted markdown content
+
+        Returns:
+            int: Number of shards rewritten
+        """
+        title, url, body = self._parse_post(post_path, content)
+        frequencies = dict(Counter(tokenize(f"{title} {title} {body}")))  # title counts double
+        with self._lock:
+            return self._update(os.path.abspath(post_path), title, url, frequencies)
+
+    def _update(self, post_key: str, title: str, url: str, frequencies: Dict[str, int]) -> int:
+        docs = self.state['docs']
+        entry = docs.get(post_key)
+        if entry is None:
+            entry = docs[post_key] = {'id': self.state['next_id'], 'terms': {}, 'title': None, 'url': None}
+            self.state['next_id'] += 1
+        old_terms = entry['terms']
+        changed_terms = {term for term in set(old_terms) | set(frequencies)
+                         if old_terms.get(term) != frequencies.get(term)}
+        pruned = self._prune() if not self._pruned else False
+        if not changed_terms and not pruned and (entry['title'], entry['url']) == (title, url):
+            return 0
+
+        entry.update({'terms': frequencies, 'title': title, 'url': url})
+        shards = self._write_shards(changed_terms, {post_key})
+        self._write_docs()
+        self._dirty = True
+        return shards
+
+    def remove(self, post_path: str) -> int:
+        """
+        Drop a post from the index
+
+        Args:
+            post_path (str): Path of the converted post
+
+        Returns:
+            int: Number of shards rewritten
+        """
+        with self._lock:
+            entry = self.state['docs'].pop(os.path.abspath(post_path), None)
+            if entry is None:
+                return 0
+            shards = self._write_shards(set(entry['terms']), set(), removed_ids={entry['id']})
+            self._write_docs()
+            self._dirty = True
+            return shards
+
+    def save(self):
+        """Persist the per-post term state if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = self.state_path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, separators=(',', ':'))
+            os.replace(tmp_path, self.state_path)
+            self._dirty = False
+
+    def shard_name(self, term: str) -> str:
+        """Get the shard a term lives in"""
+        prefix = term[:self.prefix_length]
+        return prefix if re.fullmatch(r'[a-z0-9]+', prefix) else '_'
+
+    def _prune(self) -> bool:
+        """Forget posts deleted since the last run (checked once per instance)"""
+        self._pruned = True
+        gone = [key for key in self.state['docs'] if not self.filesystem.exists(key)]
+        entries = [self.state['docs'].pop(key) for key in gone]
+        if entries:
+            self._dirty = True
+            self._write_shards({term for entry in entries for term in entry['terms']}, set(),
+                               removed_ids={entry['id'] for entry in entries})
+        return bool(entries)
+
+    def _write_shards(self, terms: Iterable[str], post_keys: Set[str],
+                      removed_ids: Optional[Set[int]] = None) -> int:
+        """Rewrite the postings of the given terms in their shards"""
+        by_shard: Dict[str, Set[str]] = {}
+        for term in terms:
+            by_shard.setdefault(self.shard_name(term), set()).add(term)
+        entries = [self.state['docs'][key] for key in post_keys if key in self.state['docs']]
+        ids = {entry['id'] for entry in entries} | (removed_ids or set())
+
+        written = 0
+        for shard, shard_terms in by_shard.items():
+            path = os.path.join(self.index_dir, f"{shard}.json")
+            postings = self._read_shard(path)
+            for term in shard_terms:
+                kept = [posting for posting in postings.get(term, []) if posting[0] not in ids]
+                kept += [[entry['id'], entry['terms'][term]] for entry in entries if term in entry['terms']]
+                if kept:
+                    postings[term] = sorted(kept)
+                else:
+                    postings.pop(term, None)
+            if postings:
+                written += self._write_file(path, json.dumps(postings, sort_keys=True, separators=(',', ':')))
+            elif self.filesystem.exists(path):
+                self.filesystem.remove(path)
+                written += 1
+        return written
+
+    def _write_docs(self):
+        docs = {entry['id']: [entry['title'], entry['url']] for entry in self.state['docs'].values()}
+        self._write_file(os.path.join(self.index_dir, 'docs.json'),
+                         json.dumps(docs, sort_keys=True, separators=(',', ':')))
+        self._write_file(os.path.join(self.index_dir, 'search.js'), SEARCH_JS % {
+            'stop_words': json.dumps(sorted(STOP_WORDS)),
+            'rules': json.dumps([[suffix, replacement, list(after)] for suffix, replacement, after in STEM_RULES]),
+            'prefix': self.prefix_length,
+            'min_stem': MIN_STEM_LENGTH
+        })
+
+    def _parse_post(self, post_path: str, content: str):
+        """Get (title, url, searchable text) of a converted post"""
+        stem_name = os.path.splitext(os.path.basename(post_path))[0]
+        frontmatter = {}
+        match = _FRONTMATTER.match(content)
+        if match:
+            try:
+                frontmatter = yaml.safe_load(match.group(1)) or {}
+            except yaml.YAMLError:
+                frontmatter = {}
+            content = content[match.end():]
+        if not isinstance(frontmatter, dict):
+            frontmatter = {}
+
+        dated = _POST_NAME.match(stem_name)
+        title = str(frontmatter.get('title') or (dated.group(4) if dated else stem_name).replace('-', ' '))
+        url = frontmatter.get('permalink')
+        if not url:
+            # Jekyll's default `date` permalink style (without categories)
+            url = f"/{'/'.join(dated.groups()[:3])}/{dated.group(4)}.html" if dated else f"/{stem_name}.html"
+
+        body = _MARKUP.sub(' ', _CODE_FENCE.sub(' ', content))
+        return title, str(url), body
+
+    def _load_state(self) -> Dict:
+        state = self._read_json(self.state_path)
+        return state if 'docs' in state else {'docs': {}, 'next_id': 0}
+
+    def _write_file(self, path: str, text: str) -> bool:
+        """Write an index file (UTF-8, platform newlines) unless it already has this content"""
+        self.filesystem.makedirs(self.index_dir)
+        return self.filesystem.write_text_if_changed(path, text)
+
+    def _read_shard(self, path: str) -> Dict:
+        try:
+            return json.loads(self.filesystem.read_bytes(path).decode('utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _read_json(path: str) -> Dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
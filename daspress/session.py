@@ -0,0 +1,276 @@
+"""
+Reusable conversion session for daspress
+Loads configuration and prepares directories once, then converts many posts
+"""
+
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .config import DaspressConfig
+from .converter import DaspressConverter
+from .markdown_processor import MarkdownProcessor
+from .journal import BatchJournal
+from .work_queue import WorkQueue
+from .status_reporter import StatusReporter
+from .metrics import start_http_server
+
+
+_metrics_server = None  # one /metrics endpoint per process, shared by sessions
+
+
+@dataclass
+class PostResult:
+    """Result of converting one post in a session"""
+    post: str
+    success: bool
+    output_path: Optional[str] = None
+    images_copied: int = 0
+    duration: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    outputs: List[str] = field(default_factory=list)
+    skipped: bool = False
+
+
+class ConversionSession:
+    """
+    Convert many posts with one-time setup
+
+    Configuration loading, processor setup and directory checks happen once
+    when the session is opened. Path existence checks made while converting
+    are cached for the lifetime of the session; call refresh() if the vault
+    changes while a session is open. Caches filled while converting are
+    saved once, when the session is closed.
+
+    Example:
+        with ConversionSession(config) as session:
+            for result in session.convert_many(["Post 1.md", "Post 2.md"]):
+                print(result.post, result.success)
+    """
+
+    def __init__(self,
+                 config: Optional[DaspressConfig] = None,
+                 reporter: Optional[StatusReporter] = None,
+                 markdown_processor: Optional[MarkdownProcessor] = None):
+        """
+        Initialize the session
+
+        Args:
+            config (DaspressConfig, optional): Configuration instance
+            reporter (StatusReporter, optional): Status reporter instance
+            markdown_processor (MarkdownProcessor, optional): Markdown processor instance
+        """
+        self.converter = DaspressConverter(config, reporter, markdown_processor)
+        self.reporter = self.converter.reporter
+        self.config = self.converter.config
+        self._exists_cache: Dict[str, bool] = {}
+        self._opened = False
+
+    def open(self) -> bool:
+        """
+        Load configuration and prepare the session
+
+        Returns:
+            bool: True if the session is ready for conversions
+        """
+        if self._opened:
+            return True
+
+        if not self.config.load_config() or not self.converter._prepare_workspaces():
+            return False
+
+        self.converter._configure_processor()
+        self._start_metrics_server()
+        self.converter._verified_dirs = set()
+        self.converter._defer_cache_saves = True
+        for processor in self.converter._processors():
+            processor.path_exists = self._cached_exists
+        self._opened = True
+        return True
+
+    def close(self):
+        """Save the caches filled while converting, then restore uncached path lookups"""
+        if self._opened:
+            self.converter._save_caches()
+        for processor in self.converter._processors():
+            if processor.responsive is not None:
+                processor.responsive.close()
+            processor.path_exists = processor.source_fs.exists
+        for store in self.converter.asset_stores.values():
+            store.close()
+        self.converter._defer_cache_saves = False
+        self.converter._verified_dirs = None
+        self._exists_cache.clear()
+        self._opened = False
+
+    def refresh(self):
+        """Forget cached path and directory checks"""
+        self._exists_cache.clear()
+        if self.converter.markdown_processor.embedder is not None:
+            self.converter.markdown_processor.embedder.clear()
+        if self.converter._verified_dirs is not None:
+            self.converter._verified_dirs.clear()
+
+    def __enter__(self) -> 'ConversionSession':
+        if not self.open():
+            raise RuntimeError(f"Failed to open conversion session with config: {self.config.get_config_path()}")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def convert(self, post: str) -> PostResult:
+        """
+        Convert one post
+
+        Args:
+            post (str): Name of the blog post file or absolute path
+
+        Returns:
+            PostResult: Result of the conversion
+        """
+        if not self._opened and not self.open():
+            return PostResult(post=post, success=False, errors=["Failed to load configuration"])
+
+        start_time = time.perf_counter()
+        first_message = len(self.reporter.messages)
+        converter = self.converter
+        success = False
+        paths = {}
+
+        try:
+            if converter._validate_inputs(post):
+                paths = converter._setup_paths(post)
+                success = converter._create_directories(paths) and converter._process_conversion(paths)
+        except Exception as e:
+            self.reporter.error(f"Unexpected error during conversion: {e}")
+            success = False
+
+        messages = self.reporter.messages[first_message:]
+        return PostResult(
+            post=post,
+            success=success,
+            output_path=paths.get('jekyll_md_path') if success else None,
+            images_copied=converter.markdown_processor.images_processed if success else 0,
+            duration=time.perf_counter() - start_time,
+            errors=[m['message'] for m in messages if m['level'] == 'ERROR'],
+            warnings=[m['message'] for m in messages if m['level'] == 'WARNING'],
+            outputs=list(converter.last_outputs) if success else []
+        )
+
+    def convert_many(self, posts: Iterable[str], journal: Optional[BatchJournal] = None) -> Iterator[PostResult]:
+        """
+        Convert posts one by one, yielding each result as soon as it is ready
+
+        Args:
+            posts (iterable): Blog post file names or absolute paths
+            journal (BatchJournal, optional): Checkpoint journal; posts it records
+                with intact outputs are skipped, completed posts are appended
+
+        Yields:
+            PostResult: Result of each conversion
+        """
+        for post in posts:
+            if journal is not None and (self._opened or self.open()):
+                paths = self.converter._setup_paths(post)
+                if journal.is_complete(paths['obsidian_md_path']):
+                    self.reporter.log(f"Already completed, skipping: {post}")
+                    yield PostResult(post=post, success=True, output_path=paths['jekyll_md_path'], skipped=True)
+                    continue
+
+            result = self.convert(post)
+            if journal is not None and result.success:
+                journal.record(post, self.converter._setup_paths(post)['obsidian_md_path'], result.outputs)
+            yield result
+
+    def convert_queue(self, queue: WorkQueue) -> List[PostResult]:
+        """
+        Convert posts claimed from a shared work queue until it is drained
+
+        Several sessions (on one or many hosts) can work on the same queue;
+        each post is converted by exactly one of them, and posts of crashed
+        workers are picked up once their lease expires.
+
+        Args:
+            queue (WorkQueue): Queue to claim posts from
+
+        Returns:
+            list: PostResult of each post converted by this session
+        """
+        results = []
+
+        def handle(post: str) -> Dict:
+            result = self.convert(post)
+            results.append(result)
+            return {
+                'success': result.success,
+                'output_path': result.output_path,
+                'images_copied': result.images_copied,
+                'duration': result.duration,
+                'errors': result.errors
+            }
+
+        queue.work(handle)
+        return results
+
+    def rebuild_attachments(self, attachments: Optional[Iterable[str]] = None) -> List[PostResult]:
+        """
+        Reconvert exactly the posts that embed the given (or changed) attachments
+
+        Uses the attachment index built up by earlier conversions.
+
+        Args:
+            attachments (iterable, optional): Attachment paths or names in the
+                images folder (default: attachments changed since their posts
+                were last converted)
+
+        Returns:
+            list: PostResult of each reconverted post
+        """
+        if not self._opened and not self.open():
+            return []
+
+        index = self.converter.attachment_index
+        if attachments is None:
+            attachments = index.changed_attachments()
+            posts = index.stale_posts()
+        else:
+            images_folder = self.config.get_obsidian_images_folder()
+            attachments = [path if os.path.isabs(path) else os.path.join(images_folder, path) for path in attachments]
+            posts = index.dependents(attachments)
+
+        for attachment in attachments:
+            self.reporter.log(f"Attachment changed: {attachment}")
+        if posts:
+            self.reporter.user_info(f"{len(attachments)} attachment(s) changed, reconverting {len(posts)} post(s)")
+            self.refresh()
+
+        results = list(self.convert_many(posts))
+        index.prune()
+        try:
+            index.save()
+        except OSError as e:
+            self.reporter.warning(f"Failed to save attachment index: {e}")
+        return results
+
+    def _start_metrics_server(self):
+        """Expose /metrics over HTTP when `metrics.port` is configured"""
+        global _metrics_server
+        port = self.config.get_metrics_settings()['port']
+        if port is None or _metrics_server is not None:
+            return
+        try:
+            _metrics_server = start_http_server(int(port), self.config.get_metrics_settings()['host'])
+            self.reporter.log(f"Metrics available at http://localhost:{_metrics_server.server_port}/metrics")
+        except OSError as e:
+            self.reporter.warning(f"Failed to start metrics server on port {port}: {e}")
+
+    def _cached_exists(self, path: str) -> bool:
+        """Existence check of the source filesystem, with results cached for the session"""
+        exists = self._exists_cache.get(path)
+        if exists is None:
+            exists = self.converter.markdown_processor.source_fs.exists(path)
+            self._exists_cache[path] = exists
+        return exists
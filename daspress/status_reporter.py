@@ -4,6 +4,7 @@ Status reporting utilities for daspress
 
 import json
 import sys
+import threading
 from enum import Enum
 from typing import Dict, Any, Optional
 
@@ -34,6 +35,9 @@ class StatusReporter:
         self.json_output = json_output
         self.debug_mode = debug_mode  # ADD THIS LINE
         self.messages = []
+        self.targets = {}  # per-target results for multi-site runs
+        self.files = {"written": 0, "unchanged": 0}
+        self._files_lock = threading.Lock()
     
     
     # def user_info(self, message: str):
@@ -87,6 +91,34 @@ class StatusReporter:
         """Log an error message"""
         self.log(message, "ERROR")
     
+    def record_write(self, changed: bool):
+        """
+        Count an output file as written or left unchanged
+        
+        Args:
+            changed (bool): True if the file was written
+        """
+        with self._files_lock:
+            self.files["written" if changed else "unchanged"] += 1
+    
+    def target_result(self, name: str, success: bool, duration: float, **details):
+        """
+        Record result of publishing to one target site
+        
+        Args:
+            name (str): Target name
+            success (bool): Whether the target was written successfully
+            duration (float): Seconds spent on this target
+            **details: Extra information (e.g. output path)
+        """
+        self.targets[name] = {
+            "success": success,
+            "duration": round(duration, 3),
+            **details
+        }
+        level = "SUCCESS" if success else "ERROR"
+        self.log(f"Target '{name}': {'ok' if success else 'failed'} in {duration:.2f}s", level)
+    
     def report_final_status(self, status_code: StatusCode, summary: str = ""):
         """
         Report final status of operation
@@ -101,6 +133,10 @@ class StatusReporter:
             "summary": summary,
             "messages": self.messages
         }
+        if self.targets:
+            final_report["targets"] = self.targets
+        if any(self.files.values()):
+            final_report["files"] = self.files
         
         if self.json_output:
             print(json.dumps(final_report, indent=2))
@@ -123,5 +159,7 @@ class StatusReporter:
             "messages": self.messages,
             "message_count": len(self.messages),
             "has_errors": any(msg["level"] == "ERROR" for msg in self.messages),
-            "has_warnings": any(msg["level"] == "WARNING" for msg in self.messages)
+            "has_warnings": any(msg["level"] == "WARNING" for msg in self.messages),
+            "targets": self.targets,
+            "files": dict(self.files)
         }
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Note transclusion for daspress
+Inlines Obsidian ![[Note]] and ![[Note#Section]] embeds into the post
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .status_reporter import StatusReporter
+from .metrics import CACHE_REQUESTS
+
+
+EMBED_PATTERN = re.compile(r'!\[\[(.*?)\]\]')
+HEADING_PATTERN = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+FRONTMATTER_PATTERN = re.compile(r'\A---[ \t]*\r?\n.*?\r?\n---[ \t]*(\r?\n|\Z)', re.DOTALL)
+FENCE_PATTERN = re.compile(r'^(```|~~~).*?^\1', re.MULTILINE | re.DOTALL)
+
+
+class NoteEmbedder:
+    """
+    Expand note embeds with memoization, cycle detection and a depth limit
+
+    Each note is parsed once per run (body offset and heading sections) and
+    the parse is persisted keyed by mtime and size, so unchanged notes are
+    not re-parsed on later runs. Fully expanded embeds are memoized and reused
+    while none of the notes they include changed on disk, so a snippet shared
+    by many posts is expanded only once.
+    """
+
+    def __init__(self, notes_dirs: List[str], cache_path: Optional[str] = None,
+                 max_depth: int = 4, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize embedder
+
+        Args:
+            notes_dirs (list): Folders searched for embedded notes
+            cache_path (str, optional): JSON file persisting parsed notes
+            max_depth (int): Maximum nesting of embeds
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.notes_dirs = notes_dirs
+        self.cache_path = cache_path
+        self.max_depth = max_depth
+        self.reporter = reporter or StatusReporter()
+        self._index: Optional[Dict[str, str]] = None
+        self._parsed: Dict[str, Dict] = {}
+        self._expanded: Dict[Tuple[str, str], Tuple[str, frozenset, Dict]] = {}  # key -> (text, notes it includes, their signatures)
+        self._included: List[set] = []  # notes included by each expansion in progress
+        self.dependencies: Dict[str, List[str]] = {}  # expanded source path -> notes it embeds
+        self._dirty = False
+        self._incomplete = 0
+        self._lock = threading.RLock()  # expansion state is shared, one expansion at a time
+        self.parse_count = 0
+        if cache_path:
+            self._load()
+
+    def expand(self, content: str, source_path: Optional[str] = None) -> str:
+        """
+        Expand all note embeds in markdown content
+
+        Image embeds are left untouched for the image processor. With a
+        source path, the notes the content embeds (at any depth) are recorded
+        in `dependencies`.
+
+        Args:
+            content (str): Markdown content
+            source_path (str, optional): Path of the note being converted
+
+        Returns:
+            str: Content with note embeds inlined
+        """
+        stack = [(os.path.abspath(source_path), '')] if source_path else []
+        with self._lock:
+            included = set()
+            self._included.append(included)
+            try:
+                expanded = self._expand(content, stack)
+            finally:
+                self._included.pop()
+            if source_path:
+                self.dependencies[stack[0][0]] = sorted({path for path, _ in included})
+            return expanded
+
+    def resolve(self, name: str) -> Optional[str]:
+        """
+        Find the note file for an embed target
+
+        Args:
+            name (str): Note name, optionally with folder and .md extension
+
+        Returns:
+            str or None: Path of the note
+        """
+        if self._index is None:
+            self._index = self._build_index()
+        key = name.strip().replace('\\', '/')
+        if key.lower().endswith('.md'):
+            key = key[:-3]
+        return self._index.get(key.lower()) or self._index.get(key.rsplit('/', 1)[-1].lower())
+
+    def clear(self):
+        """Forget the note index and expanded embeds (parsed notes stay keyed by mtime)"""
+        with self._lock:
+            self._index = None
+            self._expanded.clear()
+
+    def save(self):
+        """Persist parsed note metadata if it changed"""
+        if not self.cache_path or not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with self._lock:
+            data = {path: {k: v for k, v in note.items() if k != 'text'}
+                    for path, note in self._parsed.items()}
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+        self._dirty = False
+
+    def _expand(self, content: str, stack: List[Tuple[str, str]]) -> str:
+        # Embeds inside fenced code blocks are examples, not embeds
+        fences = [match.span() for match in FENCE_PATTERN.finditer(content)]
+
+        def replace(match):
+            if any(start <= match.start() < end for start, end in fences):
+                return match.group(0)
+            return self._replace_embed(match, stack)
+
+        return EMBED_PATTERN.sub(replace, content)
+
+    def _replace_embed(self, match, stack: List[Tuple[str, str]]) -> str:
+        target = match.group(1).split('|', 1)[0]
+        name, _, section = target.partition('#')
+        if os.path.splitext(name)[1].lower() not in ('', '.md'):
+            return match.group(0)  # image or other attachment
+
+        note_path = self.resolve(name) if name else (stack[-1][0] if stack else None)
+        if not note_path:
+            return match.group(0)  # not a note, let the image processor try
+
+        key = (note_path, section.strip().lower())
+        if key in stack:
+            self._incomplete += 1
+            self.reporter.warning(f"Embed cycle detected, not expanding: {match.group(0)}")
+            return match.group(0)
+        if len(stack) > self.max_depth:
+            self._incomplete += 1
+            self.reporter.warning(f"Embed depth limit ({self.max_depth}) reached, not expanding: {match.group(0)}")
+            return match.group(0)
+
+        memo = self._expanded.get(key)
+        if memo is not None and not memo[1].intersection(stack) and self._unchanged(memo[2]):
+            CACHE_REQUESTS.inc(cache='note_embeds', result='hit')
+            if self._included:
+                self._included[-1].update(memo[1])
+            return memo[0]
+
+        CACHE_REQUESTS.inc(cache='note_embeds', result='miss')
+        body = self._note_text(note_path, key[1])
+        if body is None:
+            self.reporter.warning(f"Section not found for embed: {match.group(0)}")
+            return match.group(0)
+
+        incomplete = self._incomplete
+        included = {key}
+        self._included.append(included)
+        try:
+            expanded = self._expand(body, stack + [key]).strip('\n')
+        finally:
+            self._included.pop()
+        if self._included:
+            self._included[-1].update(included)
+        if self._incomplete == incomplete:
+            # Only memoize results that do not depend on the current embed chain
+            signatures = {path: self._signature(self._parsed[path]) for path, _ in included if path in self._parsed}
+            self._expanded[key] = (expanded, frozenset(included), signatures)
+        self.reporter.log(f"Embedded note: {match.group(0)}")
+        return expanded
+
+    def _note_text(self, note_path: str, section: str) -> Optional[str]:
+        """Get body or section text of a note, None if the section is missing"""
+        note = self._parse(note_path)
+        text = note['text']
+        if not section:
+            return text[note['body']:]
+        span = note['sections'].get(section)
+        if span is None:
+            return None
+        return text[span[0]:span[1]]
+
+    def _parse(self, note_path: str) -> Dict:
+        """Parse a note into body offset and heading sections (memoized by mtime and size)"""
+        stat = os.stat(note_path)
+        note = self._parsed.get(note_path)
+        fresh = note is not None and self._signature(note) == (stat.st_mtime_ns, stat.st_size)
+        if fresh and 'text' in note:
+            CACHE_REQUESTS.inc(cache='note_parse', result='hit')
+            return note
+
+        with open(note_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+        if fresh and self._unchanged({note_path: self._signature(note)}):
+            note['text'] = text  # offsets from the persistent cache are still valid
+            CACHE_REQUESTS.inc(cache='note_parse', result='hit')
+            return note
+
+        self.parse_count += 1
+        CACHE_REQUESTS.inc(cache='note_parse', result='miss')
+        frontmatter = FRONTMATTER_PATTERN.match(text)
+        fences = [match.span() for match in FENCE_PATTERN.finditer(text)]
+        headings = [
+            (len(match.group(1)), match.group(2).strip().lower(), match.start())
+            for match in HEADING_PATTERN.finditer(text)
+            if not any(start <= match.start() < end for start, end in fences)
+        ]
+
+        sections = {}
+        for index, (level, title, start) in enumerate(headings):
+            end = len(text)
+            for next_level, _, next_start in headings[index + 1:]:
+                if next_level <= level:
+                    end = next_start
+                    break
+            sections.setdefault(title, [start, end])
+
+        note = {
+            'mtime': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'body': frontmatter.end() if frontmatter else 0,
+            'sections': sections,
+            'text': text
+        }
+        self._parsed[note_path] = note
+        self._dirty = True
+        return note
+
+    @staticmethod
+    def _signature(note: Dict) -> Tuple[int, int]:
+        return note['mtime'], note['size']
+
+    def _unchanged(self, signatures: Dict[str, Tuple[int, int]]) -> bool:
+        """Check that the notes a memoized expansion was built from are unchanged on disk"""
+        for path, signature in signatures.items():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return False
+            if (stat.st_mtime_ns, stat.st_size) != signature:
+                return False
+        return True
+
+    def _build_index(self) -> Dict[str, str]:
+        """Map lowercase note names (and relative paths) to files"""
+        index = {}
+        for notes_dir in self.notes_dirs:
+            for root, dirs, filenames in os.walk(notes_dir):
+                dirs[:] = [d for d in dirs if not d.startswith('.')]
+                for filename in filenames:
+                    if not filename.lower().endswith('.md'):
+                        continue
+                    path = os.path.abspath(os.path.join(root, filename))
+                    rel_path = os.path.relpath(path, notes_dir)[:-3].replace(os.sep, '/')
+                    index.setdefault(rel_path.lower(), path)
+                    index.setdefault(filename[:-3].lower(), path)
+        return index
+
+    def _load(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                self._parsed = json.load(f)
+        except (OSError, ValueError):
+            self._parsed = {}
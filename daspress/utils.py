@@ -4,6 +4,7 @@ Utility functions for daspress
 
 import os
 import re
+import shutil
 
 
 def sanitize_filename(name):
@@ -76,4 +77,76 @@ def validate_directory_exists(directory_path):
     if not os.path.isdir(directory_path):
         return False, f"Path is not a directory: {directory_path}"
     
-    return True, ""
\ No newline at end of file
+    return True, ""
+
+def files_identical(path_a, path_b):
+    """
+    Check whether two files have identical content
+    
+    Sizes are compared first so differing files are usually rejected
+    without reading them.
+    
+    Args:
+        path_a (str): First file
+        path_b (str): Second file
+        
+    Returns:
+        bool: True if both files exist and have the same bytes
+    """
+    try:
+        if os.path.getsize(path_a) != os.path.getsize(path_b):
+            return False
+        with open(path_a, 'rb') as fa, open(path_b, 'rb') as fb:
+            while True:
+                block_a = fa.read(1024 * 1024)
+                if block_a != fb.read(1024 * 1024):
+                    return False
+                if not block_a:
+                    return True
+    except OSError:
+        return False
+
+
+def copy_file_if_changed(src_path, dest_path):
+    """
+    Copy a file unless the destination already has identical content
+    
+    Unchanged destinations keep their mtime, so watchers and git do not
+    see a change.
+    
+    Args:
+        src_path (str): Source file
+        dest_path (str): Destination file
+        
+    Returns:
+        bool: True if the file was written, False if it was left untouched
+    """
+    if files_identical(src_path, dest_path):
+        return False
+    shutil.copy2(src_path, dest_path)
+    return True
+
+
+def write_text_if_changed(file_path, text):
+    """
+    Write text (UTF-8, platform newlines) unless the file already contains it
+    
+    Args:
+        file_path (str): Destination file
+        text (str): Content to write
+        
+    Returns:
+        bool: True if the file was written, False if it was left untouched
+    """
+    data = text.replace('\n', os.linesep).encode('utf-8')
+    try:
+        if os.path.getsize(file_path) == len(data):
+            with open(file_path, 'rb') as f:
+                if f.read() == data:
+                    return False
+    except OSError:
+        pass
+    
+    with open(file_path, 'wb') as f:
+        f.write(data)
+    return True
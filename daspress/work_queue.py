@@ -0,0 +1,299 @@
+"""
+Shared-filesystem work queue for daspress
+Lets several hosts that mount the same storage convert one batch together
+"""
+
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import zlib
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .status_reporter import StatusReporter
+
+
+class WorkQueue:
+    """
+    Work queue of posts claimed through lease files
+
+    Queue layout::
+
+        <queue>/items/<key>.json       one work item per post
+        <queue>/leases/<key>.lease     held by the worker converting the post
+        <queue>/done/<key>             completion marker
+        <queue>/results/<worker>.jsonl results written by each worker
+
+    A lease is created with O_EXCL, so exactly one worker wins each item. The
+    holder renews the lease mtime (heartbeat) while it works; a lease not
+    renewed for `lease_seconds` belongs to a crashed worker and is reclaimed by
+    the next worker that looks at the item. Lease expiry compares file mtimes
+    with the local clock, so host clocks must agree to well within
+    `lease_seconds`.
+    """
+
+    def __init__(self, queue_dir: str, worker_id: Optional[str] = None, lease_seconds: float = 60.0,
+                 reporter: Optional[StatusReporter] = None):
+        """
+        Initialize queue
+
+        Args:
+            queue_dir (str): Queue folder on the shared filesystem
+            worker_id (str, optional): Unique worker name (default: <hostname>-<pid>)
+            lease_seconds (float): Time without heartbeat after which a lease expires
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.queue_dir = queue_dir
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.reporter = reporter or StatusReporter()
+        self.reclaimed = 0  # expired leases taken over by this worker
+        for folder in ('items', 'leases', 'done', 'results'):
+            os.makedirs(os.path.join(queue_dir, folder), exist_ok=True)
+
+    def enqueue(self, posts: Iterable[str]) -> int:
+        """
+        Add posts to the queue (posts already queued are left alone)
+
+        Args:
+            posts (iterable): Blog post file names or absolute paths
+
+        Returns:
+            int: Number of posts added
+        """
+        added = 0
+        for post in posts:
+            try:
+                fd = os.open(self._path('items', post, '.json'), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'post': post}, f)
+            added += 1
+        return added
+
+    def pending(self) -> List[str]:
+        """Get queued posts that are not done yet"""
+        posts = []
+        for name in sorted(os.listdir(os.path.join(self.queue_dir, 'items'))):
+            key = name[:-5]
+            if not os.path.exists(os.path.join(self.queue_dir, 'done', key)):
+                item = self._read_item(name)
+                if item is not None:
+                    posts.append(item['post'])
+        return posts
+
+    def claim(self) -> Optional[str]:
+        """
+        Lease the next unclaimed (or abandoned) post
+
+        Workers start scanning at different offsets to avoid contending for
+        the same items.
+
+        Returns:
+            str or None: Claimed post, None when nothing is left to claim
+        """
+        posts = self.pending()
+        if not posts:
+            return None
+        start = zlib.crc32(self.worker_id.encode('utf-8')) % len(posts)
+        for post in posts[start:] + posts[:start]:
+            if self._acquire(post):
+                if os.path.exists(self._path('done', post)):
+                    self.release(post)  # finished by another worker after we listed it
+                    continue
+                return post
+        return None
+
+    def heartbeat(self, post: str) -> bool:
+        """
+        Renew the lease of a claimed post
+
+        Args:
+            post (str): Claimed post
+
+        Returns:
+            bool: False if the lease was lost (expired and reclaimed)
+        """
+        lease_path = self._path('leases', post, '.lease')
+        if self._lease_owner(lease_path) != self.worker_id:
+            return False
+        try:
+            os.utime(lease_path)
+            return True
+        except OSError:
+            return False
+
+    def release(self, post: str):
+        """Give up the lease of a post without completing it"""
+        lease_path = self._path('leases', post, '.lease')
+        if self._lease_owner(lease_path) == self.worker_id:
+            try:
+                os.remove(lease_path)
+            except OSError:
+                pass
+
+    def complete(self, post: str, result: Dict[str, Any]):
+        """
+        Record the result of a claimed post and release its lease
+
+        Args:
+            post (str): Claimed post
+            result (dict): JSON-serializable result of the work
+        """
+        entry = {**result, 'post': post, 'worker': self.worker_id, 'finished': time.time()}
+        results_path = os.path.join(self.queue_dir, 'results', f"{self._safe(self.worker_id)}.jsonl")
+        with open(results_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        open(self._path('done', post), 'w').close()
+        self.release(post)
+
+    def work(self, handler: Callable[[str], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Claim and process posts until the queue is drained
+
+        The lease is renewed in the background while the handler runs. While
+        posts are still leased by other workers this worker keeps polling, so
+        it can take over their work if they crash.
+
+        Args:
+            handler (callable): Processes a post and returns its result dict
+
+        Returns:
+            list: Results completed by this worker
+        """
+        results = []
+        while True:
+            post = self.claim()
+            if post is None:
+                if not self.pending():
+                    return results
+                time.sleep(min(1.0, self.lease_seconds / 4))
+                continue
+            stop = threading.Event()
+            beat = threading.Thread(target=self._keep_alive, args=(post, stop), daemon=True)
+            beat.start()
+            try:
+                result = handler(post)
+            except BaseException:
+                self.release(post)
+                raise
+            finally:
+                stop.set()
+                beat.join()
+            if self.heartbeat(post):
+                self.complete(post, result)
+                results.append(result)
+            else:
+                self.reporter.warning(f"Lease on {post} was lost, leaving it to the worker that reclaimed it")
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Merge the results of all workers into one report
+
+        A post completed more than once (after a lease was reclaimed) counts
+        with its latest result.
+
+        Returns:
+            dict: total, succeeded, failed, pending, per-worker counts and results
+        """
+        latest: Dict[str, Dict[str, Any]] = {}
+        results_dir = os.path.join(self.queue_dir, 'results')
+        for name in sorted(os.listdir(results_dir)):
+            with open(os.path.join(results_dir, name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crashed worker
+                    previous = latest.get(entry['post'])
+                    if previous is None or entry['finished'] >= previous['finished']:
+                        latest[entry['post']] = entry
+
+        workers: Dict[str, int] = {}
+        for entry in latest.values():
+            workers[entry['worker']] = workers.get(entry['worker'], 0) + 1
+        results = sorted(latest.values(), key=lambda entry: entry['post'])
+        succeeded = sum(1 for entry in results if entry.get('success'))
+        return {
+            'total': len(os.listdir(os.path.join(self.queue_dir, 'items'))),
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'pending': len(self.pending()),
+            'workers': workers,
+            'results': results
+        }
+
+    def _acquire(self, post: str) -> bool:
+        """Create the lease, taking over an expired one"""
+        lease_path = self._path('leases', post, '.lease')
+        if self._create_lease(lease_path):
+            return True
+        try:
+            age = time.time() - os.stat(lease_path).st_mtime
+        except FileNotFoundError:
+            return self._create_lease(lease_path)
+        if age < self.lease_seconds:
+            return False
+
+        # Move the expired lease aside; only one worker's rename succeeds
+        stale_path = f"{lease_path}.{self._safe(self.worker_id)}.stale"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return False
+        try:
+            if time.time() - os.stat(stale_path).st_mtime < self.lease_seconds:
+                # Renewed or re-created after our stat: put it back untouched
+                try:
+                    os.link(stale_path, lease_path)
+                except FileExistsError:
+                    pass
+                return False
+        finally:
+            os.remove(stale_path)
+
+        self.reclaimed += 1
+        self.reporter.log(f"Reclaimed expired lease on {post}")
+        return self._create_lease(lease_path)
+
+    def _create_lease(self, lease_path: str) -> bool:
+        try:
+            fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'worker': self.worker_id, 'claimed': time.time()}, f)
+        return True
+
+    def _keep_alive(self, post: str, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.heartbeat(post):
+                return
+
+    @staticmethod
+    def _lease_owner(lease_path: str) -> Optional[str]:
+        try:
+            with open(lease_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('worker')
+        except (OSError, ValueError):
+            return None
+
+    def _read_item(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.queue_dir, 'items', name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None  # still being written by enqueue
+
+    def _path(self, folder: str, post: str, suffix: str = '') -> str:
+        key = hashlib.sha1(post.encode('utf-8')).hexdigest()
+        return os.path.join(self.queue_dir, folder, key + suffix)
+
+    @staticmethod
+    def _safe(name: str) -> str:
+        return ''.join(char if char.isalnum() or char in '-_.' else '_' for char in name)
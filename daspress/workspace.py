@@ -0,0 +1,150 @@
+"""
+Sparse publishing workspace for daspress
+Keeps a partial, sparse clone of the site repository that contains only the
+paths daspress writes, so publishing never needs a full checkout
+"""
+
+import os
+import subprocess
+from typing import List, Optional
+
+from .config import DaspressConfig
+from .status_reporter import StatusReporter
+from .metrics import GIT_PUSH_SECONDS, GIT_PUSH_FAILURES
+
+
+class PublishWorkspace:
+    """
+    Blob-less, sparse clone of a Jekyll site repository at `jekyll.root_folder`
+
+    Configured with `jekyll.workspace.remote`. The clone is made with
+    `--filter=blob:none --sparse`, so it fetches commits and trees but only
+    the file contents of `_posts`, the images folder, the other paths daspress
+    writes and `workspace.paths`, plus the files at the repository root.
+    Updating it is a `git pull --rebase` that downloads blobs for those paths
+    only.
+    """
+
+    def __init__(self, config: DaspressConfig, reporter: Optional[StatusReporter] = None):
+        """
+        Initialize workspace
+
+        Args:
+            config (DaspressConfig): Loaded configuration of one target
+            reporter (StatusReporter, optional): Status reporter instance
+        """
+        self.config = config
+        self.reporter = reporter or StatusReporter()
+        self.settings = config.get_workspace_settings()
+        self.path = config.get_jekyll_root_folder()
+
+    @property
+    def enabled(self) -> bool:
+        """Check whether this target publishes from a managed workspace"""
+        return bool(self.settings['remote'])
+
+    def sparse_paths(self) -> List[str]:
+        """
+        Get the folders checked out in the workspace
+
+        Returns:
+            list: Folders relative to the repository root
+        """
+        root = self.path
+        folders = [self.config.get_jekyll_posts_folder(), self.config.get_jekyll_images_folder()]
+        search = self.config.get_search_settings()
+        if search['enabled']:
+            folders.append(os.path.join(root, search['folder']))
+        highlight = self.config.get_highlight_settings()
+        if highlight['enabled'] and highlight['css']:
+            folders.append(os.path.dirname(os.path.join(root, highlight['css'])))
+
+        paths = [os.path.relpath(folder, root).replace(os.sep, '/') for folder in folders]
+        paths += [path.strip('/') for path in self.settings['paths']]
+        return sorted({path for path in paths if path and path != '.' and not path.startswith('..')})
+
+    def prepare(self) -> bool:
+        """
+        Clone the workspace, or bring an existing one up to date
+
+        Returns:
+            bool: True if the workspace is ready for conversion
+        """
+        try:
+            if not os.path.isdir(os.path.join(self.path, '.git')):
+                self._clone()
+            else:
+                self._git('fetch', '--quiet', 'origin')
+                self._git('pull', '--quiet', '--rebase', '--autostash')
+            self._set_sparse_paths()
+            for folder in (self.config.get_jekyll_posts_folder(), self.config.get_jekyll_images_folder()):
+                os.makedirs(folder, exist_ok=True)
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.reporter.error(f"Failed to prepare publishing workspace {self.path}: {e}")
+            stderr = getattr(e, 'stderr', None)
+            if stderr:
+                self.reporter.log(stderr.strip())
+            return False
+
+    def publish(self, message: str = "Published blog post") -> bool:
+        """
+        Commit the changed paths and push, rebasing once if the remote moved
+
+        Args:
+            message (str): Commit message
+
+        Returns:
+            bool: True if published (or nothing to publish)
+        """
+        try:
+            paths = [path for path in self.sparse_paths() if os.path.exists(os.path.join(self.path, path))]
+            if paths:
+                self._git('add', '--sparse', '--', *paths)
+            if self._git('diff', '--cached', '--quiet', check=False).returncode == 0:
+                self.reporter.user_info("Repository already up to date - no changes to publish")
+                return True
+            self._git('commit', '--quiet', '-m', message)
+            self.reporter.user_info("Changes committed to publishing workspace")
+
+            with GIT_PUSH_SECONDS.time():
+                push = self._git('push', '--quiet', 'origin', 'HEAD', check=False)
+                if push.returncode != 0:
+                    GIT_PUSH_FAILURES.inc()
+                    self.reporter.log(f"Push rejected, rebasing on the remote: {push.stderr.strip()}")
+                    self._git('pull', '--quiet', '--rebase')
+                    push = self._git('push', '--quiet', 'origin', 'HEAD', check=False)
+                    if push.returncode != 0:
+                        GIT_PUSH_FAILURES.inc()
+                        raise subprocess.CalledProcessError(push.returncode, push.args, push.stdout, push.stderr)
+            self.reporter.user_info("Blog post published to GitHub")
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            self.reporter.error(f"Git publishing failed: {e}")
+            stderr = getattr(e, 'stderr', None)
+            if stderr:
+                self.reporter.log(stderr.strip())
+            return False
+
+    def _clone(self):
+        self.reporter.user_info(f"Creating sparse publishing workspace: {self.path}")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        args = ['clone', '--quiet', '--filter=blob:none', '--sparse']
+        if self.settings['branch']:
+            args += ['--branch', self.settings['branch']]
+        self._run(['git', *args, self.settings['remote'], self.path])
+
+    def _set_sparse_paths(self):
+        """Apply the sparse-checkout folders if they changed"""
+        paths = self.sparse_paths()
+        current = self._git('sparse-checkout', 'list', check=False).stdout.split()
+        if sorted(current) != paths:
+            self.reporter.log(f"Workspace sparse paths: {', '.join(paths)}")
+            self._git('sparse-checkout', 'set', '--cone', *paths)
+
+    def _git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        return self._run(['git', '-C', self.path, *args], check=check)
+
+    def _run(self, args: List[str], check: bool = True) -> subprocess.CompletedProcess:
+        self.reporter.log(f"Running: {' '.join(args)}")
+        return subprocess.run(args, capture_output=True, text=True, check=check, stdin=subprocess.DEVNULL)
@@ -24,6 +24,13 @@ setup(
     install_requires=[
         "PyYAML>=6.0",
     ],
+    extras_require={
+        "brotli": ["brotli>=1.0"],
+        "highlight": ["Pygments>=2.0"],
+        "images": ["Pillow>=9.0"],
+        "preview": ["markdown>=3.0"],
+        "s3": ["boto3>=1.20"],
+    },
     entry_points={
         "console_scripts": [
             "daspress=daspress.cli:main",
@@ -51,4 +51,1347 @@ class TestDaspress:
             assert "![[" not in content   # No Obsidian format left
         
         # Cleanup test config
-        os.remove(test_config_path)
\ No newline at end of file
+        os.remove(test_config_path)
+
+def _make_site(tmp_path, extra=None):
+    """Create a minimal Obsidian vault + Jekyll root and return a loaded config"""
+    obsidian_dir = tmp_path / "obsidian"
+    (obsidian_dir / "attachments").mkdir(parents=True)
+    jekyll_root = tmp_path / "jekyll"
+    (jekyll_root / "_posts").mkdir(parents=True)
+
+    config_data = {
+        'obsidian': {
+            'posts_folder': str(obsidian_dir),
+            'images_folder': str(obsidian_dir / "attachments")
+        },
+        'jekyll': {
+            'root_folder': str(jekyll_root)
+        },
+        'daspress': {
+            'state_folder': str(tmp_path / "state")
+        }
+    }
+    for section, values in (extra or {}).items():
+        if isinstance(values, dict):
+            config_data.setdefault(section, {}).update(values)
+        else:
+            config_data[section] = values
+
+    config_path = tmp_path / "config.yaml"
+    with open(config_path, 'w') as f:
+        yaml.dump(config_data, f, default_flow_style=False, indent=2)
+
+    config = DaspressConfig(config_path=str(config_path))
+    assert config.load_config()
+    return config
+
+
+FAKE_JEKYLL = '''
+import socket, sys, time
+port = int(sys.argv[sys.argv.index("--port") + 1])
+sock = socket.socket()
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+sock.bind(("localhost", port))
+sock.listen(5)
+print("    Server address: http://localhost:%d/" % port, flush=True)
+print("  Server running... press ctrl-c to stop.", flush=True)
+while True:
+    time.sleep(1)
+'''
+
+
+def _free_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+class TestJekyllServer:
+    def test_reuses_and_restarts_server(self, tmp_path):
+        import sys
+        from daspress.jekyll_server import JekyllServerManager
+
+        script = tmp_path / "fake_jekyll.py"
+        script.write_text(FAKE_JEKYLL)
+        config = _make_site(tmp_path, {'jekyll': {
+            'port': _free_port(),
+            'serve_command': f'"{sys.executable}" "{script}"'
+        }})
+        manager = JekyllServerManager(config, config.reporter)
+
+        try:
+            assert manager.ensure_running(wait=True, timeout=20)
+            first_pid = manager.load_state()['pid']
+
+            # Warm server is reused
+            assert manager.ensure_running(wait=True, timeout=20)
+            assert manager.load_state()['pid'] == first_pid
+
+            # Crashed server is restarted
+            manager._terminate(first_pid)
+            assert manager.ensure_running(wait=True, timeout=20)
+            assert manager.load_state()['pid'] != first_pid
+            assert manager.status()['ready']
+        finally:
+            manager.stop()
+
+        assert manager.load_state() is None
+
+    def test_stop_waits_for_server_of_earlier_run(self, tmp_path):
+        import sys
+        from daspress.jekyll_server import JekyllServerManager
+
+        script = tmp_path / "fake_jekyll.py"
+        script.write_text(FAKE_JEKYLL)
+        config = _make_site(tmp_path, {'jekyll': {
+            'port': _free_port(),
+            'serve_command': f'"{sys.executable}" "{script}"'
+        }})
+        earlier = JekyllServerManager(config, config.reporter)
+        assert earlier.ensure_running(wait=True, timeout=20)
+        pid = earlier.load_state()['pid']
+
+        # A later CLI run has no process handle: stop must still wait until the port is free
+        manager = JekyllServerManager(config, config.reporter)
+        try:
+            assert manager.stop()
+            assert not manager._is_port_open()
+            assert manager.ensure_running(wait=True, timeout=20)
+            assert manager.load_state()['pid'] != pid
+        finally:
+            manager.stop()
+
+    def test_stale_state_with_reused_pid_is_not_trusted(self, tmp_path):
+        from daspress.jekyll_server import JekyllServerManager
+
+        config = _make_site(tmp_path, {'jekyll': {'port': _free_port()}})
+        manager = JekyllServerManager(config, config.reporter)
+        log = tmp_path / "old.log"
+        log.write_text("  Server running... press ctrl-c to stop.\n")
+        # State left behind by a server before a reboot; the PID now belongs to this test process
+        manager.save_state({'pid': os.getpid(), 'pid_started': 'before-reboot', 'port': manager.port,
+                            'root': config.get_jekyll_root_folder(), 'log': str(log),
+                            'posts': None, 'started_at': 0, 'last_used': 0})
+
+        assert manager.status()['running'] is False
+        assert manager.is_ready() is False
+        assert manager.stop()  # must not signal this process
+        assert manager.load_state() is None
+
+
+class TestHashedAssets:
+    def test_identical_images_share_one_immutable_asset(self, tmp_path):
+        config = _make_site(tmp_path, {'images': {'naming': 'hash'}})
+        attachments = tmp_path / "obsidian" / "attachments"
+        (attachments / "Pasted image 1.png").write_bytes(b"same-bytes")
+        (attachments / "Pasted image 2.png").write_bytes(b"same-bytes")
+        (tmp_path / "obsidian" / "Post.md").write_text("![[Pasted image 1.png]]\n![[Pasted image 2.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.convert("Post.md")
+
+        images = os.listdir(config.get_jekyll_images_folder())
+        assert len(images) == 1
+        assert images[0].endswith("-pasted-image-1.png")
+
+        content = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert content.count(f"/assets/images/{images[0]}") == 2
+
+        headers = (tmp_path / "jekyll" / "_headers").read_text()
+        assert f"/assets/images/{images[0]}" in headers
+        assert "immutable" in headers
+
+    def test_failed_copy_is_not_remembered_as_published(self, tmp_path):
+        from daspress import MarkdownProcessor, MemoryFileSystem, StatusReporter
+
+        class FlakySink(MemoryFileSystem):
+            fail = True
+
+            def write_if_changed(self, path, data):
+                if self.fail:
+                    raise OSError("disk full")
+                return super().write_if_changed(path, data)
+
+        sink = FlakySink()
+        processor = MarkdownProcessor(StatusReporter(verbose=False))
+        processor.set_asset_naming('hash')
+        processor.set_filesystems(MemoryFileSystem({"att/a.png": b"png"}), sink)
+
+        assert processor.process_content("![[a.png]]", "att", "img") == "![[a.png]]"
+        assert processor.get_hashed_assets("img") == {}
+
+        sink.fail = False
+        content = processor.process_content("![[a.png]]", "att", "img")
+        (name,) = processor.get_hashed_assets("img").values()
+        assert content == f"![a.png](/assets/images/{name})" and sink.read_bytes(f"img/{name}") == b"png"
+
+
+class TestAssetLayout:
+    def test_sharded_layout_and_migration(self, tmp_path):
+        from daspress.asset_migration import AssetMigrator
+        from daspress.assets import file_digest
+
+        config = _make_site(tmp_path)
+
+        def set_layout(layout):
+            with open(config.get_config_path()) as f:
+                data = yaml.safe_load(f)
+            data['images'] = {'layout': layout}
+            with open(config.get_config_path(), 'w') as f:
+                yaml.dump(data, f)
+            assert config.load_config()
+
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"image-a")
+        (notes / "attachments" / "b.png").write_bytes(b"image-b")
+        (notes / "2024-05-01-Old.md").write_text("![[a.png]]\n")
+        assert DaspressConverter(config=config, reporter=config.reporter).convert("2024-05-01-Old.md")
+        images_dir = tmp_path / "jekyll" / "assets" / "images"
+        assert (images_dir / "a.png").exists()
+
+        # Switch to the date layout: new posts shard immediately, old ones after migration
+        set_layout('date')
+        (notes / "2024-06-02-New.md").write_text("![[b.png]]\n")
+        assert DaspressConverter(config=config, reporter=config.reporter).convert("2024-06-02-New.md")
+        assert "/assets/images/2024/06/b.png" in (tmp_path / "jekyll" / "_posts" / "2024-06-02-New.md").read_text()
+
+        summary = AssetMigrator(config, config.reporter).migrate()
+        assert summary == {'moved': 1, 'posts_updated': 1, 'skipped': 0}
+        assert (images_dir / "2024" / "05" / "a.png").exists() and not (images_dir / "a.png").exists()
+        assert "/assets/images/2024/05/a.png" in (tmp_path / "jekyll" / "_posts" / "2024-05-01-Old.md").read_text()
+
+        # Hash layout: two levels of content hash prefix, empty date folders are removed
+        set_layout('hash')
+        assert AssetMigrator(config, config.reporter).migrate()['moved'] == 2
+        digest = file_digest(str(notes / "attachments" / "a.png"))
+        assert (images_dir / digest[:2] / digest[2:4] / "a.png").exists()
+        assert not (images_dir / "2024").exists()
+
+
+class TestMultiSite:
+    def test_post_is_written_to_every_target(self, tmp_path):
+        mirror_root = tmp_path / "mirror"
+        (mirror_root / "_posts").mkdir(parents=True)
+        config = _make_site(tmp_path, {'targets': [
+            {'name': 'mirror', 'root_folder': str(mirror_root), 'images': {'naming': 'hash'}}
+        ]})
+        (tmp_path / "obsidian" / "attachments" / "shot.png").write_bytes(b"png")
+        (tmp_path / "obsidian" / "Post.md").write_text("![[shot.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.convert("Post.md")
+
+        main_post = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        mirror_post = (mirror_root / "_posts" / "Post.md").read_text()
+        assert "(/assets/images/shot.png)" in main_post
+        assert "-shot.png)" in mirror_post and "(/assets/images/shot.png)" not in mirror_post
+
+        targets = converter.get_status()["targets"]
+        assert set(targets) == {"main", "mirror"}
+        assert all(result["success"] for result in targets.values())
+
+    def test_targets_render_with_their_own_image_settings(self, tmp_path, monkeypatch):
+        from concurrent.futures import ThreadPoolExecutor
+        from daspress import responsive
+
+        def fake_resize(source_path, dest_path, width):
+            with open(dest_path, "wb") as f:
+                f.write(b"variant")
+            return dest_path
+
+        monkeypatch.setattr(responsive, "HAS_PILLOW", True)
+        monkeypatch.setattr(responsive, "_resize_image", fake_resize)
+        mirror_root = tmp_path / "mirror"
+        (mirror_root / "_posts").mkdir(parents=True)
+        config = _make_site(tmp_path, {'targets': [
+            {'name': 'mirror', 'root_folder': str(mirror_root), 'images': {'responsive': {'widths': [480]}}}
+        ]})
+        png = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + (1200).to_bytes(4, 'big') + (600).to_bytes(4, 'big') + b'rest'
+        (tmp_path / "obsidian" / "attachments" / "wide.png").write_bytes(png)
+        (tmp_path / "obsidian" / "Post.md").write_text("![[wide.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        converter.config.load_config()
+        converter._configure_processor()
+        mirror = converter.target_processors["mirror"]
+        mirror.responsive._pool = ThreadPoolExecutor(max_workers=1)
+        assert converter.convert("Post.md")
+
+        # Helpers are never shared between targets rendering in parallel
+        main = converter.markdown_processor
+        assert main.responsive is None and main.image_sizes is None
+        assert mirror.image_sizes.cache_path.endswith("image-sizes-mirror.json")
+        assert converter.target_processors["mirror"] is mirror
+
+        assert "![wide.png](/assets/images/wide.png)" in (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        mirror_post = (mirror_root / "_posts" / "Post.md").read_text()
+        assert 'srcset="/assets/images/responsive/' in mirror_post and "480w" in mirror_post
+        assert (tmp_path / "state" / "image-sizes-mirror.json").exists()
+        assert converter.attachment_index.posts[str(tmp_path / "obsidian" / "Post.md")]
+
+
+class TestConversionSession:
+    def test_convert_many_yields_results(self, tmp_path):
+        from daspress import ConversionSession
+
+        config = _make_site(tmp_path)
+        (tmp_path / "obsidian" / "attachments" / "a.png").write_bytes(b"a")
+        (tmp_path / "obsidian" / "First.md").write_text("![[a.png]]\n")
+        (tmp_path / "obsidian" / "Second.md").write_text("![[a]]\n")
+
+        with ConversionSession(config, config.reporter) as session:
+            results = session.convert_many(["First.md", "Second.md", "Missing.md"])
+            first = next(results)
+            assert first.success and first.images_copied == 1
+            rest = list(results)
+
+        assert rest[0].success and rest[0].output_path.endswith("Second.md")
+        assert not rest[1].success and rest[1].errors
+
+    def test_caches_are_saved_once_and_lookups_shared_by_targets(self, tmp_path):
+        from daspress import ConversionSession
+
+        mirror_root = tmp_path / "mirror"
+        (mirror_root / "_posts").mkdir(parents=True)
+        config = _make_site(tmp_path, {'targets': [{'name': 'mirror', 'root_folder': str(mirror_root)}]})
+        for name in ("First.md", "Second.md", "Third.md"):
+            (tmp_path / "obsidian" / name).write_text("text\n")
+
+        session = ConversionSession(config, config.reporter)
+        assert session.open()
+        saves = []
+        session.converter._save_caches = lambda: saves.append(True)
+        assert all(processor.path_exists == session._cached_exists
+                   for processor in session.converter._processors())
+
+        assert all(result.success for result in session.convert_many(["First.md", "Second.md", "Third.md"]))
+        assert saves == []
+        session.close()
+        assert saves == [True]
+        processors = session.converter._processors()
+        assert all(processor.path_exists == processor.source_fs.exists for processor in processors)
+
+
+class TestSiteOptimizer:
+    def test_minify_and_precompress_incrementally(self, tmp_path):
+        import gzip
+        from daspress.optimizer import SiteOptimizer
+
+        config = _make_site(tmp_path, {'optimize': {'brotli': False, 'workers': 2}})
+        site = tmp_path / "jekyll" / "_site"
+        site.mkdir()
+        page = "<html>\n  <!-- note -->\n  <body>\n" + "    <p>hello   world</p>\n" * 40 + "  </body>\n</html>\n"
+        (site / "index.html").write_text(page)
+        (site / "style.css").write_text("/* c */\nbody {\n  color : red ;\n}\n")
+
+        optimizer = SiteOptimizer(config, config.reporter)
+        first = optimizer.optimize()
+        assert first['optimized'] == 2
+
+        html = (site / "index.html").read_bytes()
+        assert b"<!-- note -->" not in html and b"hello world" in html
+        assert gzip.decompress((site / "index.html.gz").read_bytes()) == html
+        assert (site / "style.css").read_text() == "body{color:red}"
+
+        second = optimizer.optimize()
+        assert second['optimized'] == 0 and second['skipped'] == 2
+
+        # Jekyll rebuilding the same page restores the minified output without recompressing
+        (site / "index.html").write_text(page)
+        third = optimizer.optimize()
+        assert third['optimized'] == 0
+        assert (site / "index.html").read_bytes() == html
+
+    def test_css_minifier_keeps_selectors_and_strings(self):
+        from daspress.optimizer import minify_css
+
+        assert minify_css('div :hover { content: "a , b"; }\na > b { color : red; }') == \
+            'div :hover{content:"a , b"}a>b{color:red}'
+        assert minify_css("p::after { content: '/* not a comment */ ; }' }") == \
+            "p::after{content:'/* not a comment */ ; }'}"
+        assert minify_css("@media (min-width: 600px) { nav a :focus { outline : 0 } }") == \
+            "@media (min-width: 600px){nav a :focus{outline:0}}"
+
+
+class TestImageDimensions:
+    def test_header_parsing(self, tmp_path):
+        import struct
+        from daspress.image_info import get_image_size
+
+        samples = {
+            "a.png": b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 640, 480) + b"\x08\x06\x00\x00\x00",
+            "a.gif": b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8,
+            "a.webp": b"RIFF" + b"\x00" * 4 + b"WEBPVP8X" + b"\x00" * 8 + (99).to_bytes(3, "little") + (49).to_bytes(3, "little"),
+            "a.jpg": b"\xff\xd8\xff\xe0" + struct.pack(">H", 4) + b"\x00\x00" + b"\xff\xc0" + struct.pack(">HBHH", 11, 8, 200, 300) + b"\x00" * 6,
+            "a.svg": b'<?xml version="1.0"?>\n<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 12"></svg>',
+        }
+        expected = {"a.png": (640, 480), "a.gif": (32, 16), "a.webp": (100, 50), "a.jpg": (300, 200), "a.svg": (24, 12)}
+        for name, data in samples.items():
+            (tmp_path / name).write_bytes(data)
+            assert get_image_size(str(tmp_path / name)) == expected[name], name
+
+    def test_html_output_mode(self, tmp_path):
+        import struct
+        config = _make_site(tmp_path, {'images': {'output': 'html'}})
+        png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 800, 600) + b"\x08\x06\x00\x00\x00"
+        (tmp_path / "obsidian" / "attachments" / "shot.png").write_bytes(png)
+        (tmp_path / "obsidian" / "Post.md").write_text("![[shot.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.convert("Post.md")
+
+        content = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert '<img src="/assets/images/shot.png" alt="shot.png" width="800" height="600" loading="lazy" decoding="async">' in content
+        assert (tmp_path / "state" / "image-sizes.json").exists()
+
+
+class TestResponsiveImages:
+    def test_existing_variants_are_reused_in_srcset(self, tmp_path):
+        import struct
+        from daspress.assets import file_digest
+
+        config = _make_site(tmp_path, {'images': {'responsive': {'widths': [480, 960, 4000]}}})
+        png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 1200, 600) + b"\x08\x06\x00\x00\x00"
+        source = tmp_path / "obsidian" / "attachments" / "wide.png"
+        source.write_bytes(png)
+        (tmp_path / "obsidian" / "Post.md").write_text("![[wide.png]]\n")
+
+        digest = file_digest(str(source))[:16]
+        variants = tmp_path / "jekyll" / "assets" / "images" / "responsive"
+        variants.mkdir(parents=True)
+        for width in (480, 960):
+            (variants / f"{digest}-{width}w.png").write_bytes(b"variant")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.convert("Post.md")
+        assert converter.markdown_processor.responsive._pool is None  # nothing regenerated
+
+        content = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert (f'srcset="/assets/images/responsive/{digest}-480w.png 480w, '
+                f'/assets/images/responsive/{digest}-960w.png 960w, /assets/images/wide.png 1200w"') in content
+        assert 'width="1200" height="600"' in content
+
+    def test_failed_variants_are_left_out_of_srcset(self, tmp_path, monkeypatch):
+        import struct
+        from concurrent.futures import ThreadPoolExecutor
+        from daspress import responsive
+
+        def fake_resize(source_path, dest_path, width):
+            if width == 960:
+                raise OSError("cannot resize")
+            with open(dest_path, "wb") as f:
+                f.write(b"variant")
+            return dest_path
+
+        monkeypatch.setattr(responsive, "HAS_PILLOW", True)
+        monkeypatch.setattr(responsive, "_resize_image", fake_resize)
+        config = _make_site(tmp_path, {'images': {'responsive': {'widths': [480, 960]}}})
+        png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 1200, 600) + b"\x08\x06\x00\x00\x00"
+        (tmp_path / "obsidian" / "attachments" / "wide.png").write_bytes(png)
+        (tmp_path / "obsidian" / "Post.md").write_text("![[wide.png]] and again ![[wide.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        converter._configure_processor()
+        converter.markdown_processor.responsive._pool = ThreadPoolExecutor(max_workers=2)
+        assert converter.convert("Post.md")
+
+        content = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert content.count("-480w.png 480w, /assets/images/wide.png 1200w") == 2
+        assert "960w" not in content
+
+    def test_pillow_generates_variants(self, tmp_path):
+        Image = pytest.importorskip("PIL.Image")
+
+        config = _make_site(tmp_path, {'images': {'responsive': {'widths': [100, 200], 'workers': 1}}})
+        Image.new("RGB", (300, 150), "red").save(tmp_path / "obsidian" / "attachments" / "red.png")
+        (tmp_path / "obsidian" / "Post.md").write_text("![[red.png]]\n")
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        try:
+            assert converter.convert("Post.md")
+        finally:
+            converter.markdown_processor.responsive.close()
+
+        variants = sorted((tmp_path / "jekyll" / "assets" / "images" / "responsive").iterdir())
+        assert [Image.open(path).size for path in variants] == [(100, 50), (200, 100)]
+        content = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert "100w" in content and "200w" in content and "/assets/images/red.png 300w" in content
+
+
+class TestLinkChecker:
+    def test_reports_broken_links_incrementally(self, tmp_path):
+        from daspress.link_checker import LinkChecker
+
+        config = _make_site(tmp_path)
+        site = tmp_path / "jekyll" / "_site"
+        (site / "post").mkdir(parents=True)
+        (site / "assets").mkdir()
+        (site / "assets" / "ok.png").write_bytes(b"png")
+        (site / "post" / "index.html").write_text("<p>post</p>")
+        (site / "index.html").write_text(
+            '<a href="/post/">ok</a><a href="https://example.com/x">ext</a>'
+            '<img src="assets/ok.png"><img src="/assets/missing.png" srcset="/assets/ok.png 1x, /assets/gone.png 2x">'
+        )
+
+        checker = LinkChecker(config, config.reporter)
+        report = checker.check(incremental=True)
+        assert report['pages_checked'] == 2
+        assert {link['url'] for link in report['broken']} == {"/assets/missing.png", "/assets/gone.png"}
+
+        again = LinkChecker(config, config.reporter).check(incremental=True)
+        assert again['pages_checked'] == 0 and again['broken_count'] == 2
+
+    def test_targets_of_unchanged_pages_are_rechecked(self, tmp_path):
+        from daspress.link_checker import LinkChecker
+
+        config = _make_site(tmp_path)
+        site = tmp_path / "jekyll" / "_site"
+        (site / "assets").mkdir(parents=True)
+        (site / "assets" / "ok.png").write_bytes(b"png")
+        (site / "index.html").write_text('<img src="/assets/missing.png">')
+        (site / "about.html").write_text('<img src="/assets/ok.png">')
+
+        first = LinkChecker(config, config.reporter).check(incremental=True)
+        assert [link['url'] for link in first['broken']] == ["/assets/missing.png"]
+
+        # Only the targets change; both pages keep their size and mtime
+        (site / "assets" / "missing.png").write_bytes(b"png")
+        (site / "assets" / "ok.png").unlink()
+        again = LinkChecker(config, config.reporter).check(incremental=True)
+        assert again['pages_checked'] == 0
+        assert [(link['page'], link['url']) for link in again['broken']] == [("about.html", "/assets/ok.png")]
+
+
+class TestWriteIfChanged:
+    def test_unchanged_outputs_keep_mtime(self, tmp_path):
+        from daspress import StatusReporter
+
+        config = _make_site(tmp_path)
+        (tmp_path / "obsidian" / "attachments" / "a.png").write_bytes(b"png")
+        (tmp_path / "obsidian" / "Post.md").write_text("![[a.png]]\n")
+
+        assert DaspressConverter(config=config, reporter=config.reporter).convert("Post.md")
+        post = tmp_path / "jekyll" / "_posts" / "Post.md"
+        image = tmp_path / "jekyll" / "assets" / "images" / "a.png"
+        os.utime(post, ns=(1, 1))
+        os.utime(image, ns=(1, 1))
+
+        reporter = StatusReporter(verbose=False)
+        config.reporter = reporter
+        assert DaspressConverter(config=config, reporter=reporter).convert("Post.md")
+        assert post.stat().st_mtime_ns == 1 and image.stat().st_mtime_ns == 1
+        assert reporter.get_status_dict()["files"] == {"written": 0, "unchanged": 2}
+
+
+class TestNoteTransclusion:
+    def test_embeds_sections_and_cycles(self, tmp_path):
+        from daspress import ConversionSession
+
+        config = _make_site(tmp_path, {'obsidian': {'embeds': True}})
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"png")
+        (notes / "Snippet.md").write_text(
+            "---\ntags: [x]\n---\nIntro ![[a.png]]\n## Usage\nRun it.\n### Detail\nMore.\n## Other\nNope.\n"
+        )
+        (notes / "Loop.md").write_text("Loop start ![[Loop]]\n")
+        (notes / "First.md").write_text("![[Snippet#Usage]]\n![[Loop]]\n")
+        (notes / "Second.md").write_text("![[Snippet]]\n")
+
+        with ConversionSession(config, config.reporter) as session:
+            results = list(session.convert_many(["First.md", "Second.md"]))
+            embedder = session.converter.markdown_processor.embedder
+        assert all(result.success for result in results)
+        assert embedder.parse_count == 2  # Snippet and Loop parsed once each
+
+        first = (tmp_path / "jekyll" / "_posts" / "First.md").read_text()
+        assert "## Usage\nRun it.\n### Detail\nMore." in first and "Nope." not in first
+        assert "Loop start ![[Loop]]" in first
+
+        second = (tmp_path / "jekyll" / "_posts" / "Second.md").read_text()
+        assert "tags:" not in second and "Intro ![a.png](/assets/images/a.png)" in second
+
+    def test_embeds_are_on_by_default_and_can_be_turned_off(self, tmp_path):
+        config = _make_site(tmp_path)
+        (tmp_path / "obsidian" / "Snippet.md").write_text("shared text\n")
+        (tmp_path / "obsidian" / "Post.md").write_text("![[Snippet]] ![[Missing]]\n")
+        post = tmp_path / "jekyll" / "_posts" / "Post.md"
+
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.convert("Post.md")
+        assert "shared text" in post.read_text() and "![[Missing]]" in post.read_text()
+
+        config.config_data['obsidian']['embeds'] = False
+        with open(config.get_config_path(), 'w') as f:
+            yaml.safe_dump(config.config_data, f)
+        assert converter.convert("Post.md")
+        assert "shared text" not in post.read_text()
+
+    def test_memoized_embed_follows_note_changes(self, tmp_path):
+        from daspress.transclusion import NoteEmbedder
+
+        snippet = tmp_path / "Snippet.md"
+        (tmp_path / "Wrapper.md").write_text("Before ![[Snippet]]\n")
+        snippet.write_text("old text\n")
+        embedder = NoteEmbedder([str(tmp_path)])
+        assert embedder.expand("![[Wrapper]]") == "Before old text"
+        assert embedder.expand("![[Wrapper]]") == "Before old text"
+        assert embedder.parse_count == 2
+
+        # Same length, so only the mtime tells the edit apart
+        snippet.write_text("new text\n")
+        os.utime(snippet, ns=(1, 1))
+        assert embedder.expand("![[Wrapper]]") == "Before new text"
+        assert embedder.parse_count == 3
+
+
+class TestMetrics:
+    def test_textfile_and_http_endpoint(self, tmp_path):
+        import urllib.request
+        from daspress.metrics import MetricsRegistry, start_http_server
+
+        registry = MetricsRegistry()
+        posts = registry.counter('test_posts_total', 'Posts', ['result'])
+        phase = registry.histogram('test_phase_seconds', 'Phases', ['phase'], buckets=(0.5, 1))
+        posts.inc(result='success')
+        posts.inc(2, result='success')
+        phase.observe(0.7, phase='convert')
+        with pytest.raises(ValueError):
+            registry.counter('test_posts_total', 'Again')
+
+        text = registry.render()
+        assert 'test_posts_total{result="success"} 3' in text
+        assert 'test_phase_seconds_bucket{phase="convert",le="0.5"} 0' in text
+        assert 'test_phase_seconds_bucket{phase="convert",le="+Inf"} 1' in text
+
+        textfile = tmp_path / "prom" / "daspress.prom"
+        registry.write_textfile(str(textfile))
+        assert textfile.read_text() == text
+
+        server = start_http_server(0, '127.0.0.1', registry)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/metrics"
+            with urllib.request.urlopen(url) as response:
+                assert response.read().decode() == text
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_only_failed_pushes_count_as_push_failures(self, tmp_path):
+        from daspress.metrics import GIT_PUSH_FAILURES
+
+        config = _make_site(tmp_path)
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        assert converter.config.load_config()
+        failures = GIT_PUSH_FAILURES.get()
+        assert not converter._publish_to_git(str(tmp_path / "jekyll"))  # not a repository: `git add` fails
+        assert GIT_PUSH_FAILURES.get() == failures
+
+
+class TestPreviewServer:
+    def test_renders_serves_images_and_pushes_reload(self, tmp_path):
+        import urllib.request
+        from daspress.preview import PreviewServer
+
+        config = _make_site(tmp_path)
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "shot.png").write_bytes(b"\x89PNG\r\n\x1a\nfake")
+        post = notes / "Post.md"
+        post.write_text("---\ntitle: Hello\n---\nSome **bold** text\n\n![[shot.png]]\n")
+
+        preview = PreviewServer(config, config.reporter)
+        assert preview.start("Post.md", port=0, watch=False)
+        try:
+            with urllib.request.urlopen(preview.url) as response:
+                page = response.read().decode()
+            assert "<h1>Hello</h1>" in page and "<strong>bold</strong>" in page
+            assert '<img src="/assets/images/shot.png"' in page
+            with urllib.request.urlopen(preview.url + "assets/images/shot.png") as response:
+                assert response.read() == b"\x89PNG\r\n\x1a\nfake"
+
+            events = urllib.request.urlopen(preview.url + "events", timeout=5)
+            assert events.readline() == b": connected\n"
+            events.readline()
+            assert not preview.check_for_changes()
+
+            post.write_text("---\ntitle: Hello again\n---\nUpdated\n")
+            assert preview.check_for_changes()
+            assert events.readline() == b"event: reload\n"
+            events.close()
+            with urllib.request.urlopen(preview.url) as response:
+                assert "<h1>Hello again</h1>" in response.read().decode()
+        finally:
+            preview.stop()
+
+        # Previews never write into the real site
+        assert not [path for path in (tmp_path / "jekyll").rglob("*") if path.is_file()]
+        assert (tmp_path / "state" / "preview" / "assets" / "images" / "shot.png").exists()
+
+    def test_reloads_when_an_embedded_note_changes(self, tmp_path):
+        from daspress.preview import PreviewServer
+
+        config = _make_site(tmp_path, {'obsidian': {'embeds': True}})
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "inner.png").write_bytes(b"png")
+        snippet = notes / "Snippet.md"
+        snippet.write_text("Shared part ![[inner.png]]\n")
+        (notes / "Post.md").write_text("Intro\n\n![[Snippet]]\n")
+
+        preview = PreviewServer(config, config.reporter)
+        assert preview.start("Post.md", port=0, watch=False)
+        try:
+            assert str(snippet) in preview._watched
+            assert str(notes / "attachments" / "inner.png") in preview._watched
+            assert not preview.check_for_changes()
+
+            snippet.write_text("Changed part\n")
+            assert preview.check_for_changes()
+            assert "Changed part" in preview.render_page()
+        finally:
+            preview.stop()
+
+
+class TestPreviewProfile:
+    def test_overlay_builds_only_previewed_posts(self, tmp_path):
+        import sys
+        from daspress.jekyll_server import JekyllServerManager
+
+        script = tmp_path / "fake_jekyll.py"
+        script.write_text(FAKE_JEKYLL)
+        config = _make_site(tmp_path, {'jekyll': {
+            'port': _free_port(),
+            'serve_command': f'"{sys.executable}" "{script}"',
+            'preview_exclude': ['docs']
+        }})
+        jekyll = tmp_path / "jekyll"
+        (jekyll / "_config.yml").write_text("exclude: [README.md]\n")
+        (jekyll / "assets" / "images").mkdir(parents=True, exist_ok=True)
+        (jekyll / "assets" / "images" / "used.png").write_bytes(b"a")
+        (jekyll / "assets" / "images" / "other.png").write_bytes(b"b")
+        posts = jekyll / "_posts"
+        (posts / "2024-01-01-new.md").write_text(
+            "![x](/assets/images/used.png) {% post_url 2023-01-01-linked %}\n")
+        (posts / "2023-01-01-linked.md").write_text("linked\n")
+        (posts / "2022-01-01-old.md").write_text("old\n")
+
+        manager = JekyllServerManager(config, config.reporter)
+        with open(manager.write_preview_overlay([str(posts / "2024-01-01-new.md")])) as f:
+            overlay = yaml.safe_load(f)
+        assert overlay['incremental'] is True
+        assert overlay['exclude'] == ["README.md", "docs", "_posts", "assets/images"]
+        assert overlay['include'] == [
+            ".htaccess", "2023-01-01-linked.md", "2024-01-01-new.md", "images", "used.png"
+        ]
+
+        try:
+            assert manager.ensure_running(wait=True, timeout=20, posts=[str(posts / "2024-01-01-new.md")])
+            first_pid = manager.load_state()['pid']
+            assert manager.ensure_running(wait=True, timeout=20, posts=[str(posts / "2024-01-01-new.md")])
+            assert manager.load_state()['pid'] == first_pid
+
+            # A post outside the running profile needs a restart
+            assert manager.ensure_running(wait=True, timeout=20, posts=[str(posts / "2022-01-01-old.md")])
+            assert manager.load_state()['pid'] != first_pid
+        finally:
+            manager.stop()
+
+
+class TestBatchJournal:
+    def test_resume_skips_verified_posts(self, tmp_path):
+        from daspress import ConversionSession
+        from daspress.journal import BatchJournal
+
+        config = _make_site(tmp_path)
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"png")
+        for name in ("One", "Two", "Three"):
+            (notes / f"{name}.md").write_text(f"{name} ![[a.png]]\n")
+        posts = ["One.md", "Two.md", "Three.md"]
+        journal_path = str(tmp_path / "state" / "batch.jsonl")
+
+        # Interrupted run: only the first two posts complete
+        journal = BatchJournal(journal_path)
+        journal.reset()
+        with ConversionSession(config, config.reporter) as session:
+            batch = session.convert_many(posts, journal)
+            assert next(batch).success and next(batch).success
+
+        # A damaged output is reconverted on resume
+        (tmp_path / "jekyll" / "_posts" / "Two.md").write_text("truncated")
+
+        journal = BatchJournal(journal_path)
+        assert journal.load() == 2
+        with ConversionSession(config, config.reporter) as session:
+            results = {result.post: result for result in session.convert_many(posts, journal)}
+        assert results["One.md"].skipped
+        assert not results["Two.md"].skipped and results["Two.md"].success
+        assert not results["Three.md"].skipped and results["Three.md"].success
+        assert "Two ![a.png]" in (tmp_path / "jekyll" / "_posts" / "Two.md").read_text()
+        assert BatchJournal(journal_path).load() == 3
+
+
+class TestAttachmentIndex:
+    def test_rebuild_only_dependent_posts(self, tmp_path):
+        from daspress import ConversionSession
+
+        config = _make_site(tmp_path, {'obsidian': {'embeds': True}})
+        notes = tmp_path / "obsidian"
+        shot = notes / "attachments" / "shot.png"
+        shot.write_bytes(b"v1")
+        (notes / "attachments" / "other.png").write_bytes(b"other")
+        (notes / "Uses.md").write_text("![[shot.png]]\n")
+        (notes / "Snippet.md").write_text("Shared ![[shot.png]]\n")
+        (notes / "Embeds.md").write_text("![[Snippet]]\n")
+        (notes / "Unrelated.md").write_text("![[other.png]]\n")
+
+        with ConversionSession(config, config.reporter) as session:
+            list(session.convert_many(["Uses.md", "Embeds.md", "Unrelated.md"]))
+            assert session.rebuild_attachments() == []
+
+            shot.write_bytes(b"v2-longer")
+            results = session.rebuild_attachments()
+
+        assert sorted(os.path.basename(result.post) for result in results) == ["Embeds.md", "Uses.md"]
+        assert all(result.success for result in results)
+        assert (tmp_path / "jekyll" / "assets" / "images" / "shot.png").read_bytes() == b"v2-longer"
+
+    def test_shared_image_stays_stale_for_posts_not_reconverted(self, tmp_path):
+        from daspress import ConversionSession
+
+        config = _make_site(tmp_path)
+        notes = tmp_path / "obsidian"
+        shot = notes / "attachments" / "shot.png"
+        shot.write_bytes(b"v1")
+        (notes / "A.md").write_text("A ![[shot.png]]\n")
+        (notes / "B.md").write_text("B ![[shot.png]]\n")
+
+        with ConversionSession(config, config.reporter) as session:
+            list(session.convert_many(["A.md", "B.md"]))
+            shot.write_bytes(b"v2-longer")
+            assert session.convert("A.md").success  # only A is reconverted by hand
+
+            index = session.converter.attachment_index
+            assert index.changed_attachments() == [str(shot)]
+            assert [os.path.basename(post) for post in index.stale_posts()] == ["B.md"]
+            results = session.rebuild_attachments()
+
+        assert [os.path.basename(result.post) for result in results] == ["B.md"]
+        assert session.converter.attachment_index.stale_posts() == []
+
+
+class TestWorkQueue:
+    def test_processes_share_queue_and_reclaim_expired_leases(self, tmp_path):
+        import subprocess, sys, time
+        from daspress.work_queue import WorkQueue
+
+        config = _make_site(tmp_path, {'queue': {'lease_seconds': 2}})
+        notes = tmp_path / "obsidian"
+        posts = [f"Post {index}.md" for index in range(12)]
+        for post in posts:
+            (notes / post).write_text(f"Body of {post}\n")
+
+        # A worker that crashed while holding a lease
+        queue_dir = tmp_path / "queue"
+        crashed = WorkQueue(str(queue_dir), "crashed")
+        crashed.enqueue(posts)
+        assert crashed.claim() is not None
+        lease = next((queue_dir / "leases").iterdir())
+        os.utime(lease, (time.time() - 60, time.time() - 60))
+
+        workers = [subprocess.Popen(
+            [sys.executable, "-m", "daspress", "--config", config.get_config_path(), "--quiet",
+             "batch", *posts, "--queue", str(queue_dir), "--worker-id", f"host{index}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        ) for index in range(3)]
+        assert all(worker.wait(timeout=60) == 0 for worker in workers)
+
+        report = WorkQueue(str(queue_dir), "reader").report()
+        assert (report['total'], report['succeeded'], report['failed'], report['pending']) == (12, 12, 0, 0)
+        assert sum(report['workers'].values()) == 12 and "crashed" not in report['workers']
+        assert sorted(entry['post'] for entry in report['results']) == sorted(posts)
+        assert len(list((tmp_path / "jekyll" / "_posts").iterdir())) == 12
+        assert not list((queue_dir / "leases").iterdir())
+
+
+class TestSearchIndex:
+    def test_index_updates_only_converted_posts(self, tmp_path):
+        import json
+        from daspress import ConversionSession
+        from daspress.search_index import tokenize
+
+        assert tokenize("The Caching of running posts") == ["cach", "runn", "post"]
+
+        config = _make_site(tmp_path, {'search': {'enabled': True}})
+        notes = tmp_path / "obsidian"
+        (notes / "Bread.md").write_text("---\ntitle: Sourdough bread\n---\nBaking sourdough loaves\n")
+        (notes / "Kernel.md").write_text("Tuning kernel schedulers\n")
+        search_dir = tmp_path / "jekyll" / "assets" / "search"
+
+        with ConversionSession(config, config.reporter) as session:
+            list(session.convert_many(["Bread.md", "Kernel.md"]))
+        docs = json.loads((search_dir / "docs.json").read_text())
+        assert sorted(title for title, _ in docs.values()) == ["Kernel", "Sourdough bread"]
+        assert (search_dir / "search.js").exists()
+        postings = json.loads((search_dir / "so.json").read_text())["sourdough"]
+        assert len(postings) == 1 and postings[0][1] == 3  # title counts double
+        kernel_shard = (search_dir / "ke.json").stat().st_mtime_ns
+
+        (notes / "Bread.md").write_text("---\ntitle: Rye bread\n---\nBaking rye\n")
+        with ConversionSession(config, config.reporter) as session:
+            session.convert("Bread.md")
+        assert not (search_dir / "so.json").exists()
+        assert "rye" in json.loads((search_dir / "ry.json").read_text())
+        assert (search_dir / "ke.json").stat().st_mtime_ns == kernel_shard  # untouched post, untouched shard
+
+    def test_singular_and_plural_share_a_stem(self, tmp_path):
+        import json
+        import shutil
+        import subprocess
+        from daspress.search_index import SearchIndex, stem
+
+        words = ["image", "images", "note", "notes", "style", "styles", "cache", "caches",
+                 "box", "boxes", "wish", "wishes", "class", "classes", "story", "stories"]
+        stems = [stem(word) for word in words]
+        assert stems[0::2] == stems[1::2]
+        assert stem("notes") != stem("not")
+
+        post = tmp_path / "2024-01-01-post.md"
+        post.write_text("Images")
+        index = SearchIndex(str(tmp_path / "site"), str(tmp_path / "state"))
+        index.update(str(post), post.read_text())
+        assert not os.path.exists(index.state_path)  # term state is saved once per run, not per post
+        index.save()
+        assert "image" in json.loads(open(index.state_path).read())["docs"][str(post)]["terms"]
+        script = (tmp_path / "site" / "assets" / "search" / "search.js").read_text()
+        if shutil.which("node"):
+            harness = ("global.document = {currentScript: {src: ''}}; global.window = {};"
+                       + script.replace("window.daspressSearch", "window.stem = stem; window.daspressSearch")
+                       + f"console.log(JSON.stringify({words!r}.map(window.stem)));")
+            output = subprocess.run(["node", "-e", harness], capture_output=True, text=True, check=True).stdout
+            assert json.loads(output) == stems
+
+
+class TestDeploy:
+    def test_delta_sync_with_atomic_release_switch(self, tmp_path):
+        from daspress.deploy import SiteDeployer, parse_target
+
+        assert parse_target("deploy@example.com:/var/www/blog") == ("deploy@example.com", "/var/www/blog")
+        assert parse_target(str(tmp_path / "www")) == (None, str(tmp_path / "www"))
+
+        config = _make_site(tmp_path, {'deploy': {'target': str(tmp_path / "www"), 'keep_releases': 2}})
+        site = tmp_path / "jekyll" / "_site"
+        (site / "posts").mkdir(parents=True)
+        (site / "index.html").write_text("home v1")
+        (site / "posts" / "a.html").write_text("post a")
+        (site / "old.html").write_text("old")
+
+        deployer = SiteDeployer(config, config.reporter)
+        first = deployer.deploy()
+        assert first['uploaded'] == 3 and first['removed'] == 0
+        current = tmp_path / "www" / "current"
+        assert (current / "posts" / "a.html").read_text() == "post a"
+        first_inode = os.stat(current / "posts" / "a.html").st_ino
+
+        (site / "index.html").write_text("home v2")
+        (site / "old.html").unlink()
+        second = deployer.deploy()
+        assert (second['uploaded'], second['unchanged'], second['removed']) == (1, 1, 1)
+        assert os.readlink(current) == os.path.join("releases", second['release'])
+        assert (current / "index.html").read_text() == "home v2"
+        assert not (current / "old.html").exists()
+        assert os.stat(current / "posts" / "a.html").st_ino == first_inode  # hard-linked, not copied
+        # The previous release is untouched until pruned
+        assert (tmp_path / "www" / "releases" / first['release'] / "index.html").read_text() == "home v1"
+
+        deployer.deploy()
+        releases = sorted(name for name in os.listdir(tmp_path / "www" / "releases") if not name.endswith(".json"))
+        assert len(releases) == 2 and first['release'] not in releases
+
+
+class TestConversionResult:
+    def test_one_processor_serves_a_thread_pool(self, tmp_path):
+        from concurrent.futures import ThreadPoolExecutor
+        from daspress import MarkdownProcessor
+
+        src = tmp_path / "attachments"
+        dest = tmp_path / "images"
+        src.mkdir()
+        dest.mkdir()
+        for index in range(8):
+            (src / f"img{index}.png").write_bytes(b"png%d" % index)
+        (dest / "img0.png").write_bytes(b"png0")
+
+        processor = MarkdownProcessor()
+
+        def convert(index):
+            return processor.convert(f"Post {index} ![[img{index}.png]] ![[missing.png]]", str(src), str(dest))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(convert, range(8)))
+
+        for index, result in enumerate(results):
+            assert result.success
+            assert result.content == f"Post {index} ![img{index}.png](/assets/images/img{index}.png) ![[missing.png]]"
+            assert [asset.source for asset in result.assets] == [str(src / f"img{index}.png")]
+            assert len(result.warnings) == 1 and "missing.png" in result.warnings[0]
+            assert result.timings['total'] >= result.timings['render']
+        assert results[0].images_unchanged == 1 and results[1].images_copied == 1
+        # The shared processor and its reporter were never touched
+        assert processor.images_processed == 0 and processor.images_used == []
+        assert processor.reporter.messages == []
+
+
+class TestReentrantConvert:
+    def test_concurrent_conversions_wait_only_for_their_own_variants(self, tmp_path, monkeypatch):
+        import struct
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from daspress import MarkdownProcessor
+        from daspress import responsive
+        from daspress.responsive import ResponsiveImageGenerator
+
+        def fake_resize(source_path, dest_path, width):
+            if "slow" in source_path:
+                time.sleep(0.3)
+                raise OSError("unsupported image")
+            with open(dest_path, "wb") as f:
+                f.write(b"variant")
+            return dest_path
+
+        monkeypatch.setattr(responsive, "HAS_PILLOW", True)
+        monkeypatch.setattr(responsive, "_resize_image", fake_resize)
+
+        images = tmp_path / "attachments"
+        images.mkdir()
+        png = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 1200, 600) + b"\x08\x06\x00\x00\x00"
+        (images / "slow.png").write_bytes(png + b"slow")
+        (images / "fast.png").write_bytes(png + b"fast")
+        (tmp_path / "out").mkdir()
+
+        generator = ResponsiveImageGenerator([480])
+        generator._pool = ThreadPoolExecutor(max_workers=4)  # threads instead of processes for the fake resizer
+        processor = MarkdownProcessor()
+        processor.set_asset_naming('hash')
+        processor.set_responsive(generator)
+
+        results, finished = {}, {}
+
+        def convert(name, delay):
+            time.sleep(delay)
+            results[name] = processor.convert(f"![[{name}.png]]", str(images), str(tmp_path / "out"))
+            finished[name] = time.perf_counter()
+
+        threads = [threading.Thread(target=convert, args=("slow", 0)),
+                   threading.Thread(target=convert, args=("fast", 0.1))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        generator.close()
+
+        # Each call saw only the variants, failures and assets of its own images
+        assert finished["fast"] < finished["slow"]
+        assert results["fast"].warnings == []
+        assert any("unsupported image" in warning for warning in results["slow"].warnings)
+        assert [os.path.basename(asset.source) for asset in results["fast"].assets] == ["fast.png"]
+        assert [os.path.basename(asset.source) for asset in results["slow"].assets] == ["slow.png"]
+        assert processor.images_used == [] and processor.variant_jobs == {}
+
+
+class TestInMemoryConversion:
+    def test_convert_without_touching_disk(self, tmp_path, monkeypatch):
+        import builtins
+        from daspress import MarkdownProcessor, MemoryFileSystem
+
+        png = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + (640).to_bytes(4, 'big') + (480).to_bytes(4, 'big') + b'rest'
+        processor = MarkdownProcessor()
+        processor.set_asset_naming('hash')
+        processor.set_asset_layout('hash')
+        processor.set_image_output('html')
+
+        real_open = builtins.open
+        monkeypatch.setattr(builtins, 'open', lambda *args, **kwargs: pytest.fail(f"disk access: {args[0]}"))
+        result = processor.convert_in_memory("![[Shot.png]] ![[Missing.png]]", {"Shot.png": png})
+        monkeypatch.setattr(builtins, 'open', real_open)
+
+        assert result.success and len(result.warnings) == 1
+        (asset,) = result.assets
+        assert asset.copied and asset.destination.startswith("assets/images/")
+        assert f'src="/{asset.destination}"' in result.content and 'width="640" height="480"' in result.content
+        assert isinstance(result.sink, MemoryFileSystem) and result.sink.read_bytes(asset.destination) == png
+
+        # Nothing is on disk until the caller commits
+        assert result.sink.commit(str(tmp_path)) == 1
+        assert (tmp_path / asset.destination).read_bytes() == png
+        assert result.sink.commit(str(tmp_path)) == 0
+
+    def test_converter_writes_site_files_to_the_sink(self, tmp_path):
+        from daspress import MemoryFileSystem
+
+        config = _make_site(tmp_path, {'images': {'naming': 'hash'}, 'search': {'enabled': True}})
+        (tmp_path / "obsidian" / "attachments" / "shot.png").write_bytes(b"png")
+        (tmp_path / "obsidian" / "Post.md").write_text("Sourdough ![[shot.png]]\n")
+        jekyll = tmp_path / "jekyll"
+
+        sink = MemoryFileSystem()
+        converter = DaspressConverter(config=config, reporter=config.reporter)
+        converter.markdown_processor.set_filesystems(sink_fs=sink)
+        assert converter.convert("Post.md")
+
+        site_files = lambda: sorted(str(path.relative_to(jekyll)) for path in jekyll.rglob("*") if path.is_file())
+        assert site_files() == []
+        written = {os.path.relpath(path, jekyll) for path in sink.written}
+        assert {"_posts/Post.md", "_headers", "assets/search/docs.json"} <= written
+
+        sink.commit()
+        assert "Sourdough" in (jekyll / "_posts" / "Post.md").read_text()
+        assert "immutable" in (jekyll / "_headers").read_text()
+        assert len(site_files()) == len(written)
+
+    def test_local_only_features_warn_when_skipped(self, tmp_path):
+        from daspress import FileSystem, MarkdownProcessor
+        from daspress.responsive import ResponsiveImageGenerator
+        from daspress.transclusion import NoteEmbedder
+
+        with pytest.raises(TypeError):
+            FileSystem()
+
+        (tmp_path / "Snippet.md").write_text("shared text\n")
+        png = b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR' + (640).to_bytes(4, 'big') + (480).to_bytes(4, 'big') + b'rest'
+        processor = MarkdownProcessor()
+        processor.embedder = NoteEmbedder([str(tmp_path)])
+        processor.responsive = ResponsiveImageGenerator([320])
+        result = processor.convert_in_memory("![[Snippet]] ![[A.png]] ![[B.png]]", {"A.png": png, "B.png": png})
+
+        assert "![[Snippet]]" in result.content and "shared text" not in result.content
+        # Reported once per render, however many embeds or images were skipped
+        assert result.warnings.count("Note embeds need the local filesystem and are skipped with MemoryFileSystem") == 1
+        assert result.warnings.count(
+            "Responsive image variants need the local filesystem and are skipped with MemoryFileSystem") == 1
+
+
+class TestCodeHighlighting:
+    def test_blocks_are_prehighlighted_and_cached(self, tmp_path, monkeypatch):
+        import daspress.highlight
+
+        config = _make_site(tmp_path, {'highlight': {'enabled': True, 'css': 'assets/css/highlight.css'}})
+        (tmp_path / "obsidian" / "Code.md").write_text(
+            "Intro\n\n```python\ndef f():\n\n    return 1\n```\n\n```no-such-lang\nkeep me\n```\n"
+        )
+        assert DaspressConverter(config=config, reporter=config.reporter).convert("Code.md")
+        post = tmp_path / "jekyll" / "_posts" / "Code.md"
+        content = post.read_text()
+        assert '<div class="language-python highlighter-rouge"><div class="highlight"><pre class="highlight"><code>' in content
+        assert '<span class="k">def</span>' in content and "```python" not in content
+        assert "```no-such-lang\nkeep me\n```" in content
+        assert ".highlight" in (tmp_path / "jekyll" / "assets" / "css" / "highlight.css").read_text()
+
+        # A new process renders unchanged blocks from the persisted cache
+        monkeypatch.setattr(daspress.highlight, 'highlight', lambda *args: pytest.fail("block re-highlighted"))
+        post.unlink()
+        assert DaspressConverter(config=config, reporter=config.reporter).convert("Code.md")
+        assert post.read_text() == content
+
+
+class TestAsyncConverter:
+    def test_concurrent_conversions_and_async_git_publish(self, tmp_path):
+        import asyncio
+        import subprocess
+        from daspress import AsyncDaspressConverter
+
+        config = _make_site(tmp_path)
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"png")
+        posts = [f"Post {index}.md" for index in range(6)]
+        for post in posts:
+            (notes / post).write_text(f"{post} ![[a.png]]\n")
+
+        jekyll = tmp_path / "jekyll"
+        remote = tmp_path / "remote.git"
+        subprocess.run(["git", "init", "-q", "--bare", str(remote)], check=True)
+        for args in (["init", "-q"], ["config", "user.email", "t@example.com"], ["config", "user.name", "T"],
+                     ["remote", "add", "origin", str(remote)]):
+            subprocess.run(["git", *args], cwd=jekyll, check=True)
+
+        async def run():
+            async with AsyncDaspressConverter(config, config.reporter, max_conversions=3) as converter:
+                converted = await asyncio.gather(*(converter.convert(post) for post in posts))
+                subprocess.run(["git", "checkout", "-q", "-b", "main"], cwd=jekyll, check=True)
+                subprocess.run(["git", "config", "push.default", "current"], cwd=jekyll, check=True)
+                published = await converter.publish("remote_only")
+                return converted, published
+
+        converted, published = asyncio.run(run())
+        assert all(converted) and published
+        for index in range(6):
+            assert (jekyll / "_posts" / f"Post-{index}.md").read_text().startswith(f"Post {index}.md ![a.png]")
+        log = subprocess.run(["git", "log", "--oneline", "main"], cwd=remote, capture_output=True, text=True)
+        assert "Published blog post" in log.stdout
+
+    def test_setup_runs_off_the_loop_and_publishing_never_optimizes(self, tmp_path):
+        import asyncio
+        import threading
+        from daspress import AsyncDaspressConverter
+
+        config = _make_site(tmp_path, {'optimize': {'enabled': True}})
+        (tmp_path / "obsidian" / "Post.md").write_text("Hello\n")
+        page = tmp_path / "jekyll" / "_site" / "index.html"
+        page.parent.mkdir()
+        page.write_text("<p>   spaced   </p>\n")
+
+        async def run():
+            async with AsyncDaspressConverter(config, config.reporter) as converter:
+                configure = converter.converter._configure_processor
+                threads = []
+                converter.converter._configure_processor = lambda: (threads.append(threading.current_thread()),
+                                                                    configure())
+                assert await converter.convert_and_publish("Post.md")
+                return threads
+
+        threads = asyncio.run(run())
+        assert threads and threads[0] is not threading.main_thread()
+        assert page.read_text() == "<p>   spaced   </p>\n"
+
+
+class TestPublishWorkspace:
+    def test_sparse_workspace_publishes_to_bare_remote(self, tmp_path, monkeypatch):
+        import subprocess
+
+        def git(*args, cwd=None):
+            return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+        for key in ("AUTHOR", "COMMITTER"):
+            monkeypatch.setenv(f"GIT_{key}_NAME", "T")
+            monkeypatch.setenv(f"GIT_{key}_EMAIL", "t@example.com")
+
+        # Remote site with a large folder daspress never writes to
+        remote = tmp_path / "site.git"
+        git("init", "-q", "--bare", "-b", "main", str(remote))
+        git("config", "uploadpack.allowFilter", "true", cwd=remote)
+        seed = tmp_path / "seed"
+        git("clone", "-q", str(remote), str(seed))
+        (seed / "_posts").mkdir()
+        (seed / "_posts" / "2020-01-01-old.md").write_text("old\n")
+        (seed / "other").mkdir()
+        (seed / "other" / "big.bin").write_bytes(os.urandom(4096))
+        (seed / "_config.yml").write_text("title: t\n")
+        git("add", ".", cwd=seed)
+        git("commit", "-q", "-m", "seed", cwd=seed)
+        git("push", "-q", "origin", "HEAD:main", cwd=seed)
+
+        workspace = tmp_path / "workspace"
+        config = _make_site(tmp_path, {'jekyll': {
+            'root_folder': str(workspace),
+            'workspace': {'remote': remote.as_uri(), 'branch': 'main'}
+        }})
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"png")
+        (notes / "Post.md").write_text("Hello ![[a.png]]\n")
+
+        converter = DaspressConverter(config, config.reporter)
+        assert converter.convert_and_publish("Post.md", "remote_only")
+
+        assert (workspace / "_config.yml").exists()
+        assert (workspace / "_posts" / "2020-01-01-old.md").exists()
+        assert not (workspace / "other").exists()
+        missing = git("rev-list", "--objects", "--missing=print", "HEAD", cwd=workspace)
+        assert any(line.startswith("?") for line in missing.splitlines())  # big.bin was never fetched
+
+        files = git("ls-tree", "-r", "--name-only", "main", cwd=remote).split()
+        assert {"_posts/Post.md", "assets/images/a.png", "other/big.bin"} <= set(files)
+
+        # Someone else pushes between conversion and publishing: the push is retried after a rebase
+        (notes / "Post.md").write_text("Hello again ![[a.png]]\n")
+        converter = DaspressConverter(config, config.reporter)
+        assert converter.convert_and_publish("Post.md", "convert_only")
+        git("pull", "-q", "origin", "main", cwd=seed)
+        (seed / "other" / "note.txt").write_text("x\n")
+        git("add", ".", cwd=seed)
+        git("commit", "-q", "-m", "concurrent", cwd=seed)
+        git("push", "-q", "origin", "HEAD:main", cwd=seed)
+
+        from daspress.metrics import GIT_PUSH_FAILURES
+        failures = GIT_PUSH_FAILURES.get()
+        assert converter._publish_all_targets()
+        assert GIT_PUSH_FAILURES.get() == failures + 1  # only the rejected push counts
+        log = git("log", "--format=%s", "main", cwd=remote).split("\n")
+        assert log[:3] == ["Published blog post", "concurrent", "Published blog post"]
+        assert git("show", "main:_posts/Post.md", cwd=remote).startswith("Hello again")
+
+        # The sparse tree has no theme, so it is never served or built locally
+        assert not converter.jekyll_server.has_full_checkout()
+        assert not converter.convert_and_publish("Post.md", "local_only")
+        assert not converter.optimize_site(build=True)
+        assert converter.jekyll_server.load_state() is None
+
+
+class TestAssetStore:
+    def test_images_go_to_store_not_site(self, tmp_path):
+        store_dir = tmp_path / "store"
+        config = _make_site(tmp_path, {'images': {'store': {'url': "https://cdn.example.com/img/",
+                                                            'folder': str(store_dir)}}})
+        notes = tmp_path / "obsidian"
+        (notes / "attachments" / "a.png").write_bytes(b"same bytes")
+        (notes / "attachments" / "copy of a.png").write_bytes(b"same bytes")
+        (notes / "Post.md").write_text("![[a.png]] ![[copy of a.png]]\n")
+
+        converter = DaspressConverter(config, config.reporter)
+        assert converter.convert("Post.md")
+
+        import hashlib
+        digest = hashlib.sha256(b"same bytes").hexdigest()
+        url = f"https://cdn.example.com/img/{digest[:2]}/{digest}.png"
+        post = (tmp_path / "jekyll" / "_posts" / "Post.md").read_text()
+        assert post.count(f"]({url})") == 2
+        assert (store_dir / digest[:2] / f"{digest}.png").read_bytes() == b"same bytes"
+        assert [path.name for path in store_dir.rglob("*") if path.is_file()] == [f"{digest}.png"]
+        assert not list((tmp_path / "jekyll" / "assets" / "images").rglob("*.png"))
+
+        # The next run knows the key from the state index and does not upload again
+        converter = DaspressConverter(config, config.reporter)
+        assert converter.convert("Post.md")
+        assert converter.markdown_processor.images_processed == 0
+        assert converter.markdown_processor.images_unchanged == 2
+
+    def test_concurrent_deduplicated_uploads(self, tmp_path):
+        import threading
+        import time
+        from daspress import AssetStore, MarkdownProcessor, MemoryFileSystem
+
+        class SlowBucket(MemoryFileSystem):
+            """Stand-in for an S3 bucket with slow PUTs"""
+
+            def __init__(self):
+                super().__init__()
+                self.active = self.peak = self.puts = 0
+                self.counter_lock = threading.Lock()
+
+            def write_if_changed(self, path, data):
+                with self.counter_lock:
+                    self.active += 1
+                    self.puts += 1
+                    self.peak = max(self.peak, self.active)
+                time.sleep(0.1)
+                try:
+                    return super().write_if_changed(path, data)
+                finally:
+                    with self.counter_lock:
+                        self.active -= 1
+
+        bucket = SlowBucket()
+        store = AssetStore(bucket, "https://bucket.example.com", root="images", workers=4)
+        processor = MarkdownProcessor()
+        processor.set_asset_store(store)
+        attachments = {f"{index}.png": b"image %d" % (index % 6) for index in range(12)}
+        content = " ".join(f"![[{name}]]" for name in attachments)
+
+        result = processor.convert_in_memory(content, attachments)
+        assert result.success and store.wait() == []
+        assert bucket.puts == 6 and bucket.peak > 1
+        assert len(list(bucket.list_files("images"))) == 6
+        assert all(asset.destination.startswith("https://bucket.example.com/") for asset in result.assets)
+        assert sum(asset.copied for asset in result.assets) == 6
+        assert not result.sink.written
+        store.close()